@@ -0,0 +1,40 @@
+"""
+Builds per-tier/role/champion percentile tables from the local match store.
+
+    python -m app.cli.build_percentiles [--store data/match_store.sqlite3] [--out data/percentiles.npz]
+                                        [--tiers tiers.json] [--min-samples 20]
+
+`--tiers` is an optional JSON object of PUUID -> tier for players the store hasn't seen analyzed.
+"""
+import os
+import json
+import time
+import argparse
+from app.services.match_store import MatchStore
+from app.services.percentiles import build_from_store
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build percentile tables from cached matches.")
+    parser.add_argument("--store", default=os.getenv("MATCH_STORE_PATH", "data/match_store.sqlite3"))
+    parser.add_argument("--out", default=os.getenv("PERCENTILE_TABLES_PATH", "data/percentiles.npz"))
+    parser.add_argument("--tiers", help="JSON file mapping PUUID to ranked tier")
+    parser.add_argument("--min-samples", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    tiers = None
+    if args.tiers:
+        with open(args.tiers) as f:
+            tiers = json.load(f)
+
+    start = time.perf_counter()
+    store = MatchStore(path=args.store, memory_size=0)
+    try:
+        matches = store.count("detail")
+        tables = build_from_store(store, tiers=tiers, min_samples=args.min_samples)
+    finally:
+        store.close()
+    tables.save(args.out)
+    print(f"Built {len(tables)} sketches from {matches} matches in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Warms the match store from exported Match-V5 payloads, so a new node serves known matches without Riot calls.
+
+    python -m app.cli.ingest_matches SOURCE [--store data/match_store.sqlite3] [--workers N] [--chunk-size 200]
+
+SOURCE is a directory of *.json files or a JSONL file. Each document is a match detail, a match
+timeline, or an object with "match" and/or "timeline" keys. Parsing and timeline summarisation
+(the derived early-game stats the analyzer reads via RiotClient.get_timeline_summary) run in worker
+processes; the parent is the only SQLite writer. Per-participant features are not stored: the
+analyzer extracts them from the stored payloads in one MatchFeatureBatch, which is cheap next to Riot.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.services.feature_extraction import PARTICIPANTS_PER_MATCH
+from app.services.match_store import MatchStore
+from app.services.timeline_parser import summarize_timeline
+
+def _documents(raw: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(raw, dict) and ("match" in raw or "timeline" in raw):
+        yield from (raw[k] for k in ("match", "timeline") if raw.get(k))
+    elif isinstance(raw, dict):
+        yield raw
+
+def _classify(doc: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """('detail' | 'timeline', match_id) for a Riot payload, (None, None) for anything else."""
+    match_id = (doc.get("metadata") or {}).get("matchId")
+    info = doc.get("info") or {}
+    if not match_id:
+        return None, None
+    if "frames" in info:
+        return "timeline", match_id
+    if "participants" in info:
+        return "detail", match_id
+    return None, None
+
+def process_chunk(chunk: List[str], from_files: bool) -> Dict[str, Any]:
+    """Worker: raw documents -> encoded store rows (details and timeline summaries)."""
+    details: Dict[str, Dict[str, Any]] = {}
+    summaries: Dict[str, Dict[str, Any]] = {}
+    errors = 0
+    for item in chunk:
+        try:
+            if from_files:
+                with open(item, "rb") as f:
+                    raw = json.load(f)
+            else:
+                raw = json.loads(item)
+        except (OSError, ValueError):
+            errors += 1
+            continue
+        for doc in _documents(raw):
+            kind, match_id = _classify(doc)
+            if kind == "detail":
+                details[match_id] = doc
+            elif kind == "timeline":
+                summaries[match_id] = summarize_timeline(doc)
+            else:
+                errors += 1
+
+    # Details without any participant give the analyzer nothing to extract, so they're rejected
+    participants = {m: len((d["info"]["participants"] or [])[:PARTICIPANTS_PER_MATCH]) for m, d in details.items()}
+    valid = [m for m, count in participants.items() if count]
+    rows = [("detail", m, MatchStore.encode(details[m])) for m in valid]
+    rows += [("timeline_summary", m, MatchStore.encode(s)) for m, s in summaries.items()]
+    return {
+        "rows": rows,
+        "matches": len(valid),
+        "timelines": len(summaries),
+        "participants": sum(participants.values()),
+        "errors": errors + len(details) - len(valid),
+    }
+
+def _chunks(source: str, chunk_size: int) -> Iterator[List[str]]:
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source) if name.endswith(".json"))
+        for i in range(0, len(paths), chunk_size):
+            yield paths[i:i + chunk_size]
+        return
+    chunk: List[str] = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def ingest(source: str, store: MatchStore, workers: Optional[int] = None, chunk_size: int = 200) -> Dict[str, int]:
+    from_files = os.path.isdir(source)
+    workers = workers or os.cpu_count() or 1
+    totals = {"matches": 0, "timelines": 0, "participants": 0, "errors": 0}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in _chunks(source, chunk_size):
+            pending.append(pool.submit(process_chunk, chunk, from_files))
+            # Bound buffered results: write out the oldest chunk once every worker has one queued
+            if len(pending) >= 2 * workers:
+                _write(store, pending.pop(0).result(), totals)
+        for future in pending:
+            _write(store, future.result(), totals)
+    return totals
+
+def _write(store: MatchStore, result: Dict[str, Any], totals: Dict[str, int]) -> None:
+    store.put_many(result["rows"])
+    for key in totals:
+        totals[key] += result[key]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load exported match/timeline payloads into the match store.")
+    parser.add_argument("source", help="Directory of .json payloads or a .jsonl file")
+    parser.add_argument("--store", default=os.getenv("MATCH_STORE_PATH", "data/match_store.sqlite3"))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"No such file or directory: {args.source}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    store = MatchStore(path=args.store, memory_size=0)
+    try:
+        totals = ingest(args.source, store, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Ingested {totals['matches']} matches, {totals['timelines']} timelines "
+        f"({totals['participants']} participant rows, {totals['errors']} rejected) in {elapsed:.1f}s -> {args.store}"
+    )
+    return totals
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
+import os
+import json
 import asyncio
 import uuid
-from typing import Dict
+from typing import List, Optional, Set
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 
 # Load env before imports that might use it
@@ -11,30 +14,76 @@ load_dotenv()
 from app.models import (
     AnalyzeRequest, 
     AnalyzeResponse, 
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
     InsightsResponse, 
     ChatRequest, 
-    SessionData, 
-    AnalysisResult
+    ProfileArmRequest,
+    SessionData
 )
-from app.services.riot_client import RiotClient
+from app.services.riot_client import RiotClient, riot_rate_limit_fill
 from app.services.bedrock_client import BedrockClient
 from app.services.analyzer import AnalyzerService
+from app.services.match_store import MatchStore
+from app.services.job_queue import JobQueue, StageLimits, QueueFullError
+from app.services.pipeline import AnalysisPipeline
+from app.services.percentiles import PercentileTables
+from app.services.session_store import create_session_store
+from app.utils.timing import stage_timings
+from app.utils.metrics import Counter, Gauge, registry as metrics_registry
+from app.utils.profiling import Profile, profiler
 
 # --- State & Lifecycle ---
-riot_client = RiotClient()
+match_store = MatchStore()
+riot_client = RiotClient(match_store=match_store)
 bedrock_client = BedrockClient()
-analyzer = AnalyzerService(riot_client)
+analyzer = AnalyzerService(riot_client, match_store=match_store)
+pipeline = AnalysisPipeline(analyzer, bedrock_client, StageLimits(), percentiles=PercentileTables.load_default())
+# /api/analyze only enqueues; a bounded worker pool runs the pipeline
+job_queue = JobQueue()
 
-# In-memory session store (Use Redis in production)
-# Key: session_id, Value: SessionData
-sessions: Dict[str, SessionData] = {}
+# In-process LRU+TTL store by default; SESSION_STORE_URL=redis://... shares sessions across workers
+session_store = create_session_store()
+
+# Matches analyzed before a progressive request returns; the rest are folded in by a background task
+PROGRESSIVE_INITIAL_MATCHES = int(os.getenv("PROGRESSIVE_INITIAL_MATCHES", "3"))
+# Strong references so background enrichment tasks aren't garbage collected mid-run
+background_tasks: Set[asyncio.Task] = set()
+
+# Values owned by other objects, copied into the registry when /metrics is scraped
+cache_hits_total = Counter("lol_cache_hits_total", "Cache hits (match_memory, snapshots, ratings, accounts, summoners)", ("cache",))
+cache_misses_total = Counter("lol_cache_misses_total", "Cache misses (match_memory, snapshots, ratings, accounts, summoners)", ("cache",))
+cache_hit_ratio = Gauge("lol_cache_hit_ratio", "Hits / (hits + misses) since startup", ("cache",))
+active_sessions = Gauge("lol_active_sessions", "Sessions currently held by the session store")
+jobs_pending = Gauge("lol_analysis_jobs_pending", "Analyses waiting in the job queue")
+bedrock_waiting = Gauge("lol_bedrock_queue_waiting", "Callers waiting for a Bedrock slot")
+
+# Build Bedrock credentials/clients/agent in the background at startup instead of on the first chat;
+# BEDROCK_WARM_UP=0 leaves it entirely to first use (e.g. short-lived Lambda invocations)
+BEDROCK_WARM_UP = os.getenv("BEDROCK_WARM_UP", "1") == "1"
+
+async def warm_up_bedrock():
+    try:
+        await asyncio.to_thread(bedrock_client.warm_up)
+    except Exception as e:
+        # Not fatal: the first Bedrock call retries the build and surfaces the error
+        print(f"Bedrock warm-up failed: {e!r}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await job_queue.start()
+    if BEDROCK_WARM_UP:
+        task = asyncio.create_task(warm_up_bedrock())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
     yield
     # Shutdown
+    await job_queue.stop()
     await riot_client.close()
+    await bedrock_client.close()
+    await session_store.close()
+    match_store.close()
 
 app = FastAPI(title="LoL AI Coach API", lifespan=lifespan)
 
@@ -50,78 +99,329 @@ app.add_middleware(
 
 # --- Dependencies ---
 async def get_session(session_id: str) -> SessionData:
-    session = sessions.get(session_id)
+    session = await session_store.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return session
 
-# --- Endpoints ---
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (ADMIN_TOKEN not set)")
+    if not profiler.authorized(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
-@app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_player(request: AnalyzeRequest):
+def select_profile(endpoint: str, http_request: Request, response: Response) -> Optional[Profile]:
+    """Profile for this request when it asks for one (X-Profile: 1 + admin token) or the endpoint is armed."""
+    requested = http_request.headers.get("X-Profile") == "1" and profiler.authorized(http_request.headers.get("X-Admin-Token"))
+    profile = profiler.select(endpoint, requested) if profiler.enabled else None
+    if profile:
+        response.headers["X-Profile-Id"] = profile.id
+    return profile
+
+async def profiled(profile: Optional[Profile], awaitable):
+    with profiler.activate(profile):
+        return await awaitable
+
+async def update_session(session: SessionData, **fields):
+    """
+    Applies fields to the session and saves it. Background work re-reads the stored copy first
+    so it doesn't overwrite changes made by other requests (e.g. chat history) in the meantime.
+    """
+    latest = await session_store.get(session.session_id) or session
+    for name, value in fields.items():
+        setattr(latest, name, value)
+        setattr(session, name, value)
+    await session_store.save(latest)
+
+async def enrich_session(session: SessionData):
+    """Keeps folding pending matches into a progressive session until the requested depth is reached."""
+    try:
+        async for snapshot in pipeline.enrich(session.snapshot):
+            await update_session(session, snapshot=snapshot)
+    except Exception as e:
+        print(f"Enrichment Error for {session.session_id}: {e}")
+    finally:
+        await update_session(session, status="completed")
+
+async def run_analysis(session: SessionData, request: AnalyzeRequest):
+    await update_session(session, status="running")
+
+    # 1. Build Snapshot
+    initial_matches = PROGRESSIVE_INITIAL_MATCHES if request.progressive else None
+    snapshot = await pipeline.build_snapshot(request, initial_matches=initial_matches)
+    await update_session(session, snapshot=snapshot)
+
+    # 2. AI Analysis (rating + initial coaching tip)
+    analysis = await pipeline.analyze(snapshot, mode=request.pipeline_mode)
+    await update_session(
+        session,
+        analysis=analysis,
+        status="partial" if snapshot.pending_match_ids else "completed"
+    )
+
+    # 3. Progressive mode: fold in the remaining matches in the background
+    if snapshot.pending_match_ids:
+        task = asyncio.create_task(enrich_session(session))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+async def run_analysis_job(session: SessionData, request: AnalyzeRequest):
+    """Queue entry point: records failures on the session instead of raising."""
     try:
-        # 1. Build Snapshot
-        snapshot = await analyzer.build_snapshot(request.gameName, request.tagLine, request.region)
-        
-        # 2. AI Analysis (Parallel safe?)
-        # We can run rating generation here.
-        rating_json = await asyncio.to_thread(bedrock_client.generate_rating, snapshot)
-        
-        # 3. Generate Initial Coaching Tip
-        # Use the agent to generate the initial tip based on the summary
-        initial_prompt = f"The analyst provided this summary: '{rating_json.get('summary')}'. Give me a starting coaching tip based on this."
-        tip = await asyncio.to_thread(bedrock_client.invoke_agent, initial_prompt, snapshot)
-        
-        analysis = AnalysisResult(
-            rating=rating_json.get("rating", 0),
-            percentile=rating_json.get("percentile", 0.0),
-            summary=rating_json.get("summary", "Analysis unavailable."),
-            coaching_tip=tip
-        )
-        
-        # 4. Store Session
-        session_id = str(uuid.uuid4())
-        print(f"DEBUG: Session Created {session_id}")
-        sessions[session_id] = SessionData(
-            session_id=session_id,
-            snapshot=snapshot,
-            analysis=analysis
-        )
-        
-        return AnalyzeResponse(
-            session_id=session_id,
-            status="completed",
-            player=f"{request.gameName}#{request.tagLine}"
-        )
-        
+        await run_analysis(session, request)
     except ValueError as e:
         print(f"DEBUG: ValueError caught: {e}")
-        raise HTTPException(status_code=404, detail=str(e))
+        await update_session(session, status="failed", error=str(e))
     except Exception as e:
         # Log error in production
         print(f"Analysis Error: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error during analysis")
+        await update_session(session, status="failed", error="Internal Server Error during analysis")
+
+async def run_batch_analysis(sessions: List[SessionData], request: BatchAnalyzeRequest):
+    """Queue entry point for a lobby: one shared Riot fetch, one rating call, per-player sessions."""
+    try:
+        for session in sessions:
+            await update_session(session, status="running")
+        snapshots = await pipeline.build_snapshots(request)
+
+        ready = []
+        for session, snapshot in zip(sessions, snapshots):
+            if isinstance(snapshot, ValueError):
+                await update_session(session, status="failed", error=str(snapshot))
+            elif isinstance(snapshot, Exception):
+                print(f"Analysis Error for {session.session_id}: {snapshot}")
+                await update_session(session, status="failed", error="Internal Server Error during analysis")
+            else:
+                await update_session(session, snapshot=snapshot)
+                ready.append((session, snapshot))
+
+        if ready:
+            analyses = await pipeline.analyze_batch([snapshot for _, snapshot in ready], mode=request.pipeline_mode)
+            for (session, _), analysis in zip(ready, analyses):
+                await update_session(session, analysis=analysis, status="completed")
+    except Exception as e:
+        # Log error in production
+        print(f"Batch Analysis Error: {e}")
+        for session in sessions:
+            if session.status not in ("completed", "failed"):
+                await update_session(session, status="failed", error="Internal Server Error during analysis")
+
+# --- Endpoints ---
+
+@app.post("/api/analyze", response_model=AnalyzeResponse)
+async def analyze_player(request: AnalyzeRequest, http_request: Request, response: Response):
+    profile = select_profile("analyze", http_request, response)
+    session_id = str(uuid.uuid4())
+    print(f"DEBUG: Session Created {session_id}")
+    session = SessionData(
+        session_id=session_id,
+        status="pending",
+        matches_requested=request.match_count
+    )
+    await session_store.save(session)
+
+    if request.wait:
+        # Synchronous mode: run inline (still under the stage limits) and surface errors directly
+        try:
+            await profiled(profile, run_analysis(session, request))
+        except ValueError as e:
+            print(f"DEBUG: ValueError caught: {e}")
+            await session_store.delete(session_id)
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            # Log error in production
+            print(f"Analysis Error: {e}")
+            await session_store.delete(session_id)
+            raise HTTPException(status_code=500, detail="Internal Server Error during analysis")
+    else:
+        try:
+            # A profiled analysis is recorded until the queued job finishes, not until this response
+            job_queue.submit(lambda: profiled(profile, run_analysis_job(session, request)))
+        except (QueueFullError, RuntimeError) as e:
+            if profile:
+                profiler.finish(profile)
+            await session_store.delete(session_id)
+            raise HTTPException(status_code=503, detail=str(e))
+
+    return AnalyzeResponse(
+        session_id=session_id,
+        status=session.status,
+        player=f"{request.gameName}#{request.tagLine}"
+    )
+
+@app.post("/api/analyze/batch", response_model=BatchAnalyzeResponse)
+async def analyze_batch(request: BatchAnalyzeRequest):
+    """
+    Analyzes up to 10 players (a premade or a whole lobby) together. Each player gets a session,
+    polled via /api/insights and chatted with via /api/chat as usual; failures are per player.
+    """
+    sessions = [
+        SessionData(session_id=str(uuid.uuid4()), status="pending", matches_requested=request.match_count)
+        for _ in request.players
+    ]
+    for session in sessions:
+        await session_store.save(session)
+
+    if request.wait:
+        await run_batch_analysis(sessions, request)
+    else:
+        try:
+            job_queue.submit(lambda: run_batch_analysis(sessions, request))
+        except (QueueFullError, RuntimeError) as e:
+            for session in sessions:
+                await session_store.delete(session.session_id)
+            raise HTTPException(status_code=503, detail=str(e))
+
+    return BatchAnalyzeResponse(players=[
+        AnalyzeResponse(session_id=session.session_id, status=session.status, player=f"{player.gameName}#{player.tagLine}")
+        for session, player in zip(sessions, request.players)
+    ])
 
 @app.get("/api/insights/{session_id}", response_model=InsightsResponse)
 async def get_insights(session_id: str):
     session = await get_session(session_id)
+    snapshot = session.snapshot
     return InsightsResponse(
         session_id=session.session_id,
-        snapshot=session.snapshot,
-        analysis=session.analysis
+        snapshot=snapshot,
+        analysis=session.analysis,
+        status=session.status,
+        error=session.error,
+        matches_analyzed=len(snapshot.recent_matches) if snapshot else 0,
+        matches_requested=session.matches_requested,
+        complete=session.status == "completed" and not (snapshot and snapshot.pending_match_ids)
     )
 
 @app.post("/api/chat")
-async def chat_with_coach(request: ChatRequest):
+async def chat_with_coach(request: ChatRequest, http_request: Request, response: Response):
     session = await get_session(request.session_id)
+    if not session.snapshot or not session.analysis:
+        raise HTTPException(status_code=409, detail=f"Analysis is {session.status}")
     
     # Generate response via Agent
-    response = await asyncio.to_thread(bedrock_client.invoke_agent, request.message, session.snapshot, session.chat_history)
+    try:
+        with stage_timings.measure("agent"):
+            reply = await profiled(select_profile("chat", http_request, response), bedrock_client.ainvoke_agent(
+                request.message, session.snapshot, session.chat_history, session.chat_summary
+            ))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     
-    # Store history (optional, for context window management)
-    session.chat_history.append({"user": request.message, "coach": response})
+    # Store history; turns beyond the memory window are folded into the rolling summary. Only the
+    # chat fields are written, so enrichment saved during the call isn't reverted
+    bedrock_client.memory.append(session, request.message, reply)
+    await update_session(session, chat_history=session.chat_history, chat_summary=session.chat_summary)
     
-    return {"response": response}
+    return {"response": reply}
+
+@app.post("/api/chat/stream")
+async def chat_with_coach_stream(request: ChatRequest):
+    """Same as /api/chat, but forwards the agent's tokens and tool progress as server-sent events."""
+    session = await get_session(request.session_id)
+    if not session.snapshot or not session.analysis:
+        raise HTTPException(status_code=409, detail=f"Analysis is {session.status}")
+
+    async def event_stream():
+        try:
+            async for event in bedrock_client.stream_agent(
+                request.message, session.snapshot, session.chat_history, session.chat_summary
+            ):
+                if event["type"] == "done":
+                    bedrock_client.memory.append(session, request.message, event["response"])
+                    await update_session(session, chat_history=session.chat_history, chat_summary=session.chat_summary)
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"Chat Stream Error: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': 'Coach unavailable'})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs")
+async def get_job_stats():
+    """Analysis queue depth and per-stage concurrency limits."""
+    return {
+        "workers": job_queue.num_workers,
+        "pending": job_queue.pending,
+        "max_pending": job_queue.max_pending,
+        "riot_concurrency": pipeline.stages.riot_limit,
+        "llm_concurrency": pipeline.stages.llm_limit,
+    }
+
+@app.get("/api/sessions")
+async def get_session_stats():
+    return {"active_sessions": await session_store.count()}
+
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters for the match, snapshot, rating and Riot identity caches."""
+    return {
+        "match_memory": {"hits": match_store.memory.hits, "misses": match_store.memory.misses},
+        "snapshots": {"hits": analyzer.snapshot_cache.hits, "misses": analyzer.snapshot_cache.misses},
+        "ratings": await bedrock_client.rating_cache.astats(),
+        "accounts": {"hits": riot_client.account_cache.hits, "misses": riot_client.account_cache.misses},
+        "summoners": {"hits": riot_client.summoner_cache.hits, "misses": riot_client.summoner_cache.misses},
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus text format: Riot request latency/429s/retries per host and endpoint, rate limiter fill, per-stage
+    timings, Bedrock latency and tokens per model, cache hit ratios, sessions and queue depths.
+    """
+    caches = {
+        "match_memory": match_store.memory,
+        "snapshots": analyzer.snapshot_cache,
+        "ratings": bedrock_client.rating_cache,
+        "accounts": riot_client.account_cache,
+        "summoners": riot_client.summoner_cache,
+    }
+    for name, cache in caches.items():
+        cache_hits_total.set(cache.hits, cache=name)
+        cache_misses_total.set(cache.misses, cache=name)
+        total = cache.hits + cache.misses
+        cache_hit_ratio.set(cache.hits / total if total else 0.0, cache=name)
+    active_sessions.set(await session_store.count())
+    jobs_pending.set(job_queue.pending)
+    bedrock_waiting.set(bedrock_client.waiting)
+    for host, buckets in riot_client.rate_limiter.stats().items():
+        scopes = [("app", buckets["app"])] + list(buckets["methods"].items())
+        for scope, windows in scopes:
+            for window in windows:
+                riot_rate_limit_fill.set(window["fill"], host=host, scope=scope, window=str(window["window"]))
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/rate-limits")
+async def get_rate_limits():
+    """Current fill of each Riot rate-limit bucket, per routing host and endpoint."""
+    return riot_client.rate_limiter.stats()
+
+# --- Admin: request profiling (requires ADMIN_TOKEN, sent as X-Admin-Token) ---
+
+@app.post("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def arm_profiles(request: ProfileArmRequest):
+    """Profiles the next `count` requests to an endpoint; their IDs come back in X-Profile-Id."""
+    return {"armed": profiler.arm(request.endpoint, request.count)}
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    return {"profiles": profiler.summaries()}
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str, format: str = "collapsed"):
+    """Collapsed stacks (flamegraph.pl / speedscope input; microsecond weights), or format=json for the totals."""
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "json":
+        return profile.summary()
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.label}-{profile.id}.folded"'}
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field, ConfigDict
 
 # --- Enums ---
@@ -52,6 +52,9 @@ class MatchParticipantStats(BaseModel):
     cs_at_10: Optional[int] = None
     xp_at_10: Optional[int] = None
     early_items: List[int] = [] # Items purchased before 15 mins
+    game_minutes: Optional[float] = None
+    damage_share: Optional[float] = None # Share of the team's champion damage (0-1)
+    teamPosition: Optional[str] = None # TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY
 
 class PlayerSnapshot(BaseModel):
     """Aggregated data for AI Context"""
@@ -64,36 +67,78 @@ class PlayerSnapshot(BaseModel):
     recent_matches: List[MatchParticipantStats]
     top_mastery: List[Dict[str, Any]]
     experience_level: ExperienceLevel
+    puuid: Optional[str] = None
+    match_ids: List[str] = [] # Matches behind recent_matches
+    pending_match_ids: List[str] = [] # Requested but not analyzed yet (progressive mode)
 
 class AnalysisResult(BaseModel):
     rating: float = Field(..., description="0-100 Rating")
     percentile: Optional[float] = None
     summary: str
     coaching_tip: str
+    rating_source: str = "llm" # "llm" (DeepSeek) or "local" (RatingEngine)
 
 class SessionData(BaseModel):
     """Stored in session cache"""
     session_id: str
-    snapshot: PlayerSnapshot
-    analysis: AnalysisResult
-    chat_history: List[Dict[str, str]] = []
+    snapshot: Optional[PlayerSnapshot] = None # Set once the Riot stage finishes
+    analysis: Optional[AnalysisResult] = None
+    chat_history: List[Dict[str, str]] = [] # Most recent turns only (see ConversationMemory)
+    chat_summary: str = "" # Rolling summary of turns that left the window
+    # pending -> running -> partial (progressive enrichment) -> completed, or failed
+    status: str = "completed"
+    error: Optional[str] = None
+    matches_requested: int = 0
 
 # --- API Request/Response Schemas ---
 class AnalyzeRequest(BaseModel):
     gameName: str
     tagLine: str
     region: str = "na1"
+    match_count: int = Field(5, ge=1, le=100, description="Number of recent matches to analyze")
+    progressive: bool = Field(False, description="Return after the first few matches and enrich in the background")
+    wait: bool = Field(False, description="Block until the analysis finishes instead of returning a pending session")
+    pipeline_mode: Optional[Literal["sequential", "concurrent"]] = Field(
+        None, description="Rating/tip ordering; defaults to ANALYZE_PIPELINE_MODE"
+    )
+
+class RiotId(BaseModel):
+    gameName: str
+    tagLine: str
+
+class BatchAnalyzeRequest(BaseModel):
+    """A premade or lobby analyzed together; matches the players share are fetched once."""
+    players: List[RiotId] = Field(..., min_length=1, max_length=10)
+    region: str = "na1"
+    match_count: int = Field(5, ge=1, le=100, description="Number of recent matches to analyze per player")
+    wait: bool = Field(False, description="Block until every analysis finishes instead of returning pending sessions")
+    pipeline_mode: Optional[Literal["sequential", "concurrent"]] = Field(
+        None, description="Rating/tip ordering; defaults to ANALYZE_PIPELINE_MODE"
+    )
 
 class ChatRequest(BaseModel):
     session_id: str
     message: str
 
+class ProfileArmRequest(BaseModel):
+    endpoint: Literal["analyze", "chat"]
+    count: int = Field(1, ge=1, le=100, description="How many upcoming requests to profile")
+
 class AnalyzeResponse(BaseModel):
     session_id: str
     status: str
     player: str
 
+class BatchAnalyzeResponse(BaseModel):
+    # One session per player, in request order; each is polled and chatted with like a single analysis
+    players: List[AnalyzeResponse]
+
 class InsightsResponse(BaseModel):
     session_id: str
-    snapshot: PlayerSnapshot
-    analysis: AnalysisResult
+    snapshot: Optional[PlayerSnapshot] = None
+    analysis: Optional[AnalysisResult] = None
+    status: str = "completed"
+    error: Optional[str] = None
+    matches_analyzed: int = 0
+    matches_requested: int = 0
+    complete: bool = True
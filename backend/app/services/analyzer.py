@@ -1,5 +1,7 @@
+import os
 import asyncio
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Union
 from app.models import (
     PlayerSnapshot, 
     ExperienceLevel, 
@@ -10,10 +12,25 @@ from app.models import (
     ChampionMastery
 )
 from app.services.riot_client import RiotClient
+from app.services.feature_extraction import MatchFeatureBatch
+from app.services.match_store import MatchStore
+from app.utils.cache import LRUCache
+from app.utils.timing import StageClock, stage_timings
+from app.utils.profiling import profiler
+
+# Matches analyzed per snapshot unless the request asks for more
+DEFAULT_MATCH_COUNT = 5
 
 class AnalyzerService:
-    def __init__(self, riot_client: RiotClient):
+    def __init__(self, riot_client: RiotClient, match_store: Optional[MatchStore] = None):
         self.riot = riot_client
+        # Records analyzed players' tiers, which label the corpus for percentile tables
+        self.match_store = match_store
+        # Complete snapshots by (puuid, region); revalidated against the player's latest match IDs
+        self.snapshot_cache = LRUCache(
+            maxsize=int(os.getenv("SNAPSHOT_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("SNAPSHOT_CACHE_TTL_SECONDS", "86400"))
+        )
 
     def calculate_experience_level(self, league_entries: List[LeagueEntry], level: int) -> ExperienceLevel:
         # Prioritize Solo Tuple > Flex
@@ -39,132 +56,255 @@ class AnalyzerService:
         
         return ExperienceLevel.CASUAL
 
-    async def build_snapshot(self, game_name: str, tag_line: str, region: str) -> PlayerSnapshot:
+    @staticmethod
+    def summarize_stats(snapshot: PlayerSnapshot) -> str:
+        """One-line digest of the recent matches, computed locally (no LLM)."""
+        matches = snapshot.recent_matches
+        if not matches:
+            return f"{snapshot.tier or 'UNRANKED'} {snapshot.experience_level.value} player with no recent matches"
+
+        n = len(matches)
+        wins = sum(1 for m in matches if m.win)
+        kills = sum(m.kills for m in matches) / n
+        deaths = sum(m.deaths for m in matches) / n
+        assists = sum(m.assists for m in matches) / n
+        kda = (kills + assists) / max(deaths, 1)
+        cs = sum(m.totalMinionsKilled for m in matches) / n
+        damage = sum(m.totalDamageDealtToChampions for m in matches) / n
+        champions = [c for c, _ in Counter(m.championName for m in matches).most_common(3)]
+
+        parts = [
+            f"{snapshot.tier or 'UNRANKED'} {snapshot.rank or ''}".strip() + f" ({snapshot.experience_level.value})",
+            f"{wins}W-{n - wins}L over {n} games",
+            f"KDA {kda:.2f} ({kills:.1f}/{deaths:.1f}/{assists:.1f})",
+            f"{cs:.0f} CS and {damage:.0f} champion damage per game",
+            f"champions: {', '.join(champions)}",
+        ]
+        early = [m for m in matches if m.gold_at_10]
+        if early:
+            parts.append(
+                f"at 10 min {sum(m.cs_at_10 or 0 for m in early) / len(early):.0f} CS, "
+                f"{sum(m.gold_at_10 for m in early) / len(early):.0f} gold"
+            )
+        return "; ".join(parts)
+
+    async def _get_profile(self, region: str, summoner: SummonerV4Response) -> Tuple[List[LeagueEntry], List[ChampionMastery]]:
+        """League entries and top mastery, fetched in parallel."""
+        if summoner.id:
+            return tuple(await asyncio.gather(
+                self.riot.get_league_entries(region, summoner.id),
+                self.riot.get_top_mastery(region, summoner.puuid)
+            ))
+        # No ID (e.g. low level account), assume no rank
+        return [], await self.riot.get_top_mastery(region, summoner.puuid)
+
+    @staticmethod
+    def _select_matches(snapshot: PlayerSnapshot, match_ids: List[str]) -> PlayerSnapshot:
+        """Restricts a snapshot to the given matches (keeps its order)."""
+        wanted = set(match_ids)
+        pairs = [(mid, m) for mid, m in zip(snapshot.match_ids, snapshot.recent_matches) if mid in wanted]
+        return snapshot.model_copy(update={
+            "match_ids": [mid for mid, _ in pairs],
+            "recent_matches": [m for _, m in pairs],
+        })
+
+    async def _fetch_matches(self, region: str, match_ids: List[str], clock: StageClock) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[Dict[str, Any]]]]:
+        """Match details + timeline summaries for match_ids, all fetched concurrently."""
+        detail_tasks = [self.riot.get_match_detail(region, mid) for mid in match_ids]
+        # Timelines are streamed and reduced to the early-game fields we use (see timeline_parser)
+        timeline_tasks = [self.riot.get_timeline_summary(region, mid) for mid in match_ids]
+        
+        # Gather all together
+        with clock.measure("riot_fetch"):
+            results = await asyncio.gather(*detail_tasks, *timeline_tasks)
+        num_matches = len(match_ids)
+        return results[:num_matches], results[num_matches:]
+
+    async def _analyze_matches(self, region: str, puuid: str, match_ids: List[str], clock: Optional[StageClock] = None) -> Tuple[List[MatchParticipantStats], List[str]]:
+        """Fetches details + timeline summaries for match_ids and extracts the player's stats, in match order."""
+        clock = clock or StageClock(None)
+        matches_data, timelines_data = await self._fetch_matches(region, match_ids, clock)
+        with clock.measure("match_processing"), profiler.thread_section("match_processing_cpu"):
+            batch = self.process_matches(match_ids, matches_data, timelines_data)
+            return batch.participant_stats(puuid), batch.player_match_ids(puuid)
+
+    @staticmethod
+    def process_matches(match_ids: List[str], matches: List[Optional[Dict[str, Any]]], timelines: List[Optional[Dict[str, Any]]]) -> MatchFeatureBatch:
+        """Match details + timeline summaries -> per-participant features (shared with bulk ingestion)."""
+        # Columnar extraction, see feature_extraction
+        return MatchFeatureBatch(match_ids, matches, timelines)
+
+    async def build_snapshot(
+        self,
+        game_name: str,
+        tag_line: str,
+        region: str,
+        match_count: int = DEFAULT_MATCH_COUNT,
+        initial_matches: Optional[int] = None
+    ) -> PlayerSnapshot:
+        """
+        Builds the snapshot from the player's last `match_count` matches.
+        With `initial_matches`, only that many are analyzed now and the rest are left in
+        `pending_match_ids` for enrich_snapshot to fold in later.
+        Players with a cached snapshot only cost a match ID lookup when they haven't played
+        since, and otherwise only their new matches are analyzed (all at once).
+        """
+        # Riot time vs match processing time for this snapshot (see app.utils.timing)
+        clock = stage_timings.clock()
+
         # 1. Get Account
-        account = await self.riot.get_account(game_name, tag_line)
+        with clock.measure("riot_fetch"):
+            account = await self.riot.get_account(game_name, tag_line)
         if not account:
             raise ValueError("Account not found")
             
         # 2. Get Summoner
-        summoner = await self.riot.get_summoner(region, account.puuid)
+        with clock.measure("riot_fetch"):
+            summoner = await self.riot.get_summoner(region, account.puuid)
         if not summoner:
             raise ValueError("Summoner not found")
             
-        # 3. Get League Entries & Match IDs & Mastery (Parallel)
-        # 3. Get League Entries & Match IDs & Mastery (Parallel)
-        if summoner.id:
-            league_entries_task = self.riot.get_league_entries(region, summoner.id)
-        else:
-            # No ID (e.g. low level account), assume no rank
-            league_entries_task = asyncio.futures.Future()
-            league_entries_task.set_result([])
+        # 3. Repeat analysis: a cached snapshot stays valid until the player plays again,
+        # so only the match ID list is fetched and compared
+        cache_key = (account.puuid, region)
+        cached = self.snapshot_cache.get(cache_key)
+        if cached:
+            with clock.measure("riot_fetch"):
+                match_ids = (await self.riot.get_match_ids(region, account.puuid, count=match_count))[:match_count]
+            if match_ids and match_ids == cached.match_ids[:len(match_ids)]:
+                clock.flush()
+                return self._select_matches(cached, match_ids).model_copy(update={
+                    "summonerLevel": summoner.summonerLevel
+                })
 
-        
-        # Simpler:
-        match_ids_task = self.riot.get_match_ids(region, account.puuid)
-        mastery_task = self.riot.get_top_mastery(region, account.puuid)
-
-        if summoner.id:
-            league_entries, match_ids, masteries = await asyncio.gather(
-                self.riot.get_league_entries(region, summoner.id),
-                match_ids_task,
-                mastery_task
-            )
+            # New games since: refresh rank/mastery and fold in just the unseen matches. An empty
+            # ID list (a 404 or empty answer) doesn't make the cached matches go away, so they're kept
+            with clock.measure("riot_fetch"):
+                league_entries, masteries = await self._get_profile(region, summoner)
+            if not match_ids:
+                match_ids = cached.match_ids[:match_count]
+            known = dict(zip(cached.match_ids, cached.recent_matches))
+            new_ids = [mid for mid in match_ids if mid not in known]
+            new_stats, new_analyzed = await self._analyze_matches(region, account.puuid, new_ids, clock)
+            known.update(zip(new_analyzed, new_stats))
+            analyzed_ids = [mid for mid in match_ids if mid in known]
+            processed_matches = [known[mid] for mid in analyzed_ids]
+            pending_ids: List[str] = []
         else:
-            # Skip league entries
-            league_entries = []
-            match_ids, masteries = await asyncio.gather(
-                match_ids_task,
-                mastery_task
-            )
-        
-        # 4. Fetch Match Details & Timelines (Parallel)
-        # We need both details (for end stats) and timeline (for early stats)
-        # To avoid rate limits or too many requests, limit to top 5 recent matches for deep analysis if performance is a concern.
-        # But per requirements, we'll try to get all or a subset. Let's do recent 5 for deep dive to keep it fast.
-        recent_match_ids = match_ids[:5] 
-        
-        detail_tasks = [self.riot.get_match_detail(region, mid) for mid in recent_match_ids]
-        timeline_tasks = [self.riot.get_match_timeline(region, mid) for mid in recent_match_ids]
+            # 3. Get League Entries & Match IDs & Mastery (Parallel)
+            with clock.measure("riot_fetch"):
+                (league_entries, masteries), match_ids = await asyncio.gather(
+                    self._get_profile(region, summoner),
+                    self.riot.get_match_ids(region, account.puuid, count=match_count)
+                )
         
-        # Gather all together
-        results = await asyncio.gather(*detail_tasks, *timeline_tasks)
-        num_matches = len(recent_match_ids)
-        matches_data = results[:num_matches]
-        timelines_data = results[num_matches:]
+            # 4. Fetch Match Details & Timelines (Parallel)
+            # We need both details (for end stats) and timeline (for early stats).
+            # In progressive mode only the first few are analyzed before returning.
+            match_ids = match_ids[:match_count]
+            first_batch = len(match_ids) if initial_matches is None else min(initial_matches, len(match_ids))
+            pending_ids = match_ids[first_batch:]
         
-        # 5. Process Matches
-        processed_matches: List[MatchParticipantStats] = []
-        for i, match in enumerate(matches_data):
-            if not match:
-                continue
-            
-            timeline = timelines_data[i]
-            info = match.get("info", {})
-            participants = info.get("participants", [])
-            
-            # Find user
-            user_part = next((p for p in participants if p["puuid"] == account.puuid), None)
-            if user_part:
-                participant_id = user_part.get("participantId")
-                
-                # Analyze Timeline
-                gold_10 = 0
-                cs_10 = 0
-                xp_10 = 0
-                early_items = []
-                
-                if timeline:
-                    # Frames: 0..N. Frame N is at timestamp N * 60000ms (approx)
-                    # We want 10 min mark -> Frame 10 (or near 10th index)
-                    frames = timeline.get("info", {}).get("frames", [])
-                    if len(frames) > 10:
-                        frame_10 = frames[10] # 10 mins
-                        p_frames = frame_10.get("participantFrames", {})
-                        # participantFrames keys are strings "1", "2" etc.
-                        p_stats = p_frames.get(str(participant_id))
-                        if p_stats:
-                            gold_10 = p_stats.get("totalGold", 0)
-                            cs_10 = p_stats.get("minionsKilled", 0) + p_stats.get("jungleMinionsKilled", 0)
-                            xp_10 = p_stats.get("xp", 0)
-                            
-                    # Early Items (< 15 mins)
-                    # Early Items (< 15 mins)
-                    frames_list = timeline.get("info", {}).get("frames", [])
-                    all_events = []
-                    for frm in frames_list:
-                        all_events.extend(frm.get("events", []))
-
-                    for event in all_events:
-                        if event.get("type") == "ITEM_PURCHASED" and event.get("participantId") == participant_id:
-                            if event.get("timestamp", 0) < 15 * 60 * 1000: # 15 mins
-                                early_items.append(event.get("itemId"))
-
-                stats = MatchParticipantStats(
-                    championName=user_part.get("championName", "Unknown"),
-                    kills=user_part.get("kills", 0),
-                    deaths=user_part.get("deaths", 0),
-                    assists=user_part.get("assists", 0),
-                    totalMinionsKilled=user_part.get("totalMinionsKilled", 0) + user_part.get("neutralMinionsKilled", 0),
-                    totalDamageDealtToChampions=user_part.get("totalDamageDealtToChampions", 0),
-                    goldEarned=user_part.get("goldEarned", 0),
-                    win=user_part.get("win", False),
-                    items=[user_part.get(f"item{i}", 0) for i in range(7)],
-                    # Deep Stats
-                    gold_at_10=gold_10,
-                    cs_at_10=cs_10,
-                    xp_at_10=xp_10,
-                    early_items=early_items
-                )
-                processed_matches.append(stats)
+            # 5. Process Matches
+            processed_matches, analyzed_ids = await self._analyze_matches(region, account.puuid, match_ids[:first_batch], clock)
                 
+        snapshot = await self._assemble_snapshot(
+            account, summoner, region, league_entries, masteries, processed_matches, analyzed_ids, pending_ids
+        )
+        clock.flush()
+        return snapshot
+
+    async def build_snapshots(
+        self,
+        riot_ids: List[Tuple[str, str]],
+        region: str,
+        match_count: int = DEFAULT_MATCH_COUNT
+    ) -> List[Union[PlayerSnapshot, Exception]]:
+        """
+        Snapshots for a premade or lobby, in riot_ids order; a player that can't be analyzed gets
+        its exception instead. Players are resolved concurrently and their match IDs unioned, so a
+        game they played together is fetched and parsed once and everyone's stats come from the
+        same MatchFeatureBatch. Players whose cached snapshot is current reuse it.
+        """
+        clock = stage_timings.clock()
+
+        async def resolve(game_name: str, tag_line: str):
+            account = await self.riot.get_account(game_name, tag_line)
+            if not account:
+                raise ValueError(f"Account not found: {game_name}#{tag_line}")
+            summoner = await self.riot.get_summoner(region, account.puuid)
+            if not summoner:
+                raise ValueError(f"Summoner not found: {game_name}#{tag_line}")
+            (league_entries, masteries), match_ids = await asyncio.gather(
+                self._get_profile(region, summoner),
+                self.riot.get_match_ids(region, account.puuid, count=match_count)
+            )
+            return account, summoner, league_entries, masteries, match_ids[:match_count]
+
+        with clock.measure("riot_fetch"):
+            players = await asyncio.gather(*(resolve(name, tag) for name, tag in riot_ids), return_exceptions=True)
+
+        # Union of the match IDs still to analyze, in first-seen order
+        cached: Dict[int, PlayerSnapshot] = {}
+        wanted: Dict[str, None] = {}
+        for i, player in enumerate(players):
+            if isinstance(player, Exception):
+                continue
+            account, summoner, league_entries, masteries, match_ids = player
+            snapshot = self.snapshot_cache.get((account.puuid, region))
+            if snapshot and not match_ids:
+                # As in build_snapshot, an empty ID list keeps the cached matches
+                match_ids = snapshot.match_ids[:match_count]
+                players[i] = (account, summoner, league_entries, masteries, match_ids)
+            if snapshot and match_ids == snapshot.match_ids[:len(match_ids)]:
+                cached[i] = self._select_matches(snapshot, match_ids).model_copy(update={"summonerLevel": summoner.summonerLevel})
+            else:
+                wanted.update(dict.fromkeys(match_ids))
+
+        union = list(wanted)
+        matches_data, timelines_data = await self._fetch_matches(region, union, clock)
+        stats_by_player: Dict[int, Dict[str, MatchParticipantStats]] = {}
+        with clock.measure("match_processing"), profiler.thread_section("match_processing_cpu"):
+            batch = self.process_matches(union, matches_data, timelines_data)
+            for i, player in enumerate(players):
+                if not isinstance(player, Exception) and i not in cached:
+                    puuid = player[0].puuid
+                    stats_by_player[i] = dict(zip(batch.player_match_ids(puuid), batch.participant_stats(puuid)))
+
+        results: List[Union[PlayerSnapshot, Exception]] = []
+        for i, player in enumerate(players):
+            if isinstance(player, Exception) or i in cached:
+                results.append(player if isinstance(player, Exception) else cached[i])
+                continue
+            account, summoner, league_entries, masteries, match_ids = player
+            # Only this player's own recent games, even if a teammate's window holds older shared ones
+            known = stats_by_player[i]
+            analyzed_ids = [mid for mid in match_ids if mid in known]
+            results.append(await self._assemble_snapshot(
+                account, summoner, region, league_entries, masteries, [known[mid] for mid in analyzed_ids], analyzed_ids, []
+            ))
+        clock.flush()
+        return results
+
+    async def _assemble_snapshot(
+        self,
+        account: AccountV1Response,
+        summoner: SummonerV4Response,
+        region: str,
+        league_entries: List[LeagueEntry],
+        masteries: List[ChampionMastery],
+        processed_matches: List[MatchParticipantStats],
+        analyzed_ids: List[str],
+        pending_ids: List[str]
+    ) -> PlayerSnapshot:
+        """Final snapshot from the fetched pieces; complete snapshots are cached and tiers recorded."""
         # 6. Determine Experience
         exp_level = self.calculate_experience_level(league_entries, summoner.summonerLevel)
         
         # 7. Extract Rank Info
         solo_q = next((e for e in league_entries if e.queueType == "RANKED_SOLO_5x5"), None)
         
-        return PlayerSnapshot(
+        snapshot = PlayerSnapshot(
             gameName=account.gameName,
             tagLine=account.tagLine,
             region=region,
@@ -173,5 +313,27 @@ class AnalyzerService:
             rank=solo_q.rank if solo_q else None,
             recent_matches=processed_matches,
             top_mastery=[m.model_dump() for m in masteries[:5]],
-            experience_level=exp_level
+            experience_level=exp_level,
+            puuid=account.puuid,
+            match_ids=analyzed_ids,
+            pending_match_ids=pending_ids
         )
+        if not pending_ids:
+            self.snapshot_cache.set((account.puuid, region), snapshot)
+        if self.match_store and solo_q:
+            await self.match_store.aput_tier(account.puuid, solo_q.tier)
+        return snapshot
+
+    async def enrich_snapshot(self, snapshot: PlayerSnapshot, batch_size: int = DEFAULT_MATCH_COUNT) -> AsyncIterator[PlayerSnapshot]:
+        """Folds pending matches into the snapshot in batches, yielding a new snapshot after each batch."""
+        while snapshot.pending_match_ids:
+            batch_ids = snapshot.pending_match_ids[:batch_size]
+            stats, analyzed_ids = await self._analyze_matches(snapshot.region, snapshot.puuid, batch_ids)
+            snapshot = snapshot.model_copy(update={
+                "recent_matches": snapshot.recent_matches + stats,
+                "match_ids": snapshot.match_ids + analyzed_ids,
+                "pending_match_ids": snapshot.pending_match_ids[batch_size:],
+            })
+            if not snapshot.pending_match_ids and snapshot.puuid:
+                self.snapshot_cache.set((snapshot.puuid, snapshot.region), snapshot)
+            yield snapshot
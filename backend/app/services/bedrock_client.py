@@ -1,80 +1,339 @@
 import os
+import re
 import json
-import boto3
-from typing import Dict, Any, List, Optional
-from langchain_aws import ChatBedrock
-from langchain_core.tools import tool
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+import time
+import asyncio
+import threading
+import httpx
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Mapping, Optional, AsyncIterator
+from urllib.parse import quote
 from app.models import PlayerSnapshot
+from app.services.llm_cache import LLMResponseCache, canonical_digest
+from app.services.context_encoder import encode_snapshot
+from app.services.chat_memory import ConversationMemory
+from app.services.job_queue import QueueFullError
+from app.utils.lazy import lazy_property
+from app.utils.metrics import Counter, Histogram
+from app.utils.profiling import profiler
+
+# boto3/botocore and LangChain are imported where they are first needed: together they take
+# seconds to import, and most processes (CLIs, workers, cold starts) never reach a model call.
+
+# Bump whenever the rating prompt changes so cached ratings from the old prompt are ignored
+RATING_PROMPT_VERSION = "2"
+SUMMARY_PROMPT_VERSION = "1"
+
+# Encoded player context of the agent run in progress; the analyst tool reads it instead of
+# having the coach model re-emit the whole context as a tool argument
+_player_context: ContextVar[str] = ContextVar("player_context", default="")
+# Set while a task holds a Bedrock slot, so an agent run's own analyst calls don't queue behind it
+_holding_slot: ContextVar[bool] = ContextVar("holding_slot", default=False)
+
+bedrock_invoke_seconds = Histogram("lol_bedrock_invoke_seconds", "Bedrock model invocation time (coach calls within agent runs included)", ("model",))
+bedrock_tokens_total = Counter("lol_bedrock_tokens_total", "Bedrock tokens by model and direction (input, output)", ("model", "direction"))
+bedrock_errors_total = Counter("lol_bedrock_errors_total", "Failed Bedrock invocations", ("model",))
+
+# Profiler sections of the boto3 calls in flight on each thread
+_boto3_calls = threading.local()
+
+def _enter_boto3_call(**kwargs):
+    if not hasattr(_boto3_calls, "entries"):
+        _boto3_calls.entries = []
+    _boto3_calls.entries.append(profiler.enter_thread("bedrock_thread"))
+
+def _exit_boto3_call(**kwargs):
+    entries = getattr(_boto3_calls, "entries", None)
+    if entries:
+        profiler.exit_thread(entries.pop())
+
+def record_usage(model: str, headers: Mapping[str, str], body: Optional[Dict[str, Any]] = None) -> None:
+    """Token counts from Bedrock's X-Amzn-Bedrock-*-Token-Count headers, else the body's usage block."""
+    usage = (body or {}).get("usage") or {}
+    counts = {
+        "input": headers.get("x-amzn-bedrock-input-token-count") or usage.get("prompt_tokens") or usage.get("input_tokens"),
+        "output": headers.get("x-amzn-bedrock-output-token-count") or usage.get("completion_tokens") or usage.get("output_tokens"),
+    }
+    for direction, count in counts.items():
+        if count:
+            bedrock_tokens_total.inc(int(count), model=model, direction=direction)
 
 class BedrockClient:
+    """
+    Construction is cheap and does no I/O. AWS credentials (an STS assumed role when
+    BEDROCK_ROLE_ARN is set), the boto3 client and the LangChain agent are built on first use,
+    or ahead of time by warm_up() from the app's lifespan.
+    """
+
     def __init__(self):
         self.region = os.getenv("AWS_REGION", "us-east-1")
         self.role_arn = os.getenv("BEDROCK_ROLE_ARN")
+        # Lifetime of assumed-role sessions; botocore refreshes them before they expire
+        self.role_session_seconds = int(os.getenv("BEDROCK_ROLE_SESSION_SECONDS", "3600"))
         print(f"DEBUG: AWS_BEARER_TOKEN_BEDROCK present: {'AWS_BEARER_TOKEN_BEDROCK' in os.environ}")
         print(f"DEBUG: AWS_ACCESS_KEY_ID present: {'AWS_ACCESS_KEY_ID' in os.environ}")
-        
-        # Setup Boto3 Client
-        if self.role_arn:
-            sts = boto3.client('sts', region_name=self.region)
-            resp = sts.assume_role(RoleArn=self.role_arn, RoleSessionName="LoLCoachSession")
-            creds = resp['Credentials']
-            self.boto3_client = boto3.client(
-                'bedrock-runtime',
-                region_name=self.region,
-                aws_access_key_id=creds['AccessKeyId'],
-                aws_secret_access_key=creds['SecretAccessKey'],
-                aws_session_token=creds['SessionToken']
-            )
-        else:
-            self.boto3_client = boto3.client('bedrock-runtime', region_name=self.region)
+
+        # Bedrock calls in flight at once; further callers queue, up to max_queue of them. The coach
+        # model has no native async client, so async agent runs call it on `executor`, which has
+        # exactly this many threads: every slot holder gets one and the loop's default pool isn't used.
+        self.max_concurrency = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+        self.max_queue = int(os.getenv("BEDROCK_MAX_QUEUE", "100"))
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._waiting = 0
+
+        # Direct (non-LangChain) model invocations go here over the shared `http` pool
+        self.endpoint = f"https://bedrock-runtime.{self.region}.amazonaws.com"
 
         # Model IDs
         self.CLAUDE_SONNET = "us.anthropic.claude-3-5-sonnet-20240620-v1:0" 
         self.CLAUDE_HAIKU = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
         self.DEEPSEEK_R1 = "us.deepseek.r1-v1:0"
 
+        # Ratings for an identical snapshot are served from a persistent cache
+        self.rating_cache = LLMResponseCache()
+
+        # Window of recent turns plus a rolling summary, fed to the coach under a token cap
+        self.memory = ConversationMemory()
+
+    def _assume_role(self) -> Dict[str, str]:
+        """STS credentials for BEDROCK_ROLE_ARN, in the metadata form botocore's refresher expects."""
+        import boto3
+
+        sts = boto3.client('sts', region_name=self.region)
+        resp = sts.assume_role(
+            RoleArn=self.role_arn,
+            RoleSessionName="LoLCoachSession",
+            DurationSeconds=self.role_session_seconds
+        )
+        creds = resp['Credentials']
+        expiry = creds['Expiration']
+        if isinstance(expiry, datetime):
+            expiry = expiry.astimezone(timezone.utc).isoformat()
+        return {
+            "access_key": creds['AccessKeyId'],
+            "secret_key": creds['SecretAccessKey'],
+            "token": creds['SessionToken'],
+            "expiry_time": expiry,
+        }
+
+    @lazy_property
+    def _boto3_session(self):
+        import boto3
+        import botocore.session
+        from botocore.credentials import RefreshableCredentials
+
+        if not self.role_arn:
+            return boto3.Session(region_name=self.region)
+        # One assume_role call up front; botocore calls _assume_role again once the session is
+        # within its refresh window (15 minutes before expiry) instead of failing on expiry.
+        core = botocore.session.get_session()
+        core._credentials = RefreshableCredentials.create_from_metadata(
+            metadata=self._assume_role(),
+            refresh_using=self._assume_role,
+            method="sts-assume-role"
+        )
+        return boto3.Session(botocore_session=core, region_name=self.region)
+
+    @lazy_property
+    def credentials(self):
+        """Credentials used to sign direct Bedrock requests; None when nothing is configured."""
+        return self._boto3_session.get_credentials()
+
+    @lazy_property
+    def boto3_client(self):
+        from botocore.config import Config
+
+        pool = Config(max_pool_connections=self.max_concurrency)
+        client = self._boto3_session.client('bedrock-runtime', region_name=self.region, config=pool)
+        # Calls run in executor threads (the coach model, the sync analyst) are sampled by an active profile
+        client.meta.events.register("before-call.bedrock-runtime", _enter_boto3_call)
+        client.meta.events.register("after-call.bedrock-runtime", _exit_boto3_call)
+        client.meta.events.register("after-call-error.bedrock-runtime", _exit_boto3_call)
+        return client
+
+    @lazy_property
+    def executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bedrock")
+
+    @lazy_property
+    def http(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=float(os.getenv("BEDROCK_TIMEOUT_SECONDS", "120")),
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        )
+
+    @lazy_property
+    def agent_executor(self):
+        """The Coach (Claude) as a LangChain tool-calling agent that can consult the Analyst."""
+        from langchain_aws import ChatBedrock
+        from langchain_core.tools import StructuredTool
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+        from langchain_core.runnables.config import run_in_executor
+
+        executor = self.executor
+
+        class CoachChatBedrock(ChatBedrock):
+            # ChatBedrock's async methods are LangChain's defaults, which run the sync call in the
+            # loop's default executor; use the Bedrock executor instead. The context is copied so
+            # the profiler and player context follow the call into the thread.
+            async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+                sync_manager = run_manager.get_sync() if run_manager else None
+                return await run_in_executor(executor, copy_context().run, self._generate, messages, stop, sync_manager, **kwargs)
+
+            async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+                context = copy_context()
+                sync_manager = run_manager.get_sync() if run_manager else None
+                iterator = await run_in_executor(executor, context.run, self._stream, messages, stop, sync_manager, **kwargs)
+                done = object()
+                while True:
+                    item = await run_in_executor(executor, context.run, next, iterator, done)
+                    if item is done:
+                        break
+                    yield item
+
         # Initialize Coach (Claude) via LangChain
-        self.coach_llm = ChatBedrock(
+        coach_llm = CoachChatBedrock(
             client=self.boto3_client,
             model_id=self.CLAUDE_HAIKU,
             model_kwargs={"temperature": 0.7}
         )
         
         # Define Tools
-        @tool
-        def ask_analyst(query: str, context_json: str) -> str:
+        def ask_analyst(query: str) -> str:
             """
             Consult the Senior Data Analyst (DeepSeek R1) for deep statistical analysis.
             Use this when you need to understand complex patterns, itemization efficiency, or specific performance metrics.
+            The analyst already has the player's stats.
             
             Args:
                 query: The specific question to ask the analyst.
-                context_json: The full player stats JSON.
             """
             # Invoke DeepSeek using raw Boto3 to ensure correct payload format
-            prompt = f"Context: {context_json}\n\nQuery: {query}\n\nProvide a detailed, reasoning-based analysis."
-            return self._invoke_deepseek_raw(prompt)
+            return self._invoke_deepseek_raw(self._analyst_prompt(query))
 
-        self.tools = [ask_analyst]
+        async def aask_analyst(query: str) -> str:
+            return await self._invoke_deepseek_async(self._analyst_prompt(query))
+
+        # Async agent runs consult the analyst over the shared HTTP pool instead of a thread
+        tools = [StructuredTool.from_function(func=ask_analyst, coroutine=aask_analyst)]
 
         # Create Agent
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = self._coach_prompt()
+
+        agent = create_tool_calling_agent(coach_llm, tools, prompt)
+        return AgentExecutor(agent=agent, tools=tools, verbose=True)
+
+    @staticmethod
+    def _coach_prompt():
+        """
+        The coach agent's prompt. Its variables besides 'input' and 'agent_scratchpad' come from
+        ConversationMemory.to_inputs; the rolling summary goes into the system message, since
+        Bedrock's Anthropic format allows only one system message, at the start.
+        """
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+        return ChatPromptTemplate.from_messages([
             ("system", "You are an elite League of Legends coach. You have access to a Senior Data Analyst (DeepSeek R1) who can crunch numbers and provide deep insights. "
                        "If the user asks a question that requires statistical proof or deep analysis, use the 'ask_analyst' tool. "
                        "Otherwise, answer directly with your coaching wisdom. "
-                       "Always be constructive, specific, and helpful."),
+                       "Always be constructive, specific, and helpful.{conversation_summary}"),
+            MessagesPlaceholder(variable_name="chat_history", optional=True),
             ("human", "{input}"),
             MessagesPlaceholder(variable_name="agent_scratchpad"),
         ])
 
-        self.agent = create_tool_calling_agent(self.coach_llm, self.tools, prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools=self.tools, verbose=True)
+    @lazy_property
+    def _callbacks(self) -> List[Any]:
+        """LangChain callbacks recording the coach model's latency and token usage for /metrics."""
+        from langchain_core.callbacks import BaseCallbackHandler
 
-    def _invoke_deepseek_raw(self, prompt: str) -> str:
-        """Raw invocation for DeepSeek R1"""
-        body = json.dumps({
+        model = self.CLAUDE_HAIKU
+
+        class UsageMetrics(BaseCallbackHandler):
+            # Cheap bookkeeping; no need for LangChain to hop to a thread for it in async runs
+            run_inline = True
+
+            def __init__(self):
+                self.started: Dict[Any, float] = {}
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+                self.started[run_id] = time.perf_counter()
+
+            def on_llm_end(self, response, *, run_id, **kwargs):
+                start = self.started.pop(run_id, None)
+                if start is not None:
+                    bedrock_invoke_seconds.observe(time.perf_counter() - start, model=model)
+                for generation in (g for gens in response.generations for g in gens):
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage:
+                        record_usage(model, {}, {"usage": usage})
+                        return
+                record_usage(model, {}, response.llm_output)
+
+            def on_llm_error(self, error, *, run_id, **kwargs):
+                self.started.pop(run_id, None)
+                bedrock_errors_total.inc(model=model)
+
+        return [UsageMetrics()]
+
+    def warm_up(self):
+        """Builds credentials, clients and the agent now rather than on the first request (blocking; run in a thread)."""
+        self.credentials
+        self.executor
+        self.http
+        self.agent_executor
+        self._callbacks
+
+    @property
+    def waiting(self) -> int:
+        """Callers currently queued for a Bedrock slot."""
+        return self._waiting
+
+    async def _built(self, name: str) -> Any:
+        """
+        A lazy property's value from async code. The first build (imports, STS, the agent) takes
+        seconds, so it runs in a thread rather than stalling every request on the loop.
+        """
+        if getattr(BedrockClient, name).built(self):
+            return getattr(self, name)
+        return await asyncio.to_thread(getattr, self, name)
+
+    async def close(self):
+        if BedrockClient.http.built(self):
+            await self.http.aclose()
+        if BedrockClient.executor.built(self):
+            self.executor.shutdown(wait=False)
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Bounds concurrent Bedrock calls; raises QueueFullError when too many callers are already waiting."""
+        if _holding_slot.get():
+            yield
+            return
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            raise QueueFullError("Bedrock queue is full")
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        token = _holding_slot.set(True)
+        try:
+            yield
+        finally:
+            _holding_slot.reset(token)
+            self._slots.release()
+
+    @staticmethod
+    def _analyst_prompt(query: str) -> str:
+        return f"Context:\n{_player_context.get()}\n\nQuery: {query}\n\nProvide a detailed, reasoning-based analysis."
+
+    @staticmethod
+    def _deepseek_body(prompt: str) -> str:
+        return json.dumps({
             "messages": [
                 {
                     "role": "user",
@@ -84,66 +343,269 @@ class BedrockClient:
             "max_tokens": 4096,
             "temperature": 0.5
         })
-        
+
+    @staticmethod
+    def _deepseek_text(response_body: Dict[str, Any]) -> str:
+        if 'choices' in response_body:
+            return response_body['choices'][0]['message']['content']
+        elif 'outputs' in response_body:
+            return response_body['outputs'][0]['text']
+        return str(response_body)
+
+    def _invoke_deepseek_raw(self, prompt: str) -> str:
+        """Raw invocation for DeepSeek R1"""
         try:
-            response = self.boto3_client.invoke_model(
-                modelId=self.DEEPSEEK_R1,
-                body=body,
-                contentType="application/json",
-                accept="application/json"
-            )
-            response_body = json.loads(response['body'].read())
-            
-            if 'choices' in response_body:
-                return response_body['choices'][0]['message']['content']
-            elif 'outputs' in response_body:
-                return response_body['outputs'][0]['text']
-            return str(response_body)
+            with bedrock_invoke_seconds.time(model=self.DEEPSEEK_R1):
+                response = self.boto3_client.invoke_model(
+                    modelId=self.DEEPSEEK_R1,
+                    body=self._deepseek_body(prompt),
+                    contentType="application/json",
+                    accept="application/json"
+                )
+                response_body = json.loads(response['body'].read())
+            record_usage(self.DEEPSEEK_R1, response.get("ResponseMetadata", {}).get("HTTPHeaders", {}), response_body)
+            return self._deepseek_text(response_body)
         except Exception as e:
             print(f"DeepSeek Raw Error: {e}")
+            bedrock_errors_total.inc(model=self.DEEPSEEK_R1)
             return f"Analyst unavailable: {e}"
 
-    def generate_rating(self, snapshot: PlayerSnapshot) -> Dict[str, Any]:
+    async def _frozen_credentials(self):
         """
-        Directly calls DeepSeek to get the initial rating and summary.
+        Credentials to sign one request with; None when a Bedrock bearer token is used instead.
+        Refreshable (assumed-role) credentials call STS from inside get_frozen_credentials when
+        near expiry, so they are resolved in a thread, before a Bedrock slot is taken.
         """
-        prompt = (
+        if os.getenv("AWS_BEARER_TOKEN_BEDROCK"):
+            return None
+        credentials = await self._built("credentials")
+        if credentials is None:
+            raise RuntimeError("No AWS credentials available for Bedrock")
+        return await asyncio.to_thread(credentials.get_frozen_credentials)
+
+    def _signed_headers(self, url: str, body: str, frozen) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if frozen is None:
+            headers["Authorization"] = f"Bearer {os.getenv('AWS_BEARER_TOKEN_BEDROCK')}"
+            return headers
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
+        request = AWSRequest(method="POST", url=url, data=body, headers=headers)
+        SigV4Auth(frozen, "bedrock", self.region).add_auth(request)
+        return dict(request.headers.items())
+
+    async def _invoke_deepseek_async(self, prompt: str) -> str:
+        """Same as _invoke_deepseek_raw, over the shared async connection pool."""
+        url = f"{self.endpoint}/model/{quote(self.DEEPSEEK_R1, safe='')}/invoke"
+        body = self._deepseek_body(prompt)
+        try:
+            frozen = await self._frozen_credentials()
+            async with self._slot():
+                with bedrock_invoke_seconds.time(model=self.DEEPSEEK_R1), profiler.awaiting("bedrock_await", self.DEEPSEEK_R1):
+                    response = await self.http.post(url, content=body, headers=self._signed_headers(url, body, frozen))
+            response.raise_for_status()
+            response_body = response.json()
+            record_usage(self.DEEPSEEK_R1, response.headers, response_body)
+            return self._deepseek_text(response_body)
+        except QueueFullError:
+            raise
+        except Exception as e:
+            print(f"DeepSeek Raw Error: {e}")
+            bedrock_errors_total.inc(model=self.DEEPSEEK_R1)
+            return f"Analyst unavailable: {e}"
+
+    def _rating_prompt(self, snapshot: PlayerSnapshot) -> str:
+        return (
             f"Analyze these stats and output a single JSON object with: "
             f"1. 'rating' (0-100) "
             f"2. 'percentile' (float) "
             f"3. 'summary' (string): A concise 2-sentence explanation of WHY they got this rating. "
-            f"Only output JSON.\n\nStats: {snapshot.model_dump_json()}"
+            f"Only output JSON.\n\nStats:\n{encode_snapshot(snapshot)}"
         )
-        
-        content = self._invoke_deepseek_raw(prompt)
-        
+
+    @staticmethod
+    def _parse_rating(content: str) -> Dict[str, Any]:
+        """The model's rating JSON, or a neutral rating carrying 'error' (never cached) if it can't be parsed."""
         try:
             # Extract JSON
-            import re
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-            return json.loads(content)
+            return json.loads(json_match.group(0) if json_match else content)
         except Exception as e:
             print(f"Rating Parsing Error: {e}")
             return {"rating": 50, "percentile": 50.0, "summary": "Analysis unavailable.", "error": str(e)}
 
-    def invoke_agent(self, message: str, snapshot: PlayerSnapshot, chat_history: List[Dict] = []) -> str:
+    def generate_rating(self, snapshot: PlayerSnapshot) -> Dict[str, Any]:
+        """
+        Directly calls DeepSeek to get the initial rating and summary.
+        """
+        cache_key = canonical_digest(self.DEEPSEEK_R1, RATING_PROMPT_VERSION, snapshot)
+        cached = self.rating_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        rating = self._parse_rating(self._invoke_deepseek_raw(self._rating_prompt(snapshot)))
+        # Only successfully parsed ratings are cached
+        if "error" not in rating:
+            self.rating_cache.set(cache_key, rating)
+        return rating
+
+    async def agenerate_rating(self, snapshot: PlayerSnapshot) -> Dict[str, Any]:
+        """Async generate_rating; holds no thread while DeepSeek is thinking."""
+        cache_key = canonical_digest(self.DEEPSEEK_R1, RATING_PROMPT_VERSION, snapshot)
+        cached = await self.rating_cache.aget(cache_key)
+        if cached is not None:
+            return cached
+        rating = self._parse_rating(await self._invoke_deepseek_async(self._rating_prompt(snapshot)))
+        if "error" not in rating:
+            await self.rating_cache.aset(cache_key, rating)
+        return rating
+
+    def _batch_rating_prompt(self, snapshots: List[PlayerSnapshot]) -> str:
+        players = "\n\n".join(f"Player {i + 1}:\n{encode_snapshot(s)}" for i, s in enumerate(snapshots))
+        return (
+            f"Analyze each player's stats independently and output a single JSON array with one object per player, in the order given. "
+            f"Each object has: "
+            f"1. 'rating' (0-100) "
+            f"2. 'percentile' (float) "
+            f"3. 'summary' (string): A concise 2-sentence explanation of WHY they got this rating. "
+            f"Only output JSON.\n\n{players}"
+        )
+
+    async def agenerate_ratings(self, snapshots: List[PlayerSnapshot]) -> List[Dict[str, Any]]:
+        """
+        agenerate_rating for several players in one DeepSeek call; cached ratings are reused and
+        not re-sent. Players missing from the model's answer get an 'error' entry, like a failed rating.
+        """
+        keys = [canonical_digest(self.DEEPSEEK_R1, RATING_PROMPT_VERSION, s) for s in snapshots]
+        ratings: List[Optional[Dict[str, Any]]] = await self.rating_cache.aget_many(keys)
+        missing = [i for i, rating in enumerate(ratings) if rating is None]
+        if len(missing) == 1:
+            ratings[missing[0]] = await self.agenerate_rating(snapshots[missing[0]])
+        elif missing:
+            content = await self._invoke_deepseek_async(self._batch_rating_prompt([snapshots[i] for i in missing]))
+            try:
+                # R1's reasoning block may contain brackets of its own
+                answer = content.split("</think>")[-1]
+                json_match = re.search(r'\[.*\]', answer, re.DOTALL)
+                parsed = json.loads(json_match.group(0) if json_match else answer)
+                if not isinstance(parsed, list):
+                    raise ValueError("expected a JSON array")
+            except Exception as e:
+                print(f"Batch Rating Parsing Error: {e}")
+                parsed = []
+            fresh: Dict[str, Dict[str, Any]] = {}
+            for slot, i in enumerate(missing):
+                rating = parsed[slot] if slot < len(parsed) else None
+                if isinstance(rating, dict) and "rating" in rating:
+                    fresh[keys[i]] = rating
+                    ratings[i] = rating
+                else:
+                    ratings[i] = {"rating": 50, "percentile": 50.0, "summary": "Analysis unavailable.", "error": "missing from batched rating"}
+            if fresh:
+                await self.rating_cache.aset_many(fresh)
+        return ratings
+
+    def invoke_agent(self, message: str, snapshot: PlayerSnapshot, chat_history: List[Dict] = [], chat_summary: str = "") -> str:
         """
         Invokes the Coach Agent (Claude) which may call the Analyst Tool (DeepSeek).
         """
-        context_str = snapshot.model_dump_json()
-        full_input = f"Player Context: {context_str}\n\nUser Message: {message}"
-        
-        result = self.agent_executor.invoke({"input": full_input})
-        output = result["output"]
+        context_str = encode_snapshot(snapshot)
+        _player_context.set(context_str)
+        full_input = f"Player Context:\n{context_str}\n\nUser Message: {message}"
         
+        result = self.agent_executor.invoke({
+            "input": full_input,
+            **self.memory.to_inputs(chat_history, chat_summary),
+        }, config={"callbacks": self._callbacks})
+        return self._extract_text(result["output"])
+
+    async def ainvoke_agent(self, message: str, snapshot: PlayerSnapshot, chat_history: List[Dict] = [], chat_summary: str = "") -> str:
+        """Async invoke_agent; the run takes one Bedrock slot (and one `executor` thread for the coach), analyst consultations go over the async pool."""
+        context_str = encode_snapshot(snapshot)
+        _player_context.set(context_str)
+        full_input = f"Player Context:\n{context_str}\n\nUser Message: {message}"
+
+        agent_executor = await self._built("agent_executor")
+        callbacks = await self._built("_callbacks")
+        async with self._slot():
+            result = await agent_executor.ainvoke({
+                "input": full_input,
+                **self.memory.to_inputs(chat_history, chat_summary),
+            }, config={"callbacks": callbacks})
+        return self._extract_text(result["output"])
+
+    async def agenerate_summary(self, snapshot: PlayerSnapshot, rating: Dict[str, Any]) -> Optional[str]:
+        """
+        DeepSeek writes only the explanation for a locally computed rating (RatingEngine).
+        Returns None if the model fails, so callers keep the engine's own summary.
+        """
+        cache_key = canonical_digest(self.DEEPSEEK_R1, f"summary-{SUMMARY_PROMPT_VERSION}", snapshot)
+        cached = await self.rating_cache.aget(cache_key)
+        if cached is not None:
+            return cached["summary"]
+
+        components = "; ".join(
+            f"{metric} {c['value']:g} (typical {c['baseline']:g})" for metric, c in rating.get("components", {}).items()
+        )
+        prompt = (
+            f"The player was rated {rating['rating']}/100 (percentile {rating['percentile']}) from these metrics: {components}. "
+            f"Output a single JSON object with 'summary' (string): a concise 2-sentence explanation of WHY they got this rating. "
+            f"Only output JSON.\n\nStats:\n{encode_snapshot(snapshot)}"
+        )
+        content = await self._invoke_deepseek_async(prompt)
+        try:
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            summary = json.loads(json_match.group(0) if json_match else content)["summary"]
+        except Exception as e:
+            print(f"Summary Parsing Error: {e}")
+            return None
+
+        await self.rating_cache.aset(cache_key, {"summary": summary})
+        return summary
+
+    @staticmethod
+    def _extract_text(output: Any) -> str:
         # Handle list output (Anthropic/Bedrock format)
         if isinstance(output, list):
             text_parts = []
             for item in output:
                 if isinstance(item, dict) and item.get("type") == "text":
                     text_parts.append(item.get("text", ""))
+                elif isinstance(item, str):
+                    text_parts.append(item)
             return "".join(text_parts)
             
         return str(output)
+
+    async def stream_agent(self, message: str, snapshot: PlayerSnapshot, chat_history: List[Dict] = [], chat_summary: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams a Coach Agent run as events:
+        'token' (text delta), 'tool_start' / 'tool_end' (Analyst consultations) and a final 'done'
+        carrying the complete answer.
+        """
+        context_str = encode_snapshot(snapshot)
+        _player_context.set(context_str)
+        full_input = f"Player Context:\n{context_str}\n\nUser Message: {message}"
+
+        # Text streamed since the last tool call is the answer; earlier text was the agent thinking aloud
+        answer: List[str] = []
+        # Built first: it also imports LangChain, which to_inputs needs
+        agent_executor = await self._built("agent_executor")
+        callbacks = await self._built("_callbacks")
+        agent_input = {"input": full_input, **self.memory.to_inputs(chat_history, chat_summary)}
+        async with self._slot():
+            async for event in agent_executor.astream_events(agent_input, config={"callbacks": callbacks}, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = self._extract_text(event["data"]["chunk"].content)
+                    if text:
+                        answer.append(text)
+                        yield {"type": "token", "text": text}
+                elif kind == "on_tool_start":
+                    answer = []
+                    tool_input = event["data"].get("input") or {}
+                    yield {"type": "tool_start", "tool": event["name"], "query": tool_input.get("query", "")}
+                elif kind == "on_tool_end":
+                    yield {"type": "tool_end", "tool": event["name"]}
+
+        yield {"type": "done", "response": "".join(answer)}
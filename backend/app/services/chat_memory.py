@@ -0,0 +1,73 @@
+import os
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from app.models import SessionData
+from app.services.context_encoder import estimate_tokens
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= limit else sentence[:limit - 3].rstrip() + "..."
+
+class ConversationMemory:
+    """
+    Constant-size chat memory for the coach agent.
+
+    The last `window` turns are kept verbatim on the session; older turns are folded
+    into a rolling extractive summary (one short line per turn, oldest lines dropped
+    first). What is fed to the agent is capped at `token_cap` estimated tokens.
+    """
+
+    def __init__(self, window: Optional[int] = None, token_cap: Optional[int] = None, summary_token_cap: Optional[int] = None):
+        self.window = window or int(os.getenv("CHAT_HISTORY_WINDOW", "6"))
+        self.token_cap = token_cap or int(os.getenv("CHAT_HISTORY_TOKEN_CAP", "1200"))
+        self.summary_token_cap = summary_token_cap or int(os.getenv("CHAT_SUMMARY_TOKEN_CAP", "300"))
+
+    def _summarize_turn(self, turn: Dict[str, str]) -> str:
+        return f"- User asked: {_first_sentence(turn.get('user', ''), 120)} Coach: {_first_sentence(turn.get('coach', ''), 160)}"
+
+    def _trim_summary(self, lines: List[str]) -> List[str]:
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_token_cap:
+            lines.pop(0)
+        return lines
+
+    def append(self, session: SessionData, user: str, coach: str) -> None:
+        """Records a turn on the session, folding turns that leave the window into the summary."""
+        session.chat_history.append({"user": user, "coach": coach})
+        overflow = len(session.chat_history) - self.window
+        if overflow <= 0:
+            return
+
+        evicted, session.chat_history = session.chat_history[:overflow], session.chat_history[overflow:]
+        lines = session.chat_summary.splitlines() if session.chat_summary else []
+        lines.extend(self._summarize_turn(turn) for turn in evicted)
+        session.chat_summary = "\n".join(self._trim_summary(lines))
+
+    def to_inputs(self, chat_history: List[Dict[str, str]], chat_summary: str = "") -> Dict[str, Any]:
+        """
+        Prompt variables for the coach agent: 'chat_history' messages for its placeholder and
+        'conversation_summary' for its system message (see BedrockClient._coach_prompt). The newest
+        turns get the token cap first; the summary is included only if it still fits.
+        """
+        # Imported here so app startup doesn't pay for langchain_core until the first chat
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        budget = self.token_cap
+        turns: List["BaseMessage"] = []
+        for turn in reversed(chat_history[-self.window:]):
+            cost = estimate_tokens(turn.get("user", "")) + estimate_tokens(turn.get("coach", ""))
+            if cost > budget:
+                break
+            budget -= cost
+            turns[:0] = [HumanMessage(content=turn.get("user", "")), AIMessage(content=turn.get("coach", ""))]
+
+        summary = ""
+        if chat_summary:
+            summary = f"\n\nSummary of earlier conversation:\n{chat_summary}"
+            if estimate_tokens(summary) > budget:
+                summary = ""
+        return {"chat_history": turns, "conversation_summary": summary}
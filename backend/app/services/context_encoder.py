@@ -0,0 +1,86 @@
+import os
+import math
+from typing import List, Optional
+from app.models import PlayerSnapshot, MatchParticipantStats
+from app.utils.constants import CHAMPION_ID_MAP
+
+# Upper bound for the encoded player context in prompts (estimated tokens)
+DEFAULT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "1500"))
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English/JSON-ish text)."""
+    return math.ceil(len(text) / 4)
+
+def _k(value: float) -> str:
+    return f"{value / 1000:.1f}k" if value >= 1000 else f"{value:.0f}"
+
+def _mastery_line(snapshot: PlayerSnapshot) -> Optional[str]:
+    entries = []
+    for m in snapshot.top_mastery:
+        champion_id = m.get("championId")
+        name = CHAMPION_ID_MAP.get(champion_id, f"Champion{champion_id}")
+        entries.append(f"{name} M{m.get('championLevel', '?')} {_k(m.get('championPoints', 0))}pts")
+    return "Mastery: " + ", ".join(entries) if entries else None
+
+def _averages_line(matches: List[MatchParticipantStats]) -> str:
+    n = len(matches)
+    wins = sum(1 for m in matches if m.win)
+    kills = sum(m.kills for m in matches) / n
+    deaths = sum(m.deaths for m in matches) / n
+    assists = sum(m.assists for m in matches) / n
+    line = (
+        f"Avg over {n} games: {wins}W-{n - wins}L, K/D/A {kills:.1f}/{deaths:.1f}/{assists:.1f} "
+        f"(KDA {(kills + assists) / max(deaths, 1):.2f}), "
+        f"{sum(m.totalMinionsKilled for m in matches) / n:.0f}cs, "
+        f"{_k(sum(m.totalDamageDealtToChampions for m in matches) / n)} dmg, "
+        f"{_k(sum(m.goldEarned for m in matches) / n)} gold"
+    )
+    early = [m for m in matches if m.gold_at_10]
+    if early:
+        line += (
+            f"; @10min {sum(m.gold_at_10 for m in early) / len(early):.0f}g "
+            f"{sum(m.cs_at_10 or 0 for m in early) / len(early):.0f}cs "
+            f"{sum(m.xp_at_10 or 0 for m in early) / len(early):.0f}xp"
+        )
+    return line
+
+def _match_line(m: MatchParticipantStats) -> str:
+    line = (
+        f"{m.championName} {'W' if m.win else 'L'} {m.kills}/{m.deaths}/{m.assists} "
+        f"{m.totalMinionsKilled}cs {_k(m.totalDamageDealtToChampions)}dmg {_k(m.goldEarned)}g"
+    )
+    if m.gold_at_10:
+        line += f" @10:{m.gold_at_10}g/{m.cs_at_10 or 0}cs/{m.xp_at_10 or 0}xp"
+    items = [str(i) for i in m.items if i]
+    if items:
+        line += f" items:{','.join(items)}"
+    if m.early_items:
+        line += f" early:{','.join(str(i) for i in m.early_items)}"
+    return line
+
+def encode_snapshot(snapshot: PlayerSnapshot, token_budget: Optional[int] = None) -> str:
+    """
+    Compact, line-oriented player context for LLM prompts: a header, mastery with champion names,
+    pre-aggregated averages, then one row per match (newest first, empty item slots dropped).
+    Oldest match rows are dropped until the text fits `token_budget`; the averages always cover every match.
+    """
+    budget = token_budget or DEFAULT_TOKEN_BUDGET
+    rank = f"{snapshot.tier or 'UNRANKED'} {snapshot.rank or ''}".strip()
+    head = [f"Player: {snapshot.gameName}#{snapshot.tagLine} | {snapshot.region} | Lv{snapshot.summonerLevel} | {rank} | {snapshot.experience_level.value}"]
+    mastery = _mastery_line(snapshot)
+    if mastery:
+        head.append(mastery)
+
+    matches = snapshot.recent_matches
+    if not matches:
+        return "\n".join(head + ["No recent matches."])
+
+    head.append(_averages_line(matches))
+    head.append("Matches (champ result K/D/A cs dmg gold @10:gold/cs/xp items early-items):")
+    rows = [_match_line(m) for m in matches]
+
+    text = "\n".join(head + rows)
+    while rows and estimate_tokens(text) > budget:
+        rows.pop()
+        text = "\n".join(head + rows + [f"({len(matches) - len(rows)} older matches omitted)"])
+    return text
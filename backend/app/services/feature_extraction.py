@@ -0,0 +1,168 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence
+from app.models import MatchParticipantStats
+from app.services.timeline_parser import EARLY_ITEM_CUTOFF_MS
+
+PARTICIPANTS_PER_MATCH = 10
+ITEM_SLOTS = 7
+# Per-minute curve length kept from timelines (frames 0..15)
+CURVE_FRAMES = EARLY_ITEM_CUTOFF_MS // 60000 + 1
+
+# Integer end-of-game fields pulled from Match-V5 participants
+STAT_FIELDS = (
+    "kills",
+    "deaths",
+    "assists",
+    "totalMinionsKilled",
+    "neutralMinionsKilled",
+    "totalDamageDealtToChampions",
+    "goldEarned",
+    "participantId",
+    "teamId",
+)
+
+class MatchFeatureBatch:
+    """
+    Columnar view of N matches x 10 participants.
+
+    Match and timeline payloads are unpacked once into NumPy arrays (end-of-game
+    stats, items, gold/cs/xp curves) and every per-player number is then derived
+    with array operations instead of per-match Python loops.
+    """
+
+    def __init__(self, match_ids: List[str], matches: Sequence[Dict[str, Any]], timelines: Sequence[Optional[Dict[str, Any]]]):
+        n = len(matches)
+        shape = (n, PARTICIPANTS_PER_MATCH)
+        self.match_ids = match_ids
+        self.puuids = np.full(shape, "", dtype=object)
+        self.champions = np.full(shape, "Unknown", dtype=object)
+        self.positions = np.full(shape, "", dtype=object)
+        self.stats: Dict[str, np.ndarray] = {f: np.zeros(shape, dtype=np.int64) for f in STAT_FIELDS}
+        self.win = np.zeros(shape, dtype=bool)
+        self.valid = np.zeros(shape, dtype=bool)
+        self.items = np.zeros(shape + (ITEM_SLOTS,), dtype=np.int64)
+        self.duration_min = np.ones(n, dtype=np.float64)
+        self.has_timeline = np.zeros(n, dtype=bool)
+        self.gold_at_10 = np.zeros(shape, dtype=np.int64)
+        self.cs_at_10 = np.zeros(shape, dtype=np.int64)
+        self.xp_at_10 = np.zeros(shape, dtype=np.int64)
+        # Curves are NaN past the end of short games
+        self.gold_curve = np.full(shape + (CURVE_FRAMES,), np.nan)
+        self.cs_curve = np.full(shape + (CURVE_FRAMES,), np.nan)
+        self.xp_curve = np.full(shape + (CURVE_FRAMES,), np.nan)
+        self.early_items = np.empty(shape, dtype=object)
+        self.early_items.fill(())
+
+        for m, match in enumerate(matches):
+            info = (match or {}).get("info", {})
+            duration = info.get("gameDuration", 0)
+            if duration:
+                self.duration_min[m] = max(duration / 60.0, 1.0)
+
+            summary_parts = {}
+            if timelines[m]:
+                self.has_timeline[m] = True
+                summary_parts = timelines[m].get("participants", {})
+
+            for slot, part in enumerate(info.get("participants", [])[:PARTICIPANTS_PER_MATCH]):
+                self.valid[m, slot] = True
+                self.puuids[m, slot] = part.get("puuid", "")
+                self.champions[m, slot] = part.get("championName", "Unknown")
+                self.positions[m, slot] = part.get("teamPosition") or ""
+                self.win[m, slot] = part.get("win", False)
+                for field in STAT_FIELDS:
+                    self.stats[field][m, slot] = part.get(field, 0)
+                self.items[m, slot] = [part.get(f"item{i}", 0) for i in range(ITEM_SLOTS)]
+
+                early = summary_parts.get(str(part.get("participantId")))
+                if early:
+                    self.gold_at_10[m, slot] = early.get("gold_at_10", 0)
+                    self.cs_at_10[m, slot] = early.get("cs_at_10", 0)
+                    self.xp_at_10[m, slot] = early.get("xp_at_10", 0)
+                    self.early_items[m, slot] = tuple(early.get("early_items", []))
+                    for curve, key in ((self.gold_curve, "gold"), (self.cs_curve, "cs"), (self.xp_curve, "xp")):
+                        values = early.get(key, [])[:CURVE_FRAMES]
+                        curve[m, slot, :len(values)] = values
+
+        self._derive()
+
+    def _derive(self):
+        s = self.stats
+        self.cs = s["totalMinionsKilled"] + s["neutralMinionsKilled"]
+        self.kda = (s["kills"] + s["assists"]) / np.maximum(s["deaths"], 1)
+        self.cs_per_min = self.cs / self.duration_min[:, None]
+        self.gold_per_min = s["goldEarned"] / self.duration_min[:, None]
+        self.damage_per_min = s["totalDamageDealtToChampions"] / self.duration_min[:, None]
+
+        damage = s["totalDamageDealtToChampions"]
+        team_damage = np.zeros_like(damage)
+        for team in np.unique(s["teamId"][self.valid]):
+            mask = (s["teamId"] == team) & self.valid
+            team_damage += np.where(mask, (damage * mask).sum(axis=1, keepdims=True), 0)
+        self.damage_share = np.divide(damage, team_damage, out=np.zeros(damage.shape), where=team_damage > 0)
+
+    def __len__(self) -> int:
+        return len(self.match_ids)
+
+    def locate(self, puuid: str) -> np.ndarray:
+        """(match_index, slot) pairs where the player appears, in match order."""
+        return np.argwhere((self.puuids == puuid) & self.valid)
+
+    def participant_stats(self, puuid: str) -> List[MatchParticipantStats]:
+        s = self.stats
+        results = []
+        for m, slot in self.locate(puuid):
+            results.append(MatchParticipantStats(
+                championName=self.champions[m, slot],
+                kills=int(s["kills"][m, slot]),
+                deaths=int(s["deaths"][m, slot]),
+                assists=int(s["assists"][m, slot]),
+                totalMinionsKilled=int(self.cs[m, slot]),
+                totalDamageDealtToChampions=int(s["totalDamageDealtToChampions"][m, slot]),
+                goldEarned=int(s["goldEarned"][m, slot]),
+                win=bool(self.win[m, slot]),
+                items=self.items[m, slot].tolist(),
+                gold_at_10=int(self.gold_at_10[m, slot]),
+                cs_at_10=int(self.cs_at_10[m, slot]),
+                xp_at_10=int(self.xp_at_10[m, slot]),
+                early_items=list(self.early_items[m, slot]),
+                game_minutes=round(float(self.duration_min[m]), 2),
+                damage_share=round(float(self.damage_share[m, slot]), 4),
+                teamPosition=self.positions[m, slot] or None
+            ))
+        return results
+
+    def player_match_ids(self, puuid: str) -> List[str]:
+        return [self.match_ids[m] for m, _ in self.locate(puuid)]
+
+    def player_aggregates(self, puuid: str) -> Dict[str, float]:
+        """Mean per-game metrics for one player across every match in the batch."""
+        mask = (self.puuids == puuid) & self.valid
+        games = int(mask.sum())
+        if not games:
+            return {"games": 0}
+
+        timeline_mask = mask & self.has_timeline[:, None]
+        with_timeline = int(timeline_mask.sum())
+
+        def mean(values: np.ndarray, m: np.ndarray = mask) -> float:
+            return float(values[m].mean()) if m.any() else 0.0
+
+        s = self.stats
+        return {
+            "games": games,
+            "win_rate": mean(self.win.astype(np.float64)),
+            "kills": mean(s["kills"]),
+            "deaths": mean(s["deaths"]),
+            "assists": mean(s["assists"]),
+            # Pooled KDA over all games rather than a mean of per-game ratios
+            "kda": float((s["kills"][mask].sum() + s["assists"][mask].sum()) / max(s["deaths"][mask].sum(), 1)),
+            "cs_per_min": mean(self.cs_per_min),
+            "gold_per_min": mean(self.gold_per_min),
+            "damage": mean(s["totalDamageDealtToChampions"]),
+            "damage_share": mean(self.damage_share),
+            "timeline_games": with_timeline,
+            "gold_at_10": mean(self.gold_at_10, timeline_mask),
+            "cs_at_10": mean(self.cs_at_10, timeline_mask),
+            "xp_at_10": mean(self.xp_at_10, timeline_mask),
+        }
@@ -0,0 +1,72 @@
+import os
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+class StageLimits:
+    """Per-stage concurrency caps shared by every analysis (Riot fetches vs. LLM calls)."""
+
+    def __init__(self, riot: Optional[int] = None, llm: Optional[int] = None):
+        self.riot_limit = riot or int(os.getenv("RIOT_STAGE_CONCURRENCY", "8"))
+        self.llm_limit = llm or int(os.getenv("LLM_STAGE_CONCURRENCY", "4"))
+        self.riot = asyncio.Semaphore(self.riot_limit)
+        self.llm = asyncio.Semaphore(self.llm_limit)
+
+class QueueFullError(Exception):
+    pass
+
+class JobQueue:
+    """
+    Bounded queue drained by a fixed pool of worker tasks.
+
+    Jobs are zero-argument coroutine factories; the job itself is responsible
+    for recording its outcome (e.g. on the session it belongs to).
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.num_workers = workers or int(os.getenv("ANALYZE_WORKERS", "8"))
+        self.max_pending = max_pending or int(os.getenv("ANALYZE_QUEUE_SIZE", "100"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, job: Callable[[], Awaitable[None]]):
+        if not self.running:
+            raise RuntimeError("JobQueue is not running")
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Analysis queue is full")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await job()
+            except Exception as e:
+                print(f"Job Error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def join(self):
+        if self._queue:
+            await self._queue.join()
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel
+
+# Fields that don't change what the model is asked to judge
+VOLATILE_SNAPSHOT_FIELDS = {"pending_match_ids"}
+
+def canonical_digest(model_id: str, prompt_version: str, payload: BaseModel) -> str:
+    """Stable hash of (model, prompt version, normalised payload) independent of key order."""
+    data = payload.model_dump(mode="json", exclude=VOLATILE_SNAPSHOT_FIELDS)
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{model_id}\n{prompt_version}\n{canonical}".encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Persistent cache of parsed LLM responses keyed by canonical_digest.
+    Entries expire after `ttl` seconds and the least recently used are evicted beyond `max_entries`.
+    Reads only note their access time in memory; it is written with the next set() (or close()),
+    so a hit costs a SELECT and no commit. Async code uses aget/aset, which run in a thread.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+        self.hits = 0
+        self.misses = 0
+        # Key -> last read time not yet written to accessed_at
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_accessed ON llm_responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        now = time.time()
+        results: List[Optional[Dict[str, Any]]] = []
+        with self._lock:
+            expired = []
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] < self.ttl:
+                    self._touched[key] = now
+                    self.hits += 1
+                    results.append(json.loads(row[0]))
+                    continue
+                if row:
+                    expired.append((key,))
+                self.misses += 1
+                results.append(None)
+            if expired:
+                self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", expired)
+                self._conn.commit()
+        return results
+
+    def set(self, key: str, response: Dict[str, Any]) -> None:
+        self.set_many({key: response})
+
+    def set_many(self, responses: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(response), now, now) for key, response in responses.items()]
+            )
+            # Size bound: drop least recently used entries beyond max_entries
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                " SELECT key FROM llm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """Writes pending read times (caller holds the lock and commits) so eviction sees them."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._touched.clear()
+
+    # --- Async API (keeps sqlite off the event loop) ---
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset(self, key: str, response: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.set, key, response)
+
+    async def aset_many(self, responses: Dict[str, Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.set_many, responses)
+
+    async def astats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.stats)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,136 @@
+import os
+import json
+import zlib
+import sqlite3
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Iterator, List, Tuple
+from app.utils.cache import LRUCache
+
+class MatchStore:
+    """
+    Two-tier cache for immutable Match-V5 payloads.
+
+    A finished match never changes, so details and timelines are stored forever
+    keyed by (match_id, kind) in a local SQLite file (zlib-compressed JSON), with
+    an in-memory LRU in front of it for the hot set.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_size: Optional[int] = None):
+        self.path = path or os.getenv("MATCH_STORE_PATH", "data/match_store.sqlite3")
+        if memory_size is None:
+            memory_size = int(os.getenv("MATCH_CACHE_SIZE", "256"))
+        self.memory = LRUCache(maxsize=memory_size)
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS match_payloads ("
+            " match_id TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " PRIMARY KEY (match_id, kind))"
+        )
+        # Last known ranked tier of players seen in analyses; labels the corpus for percentile tables
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS player_tiers ("
+            " puuid TEXT PRIMARY KEY,"
+            " tier TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Sync API (disk) ---
+    def get(self, kind: str, match_id: str) -> Optional[Dict[str, Any]]:
+        key = (kind, match_id)
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+        return self._read_disk(kind, match_id)
+
+    def _read_disk(self, kind: str, match_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM match_payloads WHERE match_id = ? AND kind = ?",
+                (match_id, kind)
+            ).fetchone()
+        if not row:
+            return None
+
+        data = json.loads(zlib.decompress(row[0]))
+        self.memory.set((kind, match_id), data)
+        return data
+
+    def put(self, kind: str, match_id: str, data: Dict[str, Any]) -> None:
+        self.memory.set((kind, match_id), data)
+        blob = self.encode(data)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO match_payloads (match_id, kind, payload) VALUES (?, ?, ?)",
+                (match_id, kind, blob)
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def encode(data: Dict[str, Any]) -> bytes:
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def put_many(self, rows: List[Tuple[str, str, bytes]]) -> None:
+        """Bulk insert of (kind, match_id, encode(data)) rows in one transaction; skips the memory tier."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO match_payloads (kind, match_id, payload) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def count(self, kind: Optional[str] = None) -> int:
+        with self._lock:
+            if kind:
+                row = self._conn.execute("SELECT COUNT(*) FROM match_payloads WHERE kind = ?", (kind,)).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM match_payloads").fetchone()
+        return row[0]
+
+    def iter_payloads(self, kind: str, batch_size: int = 500) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+        """Every stored payload of one kind as batches of (match_id, data), bypassing the memory tier."""
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT match_id, payload FROM match_payloads WHERE kind = ? AND match_id > ? ORDER BY match_id LIMIT ?",
+                    (kind, last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [(match_id, json.loads(zlib.decompress(blob))) for match_id, blob in rows]
+
+    def put_tier(self, puuid: str, tier: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO player_tiers (puuid, tier) VALUES (?, ?)", (puuid, tier))
+            self._conn.commit()
+
+    def tiers(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT puuid, tier FROM player_tiers").fetchall())
+
+    # --- Async API (keeps disk I/O and (de)compression off the event loop) ---
+    async def aget(self, kind: str, match_id: str) -> Optional[Dict[str, Any]]:
+        cached = self.memory.get((kind, match_id))
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self._read_disk, kind, match_id)
+
+    async def aput(self, kind: str, match_id: str, data: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.put, kind, match_id, data)
+
+    async def aput_tier(self, puuid: str, tier: str) -> None:
+        await asyncio.to_thread(self.put_tier, puuid, tier)
@@ -0,0 +1,197 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from app.models import PlayerSnapshot, MatchParticipantStats
+from app.services.feature_extraction import MatchFeatureBatch
+from app.services.match_store import MatchStore
+from app.services.timeline_parser import summarize_timeline
+
+# Per-game metrics with percentile tables
+PERCENTILE_METRICS = ("cs_at_10", "gold_at_10", "kda", "damage_per_min")
+# Each sketch stores the 0th..100th percentile of its distribution
+QUANTILE_POINTS = 101
+ALL = "ALL"
+
+# (tier, role, champion) groupings, most specific first; lookups fall back down this list.
+# Role outranks tier: a support's cs@10 says little next to other roles' at the same tier.
+GROUPINGS: Tuple[Tuple[bool, bool, bool], ...] = (
+    (True, True, True),
+    (True, True, False),
+    (False, True, True),
+    (False, True, False),
+    (True, False, False),
+    (False, False, False),
+)
+
+def sketch_key(metric: str, tier: Optional[str], role: Optional[str], champion: Optional[str]) -> str:
+    return f"{tier or ALL}|{role or ALL}|{champion or ALL}|{metric}"
+
+def match_metrics(match: MatchParticipantStats) -> Dict[str, float]:
+    """The PERCENTILE_METRICS of one game, skipping those without data."""
+    values = {"kda": (match.kills + match.assists) / max(match.deaths, 1)}
+    if match.gold_at_10:
+        values["gold_at_10"] = match.gold_at_10
+        values["cs_at_10"] = match.cs_at_10 or 0
+    if match.game_minutes:
+        values["damage_per_min"] = match.totalDamageDealtToChampions / match.game_minutes
+    return values
+
+class PercentileTables:
+    """
+    Quantile sketches of per-game metrics by tier, role and champion.
+
+    Every sketch is a sorted array of QUANTILE_POINTS values, so a lookup is a binary
+    search (O(log n)) plus interpolation between the neighbouring quantiles. Groups
+    with too few samples aren't stored; lookups fall back to broader groupings.
+    """
+
+    def __init__(self, sketches: Dict[str, np.ndarray]):
+        self.sketches = sketches
+
+    def __len__(self) -> int:
+        return len(self.sketches)
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        keys = sorted(self.sketches)
+        quantiles = np.stack([self.sketches[k] for k in keys]) if keys else np.zeros((0, QUANTILE_POINTS), dtype=np.float32)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, keys=np.array(keys, dtype=str), quantiles=quantiles)
+
+    @classmethod
+    def load(cls, path: str) -> "PercentileTables":
+        with np.load(path) as data:
+            return cls(dict(zip(data["keys"].tolist(), data["quantiles"])))
+
+    @classmethod
+    def load_default(cls) -> Optional["PercentileTables"]:
+        """Tables from PERCENTILE_TABLES_PATH, or None until they've been built (app.cli.build_percentiles)."""
+        path = os.getenv("PERCENTILE_TABLES_PATH", "data/percentiles.npz")
+        if not os.path.exists(path):
+            return None
+        tables = cls.load(path)
+        print(f"Loaded {len(tables)} percentile sketches from {path}")
+        return tables
+
+    def sketch(self, metric: str, tier: Optional[str] = None, role: Optional[str] = None, champion: Optional[str] = None) -> Optional[np.ndarray]:
+        for use_tier, use_role, use_champion in GROUPINGS:
+            if (use_tier and not tier) or (use_role and not role) or (use_champion and not champion):
+                continue
+            key = sketch_key(metric, tier if use_tier else None, role if use_role else None, champion if use_champion else None)
+            if key in self.sketches:
+                return self.sketches[key]
+        return None
+
+    def lookup(self, metric: str, value: float, tier: Optional[str] = None, role: Optional[str] = None, champion: Optional[str] = None) -> Optional[float]:
+        """Percentile (0-100) of `value` within the most specific available distribution."""
+        q = self.sketch(metric, tier, role, champion)
+        if q is None:
+            return None
+        left = int(np.searchsorted(q, value, side="left"))
+        right = int(np.searchsorted(q, value, side="right"))
+        step = 100.0 / (QUANTILE_POINTS - 1)
+        if left != right:
+            # Value sits on (a run of) quantile points: take the middle of the run
+            return (left + right - 1) / 2 * step
+        if left == 0:
+            return 0.0
+        if left == QUANTILE_POINTS:
+            return 100.0
+        lo, hi = float(q[left - 1]), float(q[left])
+        return (left - 1 + (value - lo) / (hi - lo)) * step
+
+    def player_percentile(self, snapshot: PlayerSnapshot) -> Optional[float]:
+        """Mean percentile over every metric of every recent game, each against its champion/role/tier group."""
+        tier = snapshot.tier if snapshot.tier and snapshot.tier != "UNRANKED" else None
+        percentiles = []
+        for match in snapshot.recent_matches:
+            for metric, value in match_metrics(match).items():
+                p = self.lookup(metric, value, tier, match.teamPosition, match.championName)
+                if p is not None:
+                    percentiles.append(p)
+        return round(sum(percentiles) / len(percentiles), 1) if percentiles else None
+
+class PercentileBuilder:
+    """Accumulates per-game metric samples from MatchFeatureBatches and reduces them to PercentileTables."""
+
+    def __init__(self, min_samples: Optional[int] = None):
+        self.min_samples = min_samples or int(os.getenv("PERCENTILE_MIN_SAMPLES", "20"))
+        self._tiers: List[np.ndarray] = []
+        self._roles: List[np.ndarray] = []
+        self._champions: List[np.ndarray] = []
+        self._values: Dict[str, List[np.ndarray]] = {m: [] for m in PERCENTILE_METRICS}
+
+    def add_batch(self, batch: MatchFeatureBatch, tiers: Dict[str, str]) -> None:
+        """`tiers` maps PUUID -> ranked tier; participants without one only count towards the all-tier groups."""
+        valid = batch.valid
+        self._tiers.append(np.array([tiers.get(p, "") for p in batch.puuids[valid]], dtype=object))
+        self._roles.append(batch.positions[valid])
+        self._champions.append(batch.champions[valid])
+
+        timeline = (batch.has_timeline[:, None] & valid)[valid]
+        metrics = {
+            "cs_at_10": batch.cs_at_10,
+            "gold_at_10": batch.gold_at_10,
+            "kda": batch.kda,
+            "damage_per_min": batch.damage_per_min,
+        }
+        for metric, values in metrics.items():
+            column = values[valid].astype(np.float64)
+            if metric in ("cs_at_10", "gold_at_10"):
+                column[~timeline] = np.nan
+            self._values[metric].append(column)
+
+    def build(self) -> PercentileTables:
+        if not self._tiers:
+            return PercentileTables({})
+        tiers = np.concatenate(self._tiers)
+        roles = np.concatenate(self._roles)
+        champions = np.concatenate(self._champions)
+        points = np.linspace(0.0, 1.0, QUANTILE_POINTS)
+
+        sketches: Dict[str, np.ndarray] = {}
+        for use_tier, use_role, use_champion in GROUPINGS:
+            rows = np.ones(len(tiers), dtype=bool)
+            if use_tier:
+                rows &= tiers != ""
+            if use_role:
+                rows &= roles != ""
+            group_keys = np.full(len(tiers), "", dtype=object)
+            for used, column in ((use_tier, tiers), (use_role, roles), (use_champion, champions)):
+                group_keys = group_keys + (column if used else ALL) + "|"
+            groups, inverse, counts = np.unique(group_keys[rows].astype(str), return_inverse=True, return_counts=True)
+            # Rows sorted by group so each group's samples are one contiguous slice
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.concatenate(([0], np.cumsum(counts)))
+
+            for metric in PERCENTILE_METRICS:
+                values = np.concatenate(self._values[metric])[rows][order]
+                for g, group in enumerate(groups):
+                    sample = values[bounds[g]:bounds[g + 1]]
+                    sample = sample[~np.isnan(sample)]
+                    if len(sample) >= self.min_samples:
+                        sketches[f"{group}{metric}"] = np.quantile(sample, points).astype(np.float32)
+        return PercentileTables(sketches)
+
+def build_from_store(
+    store: MatchStore,
+    tiers: Optional[Dict[str, str]] = None,
+    min_samples: Optional[int] = None,
+    batch_size: int = 500
+) -> PercentileTables:
+    """
+    Percentile tables over every match detail in the store. Player tiers come from the
+    store (recorded by analyses) overlaid with `tiers`.
+    """
+    builder = PercentileBuilder(min_samples)
+    known_tiers = {**store.tiers(), **(tiers or {})}
+    for rows in store.iter_payloads("detail", batch_size):
+        match_ids = [match_id for match_id, _ in rows]
+        timelines = [
+            store.get("timeline_summary", match_id) or summarize_timeline(store.get("timeline", match_id))
+            for match_id in match_ids
+        ]
+        builder.add_batch(MatchFeatureBatch(match_ids, [data for _, data in rows], timelines), known_tiers)
+    return builder.build()
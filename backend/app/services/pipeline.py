@@ -0,0 +1,167 @@
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+from app.models import AnalyzeRequest, AnalysisResult, BatchAnalyzeRequest, PlayerSnapshot
+from app.services.analyzer import AnalyzerService
+from app.services.bedrock_client import BedrockClient
+from app.services.job_queue import StageLimits
+from app.services.rating_engine import RatingEngine
+from app.services.percentiles import PercentileTables
+from app.utils.timing import stage_timings
+
+class AnalysisPipeline:
+    """
+    The /api/analyze steps: Riot snapshot, DeepSeek rating and the coach's opening tip.
+    Each step runs under its stage's concurrency limit.
+    """
+
+    def __init__(
+        self,
+        analyzer: AnalyzerService,
+        bedrock: BedrockClient,
+        stages: StageLimits,
+        default_mode: Optional[str] = None,
+        rating_engine: Optional[RatingEngine] = None,
+        rating_mode: Optional[str] = None,
+        percentiles: Optional[PercentileTables] = None
+    ):
+        self.analyzer = analyzer
+        self.bedrock = bedrock
+        self.stages = stages
+        self.default_mode = default_mode or os.getenv("ANALYZE_PIPELINE_MODE", "sequential")
+        self.rating_engine = rating_engine or RatingEngine()
+        # 'llm': DeepSeek rates, the engine is the fallback; 'local': the engine rates, DeepSeek only writes the summary
+        self.rating_mode = rating_mode or os.getenv("RATING_MODE", "llm")
+        # Bedrock answers slower than this (queueing included) fall back to the local engine
+        self.rating_timeout = float(os.getenv("RATING_LLM_TIMEOUT_SECONDS", "30"))
+        # Corpus percentiles (app.cli.build_percentiles) replace the model's percentile estimate when available
+        self.percentiles = percentiles
+
+    async def build_snapshot(self, request: AnalyzeRequest, initial_matches: Optional[int] = None) -> PlayerSnapshot:
+        async with self.stages.riot:
+            with stage_timings.measure("build_snapshot"):
+                return await self.analyzer.build_snapshot(
+                    request.gameName,
+                    request.tagLine,
+                    request.region,
+                    match_count=request.match_count,
+                    initial_matches=initial_matches
+                )
+
+    async def build_snapshots(self, request: BatchAnalyzeRequest) -> List[Union[PlayerSnapshot, Exception]]:
+        """Every player's snapshot from one shared match fetch (see AnalyzerService.build_snapshots)."""
+        async with self.stages.riot:
+            return await self.analyzer.build_snapshots(
+                [(player.gameName, player.tagLine) for player in request.players],
+                request.region,
+                match_count=request.match_count
+            )
+
+    async def enrich(self, snapshot: PlayerSnapshot):
+        """Yields progressively larger snapshots until no matches are pending."""
+        batches = self.analyzer.enrich_snapshot(snapshot)
+        while True:
+            # Take the Riot slot per batch so long enrichments don't starve new analyses
+            async with self.stages.riot:
+                try:
+                    enriched = await batches.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield enriched
+
+    async def analyze(self, snapshot: PlayerSnapshot, mode: Optional[str] = None) -> AnalysisResult:
+        """
+        Rating + initial coaching tip.
+        'sequential': the tip prompt embeds the DeepSeek summary, so the calls run back to back.
+        'concurrent': the tip is prompted from locally computed stats and runs alongside the rating.
+        """
+        mode = mode or self.default_mode
+        if mode == "concurrent":
+            rating_json, tip = await asyncio.gather(
+                self._rate(snapshot),
+                self._tip(self._local_tip_prompt(snapshot), snapshot)
+            )
+        else:
+            # 1. AI Rating
+            rating_json = await self._rate(snapshot)
+            # 2. Generate Initial Coaching Tip
+            # Use the agent to generate the initial tip based on the summary
+            tip = await self._tip(self._summary_tip_prompt(rating_json), snapshot)
+        return self._result(snapshot, rating_json, tip)
+
+    async def analyze_batch(self, snapshots: List[PlayerSnapshot], mode: Optional[str] = None) -> List[AnalysisResult]:
+        """analyze() for several players: one batched rating call, then each player's opening tip concurrently."""
+        mode = mode or self.default_mode
+        if mode == "concurrent":
+            ratings, tips = await asyncio.gather(
+                self._rate_batch(snapshots),
+                asyncio.gather(*(self._tip(self._local_tip_prompt(s), s) for s in snapshots))
+            )
+        else:
+            ratings = await self._rate_batch(snapshots)
+            tips = await asyncio.gather(*(self._tip(self._summary_tip_prompt(r), s) for s, r in zip(snapshots, ratings)))
+        return [self._result(s, r, tip) for s, r, tip in zip(snapshots, ratings, tips)]
+
+    def _result(self, snapshot: PlayerSnapshot, rating_json: Dict[str, Any], tip: str) -> AnalysisResult:
+        percentile = self.percentiles.player_percentile(snapshot) if self.percentiles else None
+        return AnalysisResult(
+            rating=rating_json.get("rating", 0),
+            percentile=percentile if percentile is not None else rating_json.get("percentile", 0.0),
+            summary=rating_json.get("summary", "Analysis unavailable."),
+            coaching_tip=tip,
+            rating_source=rating_json.get("source", "llm")
+        )
+
+    async def _rate(self, snapshot: PlayerSnapshot):
+        with stage_timings.measure("rating"):
+            return await self._rate_with_fallback(snapshot)
+
+    async def _rate_with_fallback(self, snapshot: PlayerSnapshot):
+        local = self.rating_engine.rate(snapshot)
+        if self.rating_mode == "local":
+            try:
+                summary = await asyncio.wait_for(self._llm_call(self.bedrock.agenerate_summary, snapshot, local), self.rating_timeout)
+                if summary:
+                    local["summary"] = summary
+            except Exception as e:
+                print(f"Rating summary unavailable, keeping local summary: {e!r}")
+            return local
+
+        try:
+            rating = await asyncio.wait_for(self._llm_call(self.bedrock.agenerate_rating, snapshot), self.rating_timeout)
+            if "error" not in rating:
+                return rating
+            print(f"Rating fallback to local engine: {rating['error']}")
+        except Exception as e:
+            print(f"Rating fallback to local engine: {e!r}")
+        return local
+
+    async def _rate_batch(self, snapshots: List[PlayerSnapshot]) -> List[Dict[str, Any]]:
+        with stage_timings.measure("rating"):
+            if self.rating_mode == "local":
+                return list(await asyncio.gather(*(self._rate_with_fallback(s) for s in snapshots)))
+            local = [self.rating_engine.rate(s) for s in snapshots]
+            try:
+                ratings = await asyncio.wait_for(self._llm_call(self.bedrock.agenerate_ratings, snapshots), self.rating_timeout)
+            except Exception as e:
+                print(f"Batch rating fallback to local engine: {e!r}")
+                return local
+            # Players the batched answer didn't cover fall back individually
+            return [rating if "error" not in rating else fallback for rating, fallback in zip(ratings, local)]
+
+    async def _llm_call(self, method, *args):
+        async with self.stages.llm:
+            return await method(*args)
+
+    async def _tip(self, prompt: str, snapshot: PlayerSnapshot) -> str:
+        async with self.stages.llm:
+            with stage_timings.measure("agent"):
+                return await self.bedrock.ainvoke_agent(prompt, snapshot)
+
+    @staticmethod
+    def _summary_tip_prompt(rating_json: Dict[str, Any]) -> str:
+        return f"The analyst provided this summary: '{rating_json.get('summary')}'. Give me a starting coaching tip based on this."
+
+    def _local_tip_prompt(self, snapshot: PlayerSnapshot) -> str:
+        stats = self.analyzer.summarize_stats(snapshot)
+        return f"Here is a quick summary of my recent games: {stats}. Give me a starting coaching tip based on this."
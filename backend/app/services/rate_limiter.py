@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Tuple, Optional, Any, Mapping
+
+def parse_rate_limits(value: Optional[str]) -> List[Tuple[int, int]]:
+    """Parses a Riot rate-limit header value like '20:1,100:120' into [(count, seconds), ...]."""
+    limits = []
+    if not value:
+        return limits
+    for part in value.split(","):
+        try:
+            count, window = part.strip().split(":")
+            limits.append((int(count), int(window)))
+        except ValueError:
+            continue
+    return limits
+
+class RateWindow:
+    """Sliding request log for a single 'count per window seconds' limit."""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.timestamps: deque = deque()
+
+    def _expire(self, now: float):
+        while self.timestamps and now - self.timestamps[0] >= self.window:
+            self.timestamps.popleft()
+
+    def wait_time(self, now: float) -> float:
+        self._expire(now)
+        if len(self.timestamps) < self.limit:
+            return 0.0
+        return self.window - (now - self.timestamps[0])
+
+    def record(self, now: float):
+        self.timestamps.append(now)
+
+    def sync_count(self, count: int, now: float):
+        # Riot counts requests from every process sharing the key; never report less than it does
+        self._expire(now)
+        missing = min(count, self.limit) - len(self.timestamps)
+        for _ in range(missing):
+            self.timestamps.append(now)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        self._expire(now)
+        used = len(self.timestamps)
+        return {
+            "limit": self.limit,
+            "window": self.window,
+            "used": used,
+            "remaining": max(self.limit - used, 0),
+            "fill": round(used / self.limit, 3) if self.limit else 1.0,
+        }
+
+class RateBucket:
+    """All windows of one limit scope (the app limit on a host, or one method on a host)."""
+
+    def __init__(self, limits: List[Tuple[int, int]]):
+        self.windows: List[RateWindow] = [RateWindow(c, w) for c, w in limits]
+        self.blocked_until = 0.0
+
+    def set_limits(self, limits: List[Tuple[int, int]]):
+        current = {(w.limit, w.window) for w in self.windows}
+        if not limits or current == set(limits):
+            return
+        old = {w.window: w.timestamps for w in self.windows}
+        self.windows = [RateWindow(c, w) for c, w in limits]
+        for window in self.windows:
+            window.timestamps = old.get(window.window, deque())
+
+    def wait_time(self, now: float) -> float:
+        wait = max(self.blocked_until - now, 0.0)
+        for window in self.windows:
+            wait = max(wait, window.wait_time(now))
+        return wait
+
+    def record(self, now: float):
+        for window in self.windows:
+            window.record(now)
+
+    def sync_counts(self, counts: List[Tuple[int, int]], now: float):
+        by_window = {w: c for c, w in counts}
+        for window in self.windows:
+            if window.window in by_window:
+                window.sync_count(by_window[window.window], now)
+
+class RateLimiter:
+    """
+    Proactive limiter for the Riot API.
+
+    Riot enforces an application limit per routing host (americas, na1, euw1...)
+    and a method limit per endpoint per host. Requests wait here until every
+    applicable window has room, and limits are learned from the
+    X-App-Rate-Limit / X-Method-Rate-Limit response headers.
+    """
+
+    def __init__(self, app_limits: Optional[str] = None):
+        # Development key defaults until the first response tells us otherwise
+        self.default_app_limits = parse_rate_limits(app_limits or os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120"))
+        self.app_buckets: Dict[str, RateBucket] = {}
+        self.method_buckets: Dict[Tuple[str, str], RateBucket] = {}
+        self._lock = asyncio.Lock()
+
+    def _app_bucket(self, host: str) -> RateBucket:
+        if host not in self.app_buckets:
+            self.app_buckets[host] = RateBucket(self.default_app_limits)
+        return self.app_buckets[host]
+
+    def _method_bucket(self, host: str, method: str) -> RateBucket:
+        key = (host, method)
+        if key not in self.method_buckets:
+            # Method limits are unknown until Riot reports them
+            self.method_buckets[key] = RateBucket([])
+        return self.method_buckets[key]
+
+    async def acquire(self, host: str, method: str):
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                app_bucket = self._app_bucket(host)
+                method_bucket = self._method_bucket(host, method)
+                wait = max(app_bucket.wait_time(now), method_bucket.wait_time(now))
+                if wait <= 0:
+                    app_bucket.record(now)
+                    method_bucket.record(now)
+                    return
+            await asyncio.sleep(wait)
+
+    def update(self, host: str, method: str, headers: Mapping[str, str]):
+        now = time.monotonic()
+        app_bucket = self._app_bucket(host)
+        method_bucket = self._method_bucket(host, method)
+
+        app_bucket.set_limits(parse_rate_limits(headers.get("X-App-Rate-Limit")))
+        method_bucket.set_limits(parse_rate_limits(headers.get("X-Method-Rate-Limit")))
+        app_bucket.sync_counts(parse_rate_limits(headers.get("X-App-Rate-Limit-Count")), now)
+        method_bucket.sync_counts(parse_rate_limits(headers.get("X-Method-Rate-Limit-Count")), now)
+
+    def penalize(self, host: str, method: str, retry_after: float, limit_type: Optional[str] = None):
+        """Blocks the scope Riot reported as exceeded (application, method, or service) after a 429."""
+        until = time.monotonic() + retry_after
+        if limit_type == "application":
+            bucket = self._app_bucket(host)
+        else:
+            bucket = self._method_bucket(host, method)
+        bucket.blocked_until = max(bucket.blocked_until, until)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current fill of every known bucket, grouped by routing host."""
+        now = time.monotonic()
+        result: Dict[str, Any] = {}
+        for host, bucket in self.app_buckets.items():
+            result.setdefault(host, {"app": [], "methods": {}})
+            result[host]["app"] = [w.stats(now) for w in bucket.windows]
+        for (host, method), bucket in self.method_buckets.items():
+            result.setdefault(host, {"app": [], "methods": {}})
+            result[host]["methods"][method] = [w.stats(now) for w in bucket.windows]
+        return result
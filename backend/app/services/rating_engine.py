@@ -0,0 +1,100 @@
+import math
+from typing import Dict, Any, List, Optional, Tuple
+from app.models import PlayerSnapshot, ExperienceLevel, MatchParticipantStats
+
+# Typical per-game (mean, spread) for an average player at each experience level
+LEVEL_BASELINES: Dict[ExperienceLevel, Dict[str, Tuple[float, float]]] = {
+    ExperienceLevel.BEGINNER: {"kda": (2.0, 1.0), "cs_per_min": (4.5, 1.3), "gold_at_10": (2800, 450), "damage_share": (0.20, 0.06)},
+    ExperienceLevel.CASUAL: {"kda": (2.4, 1.1), "cs_per_min": (5.3, 1.3), "gold_at_10": (3100, 450), "damage_share": (0.20, 0.06)},
+    ExperienceLevel.INTERMEDIATE: {"kda": (2.7, 1.1), "cs_per_min": (6.0, 1.2), "gold_at_10": (3300, 420), "damage_share": (0.20, 0.055)},
+    ExperienceLevel.ADVANCED: {"kda": (3.0, 1.1), "cs_per_min": (6.8, 1.1), "gold_at_10": (3550, 400), "damage_share": (0.20, 0.05)},
+    ExperienceLevel.PRO: {"kda": (3.4, 1.2), "cs_per_min": (7.6, 1.0), "gold_at_10": (3800, 380), "damage_share": (0.20, 0.05)},
+}
+
+# Tiers sharing an experience level aren't equal: scales the level's means (damage share is team-relative, so unscaled)
+TIER_SCALE: Dict[str, float] = {
+    "IRON": 0.92,
+    "BRONZE": 1.0,
+    "SILVER": 0.96,
+    "GOLD": 1.03,
+    "PLATINUM": 0.98,
+    "EMERALD": 1.03,
+    "DIAMOND": 0.97,
+    "MASTER": 1.02,
+    "GRANDMASTER": 1.05,
+    "CHALLENGER": 1.08,
+}
+
+METRIC_WEIGHTS: Dict[str, float] = {"kda": 0.3, "cs_per_min": 0.25, "gold_at_10": 0.2, "damage_share": 0.25}
+
+METRIC_LABELS: Dict[str, str] = {
+    "kda": "KDA",
+    "cs_per_min": "CS/min",
+    "gold_at_10": "gold at 10 minutes",
+    "damage_share": "team damage share",
+}
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+def _metrics(matches: List[MatchParticipantStats]) -> Dict[str, float]:
+    """Per-game averages of the rated metrics; metrics without data (e.g. no timelines) are left out."""
+    kills = sum(m.kills for m in matches)
+    deaths = sum(m.deaths for m in matches)
+    assists = sum(m.assists for m in matches)
+    values = {
+        "kda": (kills + assists) / max(deaths, 1),
+        "cs_per_min": _mean([m.totalMinionsKilled / m.game_minutes for m in matches if m.game_minutes]),
+        "gold_at_10": _mean([m.gold_at_10 for m in matches if m.gold_at_10]),
+        "damage_share": _mean([m.damage_share for m in matches if m.damage_share]),
+    }
+    return {k: v for k, v in values.items() if v is not None}
+
+class RatingEngine:
+    """
+    Deterministic 0-100 rating from recent match stats.
+
+    Each metric is turned into a z-score against the baseline for the player's experience
+    level (scaled by tier), the z-scores are combined with METRIC_WEIGHTS, and the result
+    is mapped to a percentile through the normal CDF. No I/O; runs in microseconds.
+    """
+
+    def baseline(self, experience_level: ExperienceLevel, tier: Optional[str]) -> Dict[str, Tuple[float, float]]:
+        scale = TIER_SCALE.get((tier or "").upper(), 1.0)
+        return {
+            metric: (mean if metric == "damage_share" else mean * scale, spread)
+            for metric, (mean, spread) in LEVEL_BASELINES[experience_level].items()
+        }
+
+    def rate(self, snapshot: PlayerSnapshot) -> Dict[str, Any]:
+        """Same shape as BedrockClient.generate_rating, plus per-metric components."""
+        if not snapshot.recent_matches:
+            return {"rating": 50, "percentile": 50.0, "summary": "No recent matches to rate.", "components": {}, "source": "local"}
+
+        baseline = self.baseline(snapshot.experience_level, snapshot.tier)
+        components = {}
+        for metric, value in _metrics(snapshot.recent_matches).items():
+            mean, spread = baseline[metric]
+            components[metric] = {"value": round(value, 3), "baseline": round(mean, 3), "z": round((value - mean) / spread, 3)}
+
+        # Weights are renormalised over the metrics that have data
+        total_weight = sum(METRIC_WEIGHTS[m] for m in components)
+        z = sum(METRIC_WEIGHTS[m] * c["z"] for m, c in components.items()) / total_weight
+        percentile = 50.0 * (1.0 + math.erf(z / math.sqrt(2.0)))
+        return {
+            "rating": round(min(max(50.0 + 20.0 * z, 0.0), 100.0)),
+            "percentile": round(percentile, 1),
+            "summary": self.describe(snapshot, components),
+            "components": components,
+            "source": "local",
+        }
+
+    def describe(self, snapshot: PlayerSnapshot, components: Dict[str, Dict[str, float]]) -> str:
+        """Template summary naming the strongest and weakest metric against the baseline."""
+        ranked = sorted(components.items(), key=lambda item: item[1]["z"])
+        weakest, strongest = ranked[0], ranked[-1]
+        level = snapshot.experience_level.value
+        strong = f"Strongest area is {METRIC_LABELS[strongest[0]]} ({strongest[1]['value']:g} vs {strongest[1]['baseline']:g} typical for {level} players)."
+        if weakest[0] == strongest[0]:
+            return strong
+        return strong + f" Biggest gap is {METRIC_LABELS[weakest[0]]} ({weakest[1]['value']:g} vs {weakest[1]['baseline']:g})."
@@ -1,9 +1,16 @@
 import os
+import time
 import asyncio
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from fastapi import HTTPException
 from app.utils.constants import get_platform_from_region
+from app.services.match_store import MatchStore
+from app.services.rate_limiter import RateLimiter
+from app.services.timeline_parser import TimelineStreamParser, summarize_timeline
+from app.utils.cache import LRUCache
+from app.utils.metrics import Counter, Gauge, Histogram
+from app.utils.profiling import profiler
 from app.models import (
     AccountV1Response, 
     SummonerV4Response, 
@@ -11,41 +18,119 @@ from app.models import (
     ChampionMastery
 )
 
+# Where routing hosts (na1, americas, ...) are served; point at a stand-in (e.g. benchmarks.fake_riot) with
+# something like "http://127.0.0.1:8100/{host}"
+DEFAULT_BASE_URL = "https://{host}.api.riotgames.com"
+
+riot_request_seconds = Histogram("lol_riot_request_seconds", "Riot API request time per attempt, body included", ("host", "endpoint"))
+riot_rate_limit_wait_seconds = Histogram("lol_riot_rate_limit_wait_seconds", "Time spent waiting on the local rate limiter before a Riot request", ("host",))
+riot_responses_total = Counter("lol_riot_responses_total", "Riot API responses by status code ('error' for transport failures)", ("host", "endpoint", "status"))
+riot_retries_total = Counter("lol_riot_retries_total", "Riot API requests retried, by reason (429, http_error)", ("host", "endpoint", "reason"))
+# Set from RateLimiter.stats() when /metrics is scraped; scope is "app" or the method
+riot_rate_limit_fill = Gauge("lol_riot_rate_limit_fill", "Used / limit of each local rate limiter window", ("host", "scope", "window"))
+
+# Stored in the identity caches for lookups Riot answered 404, so misspelled names aren't re-requested
+_NOT_FOUND = object()
+
 class RiotClient:
-    def __init__(self):
+    def __init__(self, match_store: Optional[MatchStore] = None, rate_limiter: Optional[RateLimiter] = None, base_url: Optional[str] = None):
         self.api_key = os.getenv("RIOT_API_KEY")
         if not self.api_key:
             raise ValueError("RIOT_API_KEY environment variable is not set")
         self.headers = {"X-Riot-Token": self.api_key}
         self.client = httpx.AsyncClient(headers=self.headers, timeout=10.0)
+        self.base_url = base_url or os.getenv("RIOT_API_BASE_URL", DEFAULT_BASE_URL)
+        self._base_prefix, self._base_suffix = self.base_url.split("{host}", 1)
+        # Finished matches are immutable, so details/timelines are served from the store when known
+        self.match_store = match_store
+        # Shared across every request so concurrent gathers schedule within Riot's quotas
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # Single-flight: concurrent callers for the same URL share one in-flight GET
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Identity lookups that start every analysis: a Riot ID's PUUID never changes and summoner
+        # data rarely does, so both are kept for a long time; 404s are kept briefly
+        self.account_cache = LRUCache(
+            maxsize=int(os.getenv("ACCOUNT_CACHE_SIZE", "4096")),
+            ttl=float(os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "604800"))
+        )
+        self.summoner_cache = LRUCache(
+            maxsize=int(os.getenv("SUMMONER_CACHE_SIZE", "4096")),
+            ttl=float(os.getenv("SUMMONER_CACHE_TTL_SECONDS", "3600"))
+        )
+        self.not_found_ttl = float(os.getenv("RIOT_NOT_FOUND_TTL_SECONDS", "300"))
 
     async def close(self):
         await self.client.aclose()
 
-    async def _request(self, url: str) -> Dict[str, Any]:
+    def _url(self, host: str, path: str) -> str:
+        return self.base_url.format(host=host) + path
+
+    def _routing_host(self, url: str) -> str:
+        """Inverse of _url: the routing host a request URL was built for."""
+        rest = url[len(self._base_prefix):]
+        return rest.split(self._base_suffix or "/", 1)[0]
+
+    async def _request(self, url: str, method: str = "default", stream_parser: Optional[Callable[[], Any]] = None) -> Any:
+        key = url if stream_parser is None else f"{url}#stream"
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, method, stream_parser))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller being cancelled doesn't cancel the fetch for everyone else
+        with profiler.awaiting("riot_await", method):
+            return await asyncio.shield(task)
+
+    async def _fetch(self, url: str, method: str, stream_parser: Optional[Callable[[], Any]] = None) -> Any:
+        # Rate limits are scoped per routing host (americas, na1, ...) and per endpoint
+        host = self._routing_host(url)
         retries = 3
         for attempt in range(retries):
             try:
-                response = await self.client.get(url)
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 429:
-                    # Rate limit handling
-                    retry_after = int(response.headers.get("Retry-After", 1))
-                    print(f"Rate limited. Waiting {retry_after}s...")
-                    await asyncio.sleep(retry_after)
-                    continue
-                elif response.status_code == 404:
-                    return None # Handle explicitly in caller
-                else:
-                    response.raise_for_status()
+                waited = time.perf_counter()
+                await self.rate_limiter.acquire(host, method)
+                start = time.perf_counter()
+                riot_rate_limit_wait_seconds.observe(start - waited, host=host)
+                request = self.client.build_request("GET", url)
+                response = await self.client.send(request, stream=stream_parser is not None)
+                riot_responses_total.inc(host=host, endpoint=method, status=str(response.status_code))
+                try:
+                    self.rate_limiter.update(host, method, response.headers)
+                    if response.status_code == 200:
+                        if stream_parser is None:
+                            return response.json()
+                        return await self._consume_stream(response, stream_parser())
+                    elif response.status_code == 429:
+                        # Rate limit handling: block the exceeded scope so other callers wait too
+                        retry_after = int(response.headers.get("Retry-After", 1))
+                        self.rate_limiter.penalize(host, method, retry_after, response.headers.get("X-Rate-Limit-Type"))
+                        print(f"Rate limited. Waiting {retry_after}s...")
+                        riot_retries_total.inc(host=host, endpoint=method, reason="429")
+                        continue
+                    elif response.status_code == 404:
+                        return None # Handle explicitly in caller
+                    else:
+                        response.raise_for_status()
+                finally:
+                    await response.aclose()
+                    riot_request_seconds.observe(time.perf_counter() - start, host=host, endpoint=method)
             except httpx.HTTPError as e:
                 print(f"HTTP Error on {url}: {e}")
+                if not isinstance(e, httpx.HTTPStatusError):
+                    riot_responses_total.inc(host=host, endpoint=method, status="error")
                 if attempt == retries - 1:
                     raise HTTPException(status_code=502, detail=f"Riot API Error: {str(e)}")
+                riot_retries_total.inc(host=host, endpoint=method, reason="http_error")
                 await asyncio.sleep(1)
         raise HTTPException(status_code=504, detail="Riot API Timeout")
 
+    async def _consume_stream(self, response: httpx.Response, parser: Any) -> Any:
+        # The parser returns True once it has everything it needs; the rest of the body is never read
+        async for chunk in response.aiter_bytes():
+            if parser.feed(chunk):
+                break
+        return parser.result()
+
     async def get_account(self, game_name: str, tag_line: str) -> Optional[AccountV1Response]:
         # Account-V1 uses 'americas', 'europe', 'asia' routing usually, but the prompt says region code.
         # Actually Account-V1 is often routed by the broad region (Americas, Europe, Asia).
@@ -54,22 +139,39 @@ class RiotClient:
         # We will assume 'americas' for now or make it configurable if needed, 
         # but usually you search on the platform nearest to you or global.
         # The prompt says: https://americas.api.riotgames.com/riot/account/v1/...
-        url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-        data = await self._request(url)
+        # Riot IDs are case-insensitive
+        cache_key = (game_name.lower(), tag_line.lower())
+        cached = self.account_cache.get(cache_key)
+        if cached is not None:
+            return None if cached is _NOT_FOUND else cached
+
+        url = self._url("americas", f"/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}")
+        data = await self._request(url, "account-v1.by-riot-id")
         if not data:
+            self.account_cache.set(cache_key, _NOT_FOUND, ttl=self.not_found_ttl)
             return None
-        return AccountV1Response(**data)
+        account = AccountV1Response(**data)
+        self.account_cache.set(cache_key, account)
+        return account
 
     async def get_summoner(self, region: str, puuid: str) -> Optional[SummonerV4Response]:
-        url = f"https://{region}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-        data = await self._request(url)
+        cache_key = (region, puuid)
+        cached = self.summoner_cache.get(cache_key)
+        if cached is not None:
+            return None if cached is _NOT_FOUND else cached
+
+        url = self._url(region, f"/lol/summoner/v4/summoners/by-puuid/{puuid}")
+        data = await self._request(url, "summoner-v4.by-puuid")
         if not data:
+            self.summoner_cache.set(cache_key, _NOT_FOUND, ttl=self.not_found_ttl)
             return None
-        return SummonerV4Response(**data)
+        summoner = SummonerV4Response(**data)
+        self.summoner_cache.set(cache_key, summoner)
+        return summoner
 
     async def get_league_entries(self, region: str, encrypted_summoner_id: str) -> List[LeagueEntry]:
-        url = f"https://{region}.api.riotgames.com/lol/league/v4/entries/by-summoner/{encrypted_summoner_id}"
-        data = await self._request(url)
+        url = self._url(region, f"/lol/league/v4/entries/by-summoner/{encrypted_summoner_id}")
+        data = await self._request(url, "league-v4.entries-by-summoner")
         if not data:
             return []
         return [LeagueEntry(**entry) for entry in data]
@@ -77,28 +179,62 @@ class RiotClient:
     async def get_match_ids(self, region: str, puuid: str, count: int = 15) -> List[str]:
         # Match-V5 uses platform routing (americas, europe, asia, sea)
         platform = get_platform_from_region(region)
-        url = f"https://{platform}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}"
-        data = await self._request(url)
+        url = self._url(platform, f"/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}")
+        data = await self._request(url, "match-v5.ids-by-puuid")
         return data if data else []
 
+    async def _get_cached_match(self, kind: str, url: str, match_id: str) -> Optional[Dict[str, Any]]:
+        method = "match-v5.match" if kind == "detail" else f"match-v5.{kind}"
+        if self.match_store:
+            cached = await self.match_store.aget(kind, match_id)
+            if cached is not None:
+                return cached
+
+        data = await self._request(url, method)
+        if data and self.match_store:
+            await self.match_store.aput(kind, match_id, data)
+        return data
+
     async def get_match_detail(self, region: str, match_id: str) -> Optional[Dict[str, Any]]:
         platform = get_platform_from_region(region)
-        url = f"https://{platform}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        return await self._request(url)
+        url = self._url(platform, f"/lol/match/v5/matches/{match_id}")
+        return await self._get_cached_match("detail", url, match_id)
     
     async def get_top_mastery(self, region: str, puuid: str) -> List[ChampionMastery]:
         # Use a count to limit data if needed, but endpoint returns all by default or top k?
         # Check docs: /lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top defaults to top 3?
         # Prompt says "top".
-        url = f"https://{region}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top"
-        data = await self._request(url)
+        url = self._url(region, f"/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top")
+        data = await self._request(url, "champion-mastery-v4.top-by-puuid")
         if not data:
             return []
         return [ChampionMastery(**m) for m in data]
 
     async def get_match_timeline(self, region: str, match_id: str) -> Optional[Dict[str, Any]]:
         platform = get_platform_from_region(region)
-        url = f"https://{platform}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline"
-        return await self._request(url)
+        url = self._url(platform, f"/lol/match/v5/matches/{match_id}/timeline")
+        return await self._get_cached_match("timeline", url, match_id)
 
+    async def get_timeline_summary(self, region: str, match_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Early-game summary (10-minute stats, early purchases, per-minute curves) for every
+        participant. The timeline is streamed and parsing stops after the 15-minute frame,
+        so the multi-MB body is never fully downloaded or decoded.
+        """
+        if self.match_store:
+            cached = await self.match_store.aget("timeline_summary", match_id)
+            if cached is not None:
+                return cached
+            # A full timeline stored earlier is enough to derive the summary without a request
+            timeline = await self.match_store.aget("timeline", match_id)
+            if timeline is not None:
+                summary = summarize_timeline(timeline)
+                await self.match_store.aput("timeline_summary", match_id, summary)
+                return summary
 
+        platform = get_platform_from_region(region)
+        url = self._url(platform, f"/lol/match/v5/matches/{match_id}/timeline")
+        summary = await self._request(url, "match-v5.timeline", stream_parser=TimelineStreamParser)
+        if summary and self.match_store:
+            await self.match_store.aput("timeline_summary", match_id, summary)
+        return summary
@@ -0,0 +1,192 @@
+import os
+import zlib
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Union
+from urllib.parse import urlparse
+from app.models import SessionData
+from app.utils.cache import LRUCache
+
+def serialize_session(session: SessionData) -> bytes:
+    """Compact wire format: JSON without nulls, zlib-compressed."""
+    return zlib.compress(session.model_dump_json(exclude_none=True).encode("utf-8"))
+
+def deserialize_session(blob: bytes) -> SessionData:
+    return SessionData.model_validate_json(zlib.decompress(blob))
+
+class SessionStore(ABC):
+    """Where SessionData lives between requests. Mutated sessions must be saved back."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[SessionData]:
+        ...
+
+    @abstractmethod
+    async def save(self, session: SessionData) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+class InMemorySessionStore(SessionStore):
+    """Single-process store: LRU-bounded and TTL-evicted. Sessions are kept as live objects."""
+
+    def __init__(self, max_sessions: int = 1000, ttl: Optional[float] = 3600):
+        self.cache = LRUCache(maxsize=max_sessions, ttl=ttl)
+
+    async def get(self, session_id: str) -> Optional[SessionData]:
+        return self.cache.get(session_id)
+
+    async def save(self, session: SessionData) -> None:
+        # Saving refreshes the TTL, so active sessions stay alive
+        self.cache.set(session.session_id, session)
+
+    async def delete(self, session_id: str) -> None:
+        self.cache.delete(session_id)
+
+    async def count(self) -> int:
+        self.cache.purge_expired()
+        return len(self.cache)
+
+class RedisProtocolError(Exception):
+    pass
+
+class RedisConnection:
+    """Minimal RESP2 client (one connection, one command at a time) for the commands the store needs."""
+
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._send("AUTH", self.password)
+        if self.db:
+            await self._send("SELECT", self.db)
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._reader = self._writer = None
+
+    @staticmethod
+    def _encode(*args: Union[str, bytes, int]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, int):
+                arg = str(arg)
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RedisProtocolError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"Unexpected reply: {line!r}")
+
+    async def _send(self, *args) -> Any:
+        self._writer.write(self._encode(*args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def execute(self, *args) -> Any:
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._send(*args)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # Reconnect once, e.g. after the server closed an idle connection
+                    await self.close()
+                    if attempt == 1:
+                        raise
+
+class RedisSessionStore(SessionStore):
+    """Shared store for multi-worker deployments; sessions expire via Redis TTLs."""
+
+    def __init__(self, url: str, ttl: Optional[int] = 3600, prefix: str = "lolcoach:session:"):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        self.redis = RedisConnection(parsed.hostname or "localhost", parsed.port or 6379, db=db, password=parsed.password)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    async def get(self, session_id: str) -> Optional[SessionData]:
+        blob = await self.redis.execute("GET", self._key(session_id))
+        if blob is None:
+            return None
+        return deserialize_session(blob)
+
+    async def save(self, session: SessionData) -> None:
+        blob = serialize_session(session)
+        if self.ttl:
+            await self.redis.execute("SET", self._key(session.session_id), blob, "EX", self.ttl)
+        else:
+            await self.redis.execute("SET", self._key(session.session_id), blob)
+
+    async def delete(self, session_id: str) -> None:
+        await self.redis.execute("DEL", self._key(session_id))
+
+    async def count(self) -> int:
+        total = 0
+        cursor = b"0"
+        while True:
+            cursor, keys = await self.redis.execute("SCAN", cursor, "MATCH", f"{self.prefix}*", "COUNT", 1000)
+            total += len(keys)
+            if cursor in (b"0", "0"):
+                return total
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+def create_session_store(url: Optional[str] = None) -> SessionStore:
+    """SESSION_STORE_URL=redis://host:port/db selects Redis; otherwise sessions stay in-process."""
+    url = url if url is not None else os.getenv("SESSION_STORE_URL", "")
+    ttl = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    if url.startswith("rediss://"):
+        raise ValueError("TLS Redis URLs are not supported")
+    if url.startswith("redis://"):
+        return RedisSessionStore(url, ttl=ttl)
+    return InMemorySessionStore(max_sessions=int(os.getenv("SESSION_MAX_COUNT", "1000")), ttl=ttl)
@@ -0,0 +1,146 @@
+import re
+import json
+import codecs
+from typing import Dict, Any, List, Optional, Iterable
+
+# Early-game window used for the deep analysis fields
+FRAME_AT_10 = 10
+EARLY_ITEM_CUTOFF_MS = 15 * 60 * 1000
+
+_FRAMES_KEY = re.compile(r'"frames"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+class FrameScanner:
+    """
+    Incremental scanner over a streamed Match-V5 timeline body.
+
+    Bytes are fed as they arrive; each complete element of info.frames is decoded
+    on its own and returned, so the caller can stop reading the response as soon
+    as it has the frames it needs. Nothing after the last consumed frame is ever
+    decoded or held in memory.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._in_frames = False
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        if self.finished:
+            return []
+        self._buffer += self._utf8.decode(chunk)
+        frames: List[Dict[str, Any]] = []
+
+        if not self._in_frames:
+            match = _FRAMES_KEY.search(self._buffer)
+            if not match:
+                # Keep a tail in case the key is split across chunks
+                self._buffer = self._buffer[-32:]
+                return frames
+            self._buffer = self._buffer[match.end():]
+            self._in_frames = True
+
+        pos = 0
+        length = len(self._buffer)
+        while True:
+            while pos < length and self._buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= length:
+                break
+            if self._buffer[pos] == "]":
+                self.finished = True
+                break
+            try:
+                frame, end = _decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                # Frame not fully received yet
+                break
+            frames.append(frame)
+            pos = end
+
+        self._buffer = self._buffer[pos:]
+        return frames
+
+class EarlyGameExtractor:
+    """
+    Collects the early-game fields for every participant from timeline frames:
+    per-minute gold/cs/xp curves, the 10-minute values and items bought before 15 minutes.
+    """
+
+    def __init__(self):
+        self.participants: Dict[str, Dict[str, Any]] = {}
+        self.frames_seen = 0
+        self.done = False
+
+    def _participant(self, participant_id: str) -> Dict[str, Any]:
+        if participant_id not in self.participants:
+            self.participants[participant_id] = {
+                "gold_at_10": 0,
+                "cs_at_10": 0,
+                "xp_at_10": 0,
+                "early_items": [],
+                "gold": [],
+                "cs": [],
+                "xp": [],
+            }
+        return self.participants[participant_id]
+
+    def add_frame(self, frame: Dict[str, Any]) -> bool:
+        """Consumes one frame; returns True once no later frame can change the result."""
+        index = self.frames_seen
+        self.frames_seen += 1
+
+        for participant_id, p_stats in frame.get("participantFrames", {}).items():
+            entry = self._participant(str(participant_id))
+            gold = p_stats.get("totalGold", 0)
+            cs = p_stats.get("minionsKilled", 0) + p_stats.get("jungleMinionsKilled", 0)
+            xp = p_stats.get("xp", 0)
+            entry["gold"].append(gold)
+            entry["cs"].append(cs)
+            entry["xp"].append(xp)
+            if index == FRAME_AT_10:
+                entry["gold_at_10"] = gold
+                entry["cs_at_10"] = cs
+                entry["xp_at_10"] = xp
+
+        for event in frame.get("events", []):
+            if event.get("type") == "ITEM_PURCHASED" and event.get("timestamp", 0) < EARLY_ITEM_CUTOFF_MS:
+                self._participant(str(event.get("participantId")))["early_items"].append(event.get("itemId"))
+
+        # Events in a frame precede its timestamp, so once a frame reaches the cutoff we are done
+        if index >= FRAME_AT_10 and frame.get("timestamp", 0) >= EARLY_ITEM_CUTOFF_MS:
+            self.done = True
+        return self.done
+
+    def result(self) -> Dict[str, Any]:
+        return {"frames_parsed": self.frames_seen, "participants": self.participants}
+
+class TimelineStreamParser:
+    """Feeds a streamed timeline body into an EarlyGameExtractor, stopping at the 15-minute frame."""
+
+    def __init__(self):
+        self.scanner = FrameScanner()
+        self.extractor = EarlyGameExtractor()
+
+    def feed(self, chunk: bytes) -> bool:
+        for frame in self.scanner.feed(chunk):
+            if self.extractor.add_frame(frame):
+                return True
+        return self.scanner.finished
+
+    def result(self) -> Dict[str, Any]:
+        return self.extractor.result()
+
+def summarize_frames(frames: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Same extraction as the streaming path, for an already-decoded frames list."""
+    extractor = EarlyGameExtractor()
+    for frame in frames:
+        if extractor.add_frame(frame):
+            break
+    return extractor.result()
+
+def summarize_timeline(timeline: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not timeline:
+        return None
+    return summarize_frames(timeline.get("info", {}).get("frames", []))
@@ -0,0 +1,28 @@
+import threading
+from typing import Any, Callable
+
+class lazy_property:
+    """
+    functools.cached_property with a lock: the value is built on first access, once, even when the
+    event loop and executor threads race for it. Assigning the attribute replaces the built value.
+    """
+
+    def __init__(self, build: Callable[[Any], Any]):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        with self._lock:
+            if self.name not in obj.__dict__:
+                obj.__dict__[self.name] = self.build(obj)
+        return obj.__dict__[self.name]
+
+    def built(self, obj) -> bool:
+        return self.name in obj.__dict__
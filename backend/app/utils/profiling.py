@@ -0,0 +1,252 @@
+"""
+Opt-in profiler for individual requests, exported as collapsed stacks ("frame;frame;frame weight",
+weights in microseconds) that flamegraph.pl, speedscope and similar tools read directly.
+
+A profile is active for whatever runs inside profiler.activate(profile), tasks spawned from it
+included (it rides a ContextVar). Three kinds of time are recorded, each under its own root frame:
+  awaiting(...)        wall time a coroutine spends awaiting, e.g. riot_await in RiotClient._request;
+                       the stack is taken once, when the await starts
+  thread_section(...)  sync code on the current thread (e.g. match_processing_cpu on the event loop),
+                       sampled every PROFILE_INTERVAL_MS by a background thread, plus exact CPU time
+  enter_thread(...)    the same for threads entered from callbacks (bedrock_thread, via botocore hooks)
+Nothing is sampled and nothing is recorded while no profile is active.
+"""
+import os
+import sys
+import hmac
+import time
+import uuid
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+_current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+# Frames from these files are plumbing, not part of anyone's call path
+_SKIPPED_FILES = (__file__, "contextlib.py", os.sep + "asyncio" + os.sep, os.sep + "threading.py", os.sep + "concurrent" + os.sep)
+MAX_STACK_DEPTH = 128
+
+def collapse(frame) -> str:
+    """Root-first 'file.py:qualname' frames joined with ';'."""
+    names: List[str] = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        if not any(part in code.co_filename for part in _SKIPPED_FILES):
+            name = getattr(code, "co_qualname", code.co_name)
+            names.append(f"{os.path.basename(code.co_filename)}:{name}".replace(";", ","))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class Profile:
+    def __init__(self, label: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Collapsed stack -> microseconds
+        self.stacks: Dict[str, int] = defaultdict(int)
+        # Category -> {"wall_s", "cpu_s", "count"}, measured exactly rather than sampled
+        self.totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"wall_s": 0.0, "cpu_s": 0.0, "count": 0})
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def add(self, stack: str, micros: int) -> None:
+        if self.finished or micros <= 0:
+            return
+        with self._lock:
+            self.stacks[stack] += micros
+
+    def add_total(self, category: str, wall: float, cpu: float = 0.0) -> None:
+        if self.finished:
+            return
+        with self._lock:
+            total = self.totals[category]
+            total["wall_s"] += wall
+            total["cpu_s"] += cpu
+            total["count"] += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self.stacks.items())
+        return "".join(f"{stack} {weight}\n" for stack, weight in items)
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        with self._lock:
+            totals = {k: {"wall_s": round(v["wall_s"], 6), "cpu_s": round(v["cpu_s"], 6), "count": int(v["count"])} for k, v in self.totals.items()}
+            stacks = len(self.stacks)
+        return {
+            "id": self.id,
+            "label": self.label,
+            "started_at": self.started_at,
+            "duration_s": round(end - self.started_at, 6),
+            "finished": self.finished,
+            "totals": totals,
+            "stacks": stacks,
+        }
+
+class _ThreadEntry:
+    __slots__ = ("profile", "category", "wall", "cpu", "previous")
+
+    def __init__(self, profile: Profile, category: str, previous: Optional["_ThreadEntry"]):
+        self.profile = profile
+        self.category = category
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        self.previous = previous
+
+class SamplingProfiler:
+    """
+    Keeps the last PROFILE_MAX_STORED profiles. Requests are selected by an admin: either the
+    request itself carries X-Profile: 1 with the admin token, or the next N requests to an endpoint
+    are armed in advance (see /api/admin/profiles in app.main). ADMIN_TOKEN unset disables both.
+    """
+
+    def __init__(self, interval_ms: Optional[float] = None, max_stored: Optional[int] = None, admin_token: Optional[str] = None):
+        self.interval = (interval_ms or float(os.getenv("PROFILE_INTERVAL_MS", "5"))) / 1000
+        self.max_stored = max_stored or int(os.getenv("PROFILE_MAX_STORED", "20"))
+        self.admin_token = admin_token if admin_token is not None else os.getenv("ADMIN_TOKEN", "")
+        self.profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._armed: Dict[str, int] = {}
+        # Thread ident -> innermost section being sampled on it
+        self._threads: Dict[int, _ThreadEntry] = {}
+        self._active = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # --- Selection ---
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return self.enabled and token is not None and hmac.compare_digest(token.encode(), self.admin_token.encode())
+
+    def arm(self, endpoint: str, count: int = 1) -> Dict[str, int]:
+        with self._lock:
+            self._armed[endpoint] = self._armed.get(endpoint, 0) + count
+            return dict(self._armed)
+
+    def select(self, endpoint: str, requested: bool = False) -> Optional[Profile]:
+        """A new profile if this request asked for one or its endpoint is armed, else None."""
+        with self._lock:
+            if not requested and self._armed.get(endpoint, 0) <= 0:
+                return None
+            if not requested:
+                self._armed[endpoint] -= 1
+        return self.start(endpoint)
+
+    # --- Lifecycle ---
+    def start(self, label: str) -> Profile:
+        profile = Profile(label)
+        with self._lock:
+            self.profiles[profile.id] = profile
+            while len(self.profiles) > self.max_stored:
+                self.profiles.popitem(last=False)
+            self._active += 1
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run_sampler, name="request-profiler", daemon=True)
+                self._sampler.start()
+        return profile
+
+    def finish(self, profile: Profile) -> None:
+        if profile.finished:
+            return
+        profile.finished_at = time.time()
+        with self._lock:
+            self._active -= 1
+
+    @contextmanager
+    def activate(self, profile: Optional[Profile]):
+        """Profiles everything run inside (spawned tasks included) and finishes the profile on exit."""
+        if profile is None:
+            yield None
+            return
+        token = _current_profile.set(profile)
+        try:
+            yield profile
+        finally:
+            _current_profile.reset(token)
+            self.finish(profile)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self.profiles.get(profile_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self.profiles.values())
+        return [p.summary() for p in reversed(profiles)]
+
+    # --- Recording ---
+    @contextmanager
+    def awaiting(self, category: str, leaf: Optional[str] = None):
+        """Wall time of the awaits inside, charged to the caller's stack."""
+        profile = _current_profile.get()
+        if profile is None:
+            yield
+            return
+        stack = f"{category};{collapse(sys._getframe(1))}"
+        if leaf:
+            stack += f";[{leaf}]"
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            profile.add(stack, int(elapsed * 1e6))
+            profile.add_total(category, elapsed)
+
+    def enter_thread(self, category: str) -> Optional[_ThreadEntry]:
+        """Starts sampling the current thread for the active profile; pair with exit_thread."""
+        profile = _current_profile.get()
+        if profile is None or profile.finished:
+            return None
+        ident = threading.get_ident()
+        with self._lock:
+            entry = _ThreadEntry(profile, category, self._threads.get(ident))
+            self._threads[ident] = entry
+        return entry
+
+    def exit_thread(self, entry: Optional[_ThreadEntry]) -> None:
+        if entry is None:
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            if entry.previous is not None:
+                self._threads[ident] = entry.previous
+            else:
+                self._threads.pop(ident, None)
+        entry.profile.add_total(entry.category, time.perf_counter() - entry.wall, time.thread_time() - entry.cpu)
+
+    @contextmanager
+    def thread_section(self, category: str):
+        entry = self.enter_thread(category)
+        try:
+            yield
+        finally:
+            self.exit_thread(entry)
+
+    def _run_sampler(self):
+        micros = int(self.interval * 1e6)
+        while True:
+            with self._lock:
+                if self._active <= 0 and not self._threads:
+                    self._sampler = None
+                    return
+                targets: List[Tuple[int, _ThreadEntry]] = list(self._threads.items())
+            if targets:
+                frames = sys._current_frames()
+                for ident, entry in targets:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        entry.profile.add(f"{entry.category};{collapse(frame)}", micros)
+            time.sleep(self.interval)
+
+# Process-wide profiler used by the request handlers
+profiler = SamplingProfiler()
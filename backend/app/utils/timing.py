@@ -0,0 +1,100 @@
+import math
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Sequence
+from app.utils.metrics import Histogram
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of unsorted values; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100.0 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def summarize(values: Sequence[float]) -> Dict[str, Any]:
+    """count / mean / p50 / p95 / p99 / max, in milliseconds."""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+class StageTimings:
+    """Recent durations (seconds) per pipeline stage: riot_fetch, match_processing, rating, agent."""
+
+    def __init__(self, max_samples: int = 10000, histogram: Optional[Histogram] = None):
+        self.max_samples = max_samples
+        # Every sample is also observed here (label: stage), for /metrics
+        self.histogram = histogram
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.max_samples)
+            self._samples[stage].append(seconds)
+        if self.histogram:
+            self.histogram.observe(seconds, stage=stage)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def clock(self) -> "StageClock":
+        return StageClock(self)
+
+    def samples(self, stage: str) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(stage, ()))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stages = {stage: list(values) for stage, values in self._samples.items()}
+        return {stage: summarize(values) for stage, values in stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+class StageClock:
+    """Sums time per stage over one unit of work (e.g. one snapshot); flush() records one sample per stage."""
+
+    def __init__(self, timings: Optional[StageTimings]):
+        self.timings = timings
+        self.totals: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[stage] += time.perf_counter() - start
+
+    def flush(self) -> None:
+        if self.timings:
+            for stage, total in self.totals.items():
+                self.timings.record(stage, total)
+        self.totals.clear()
+
+stage_seconds = Histogram(
+    "lol_stage_seconds",
+    "Time per analysis stage: riot_fetch and match_processing within build_snapshot, build_snapshot, rating, agent",
+    ("stage",)
+)
+
+# Process-wide stage timings, read by the benchmarks and exported as lol_stage_seconds
+stage_timings = StageTimings(histogram=stage_seconds)
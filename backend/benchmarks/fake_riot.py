@@ -0,0 +1,360 @@
+"""
+Local stand-in for the Riot API, replaying recorded (or synthetic) payloads.
+
+    python -m benchmarks.fake_riot serve [--fixtures DIR | --players 50] [--port 8100]
+                                         [--latency-ms 40] [--jitter-ms 20] [--error-rate 0.02]
+                                         [--retry-after 1] [--enforce-limits]
+    python -m benchmarks.fake_riot record "Name#TAG" --region na1 --matches 20 --out DIR   (needs RIOT_API_KEY)
+
+Point the backend at it with RIOT_API_BASE_URL=http://127.0.0.1:8100/{host}; the routing host
+(na1, americas, ...) becomes the first path segment. Every response carries X-App-Rate-Limit /
+X-Method-Rate-Limit headers with live counts; --error-rate injects 429s and --enforce-limits
+answers 429 once a limit is actually exceeded, as Riot does.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import FastAPI
+from fastapi.responses import Response
+from app.services.rate_limiter import parse_rate_limits, RateBucket
+from app.utils.constants import CHAMPION_ID_MAP
+
+FRAME_INTERVAL_MS = 60000
+
+class RiotFixtures:
+    """
+    Payloads by endpoint. On disk: accounts.json, summoners.json (lists), league.json,
+    mastery.json, match_ids.json (objects keyed by summoner ID / PUUID), matches/<id>.json
+    and timelines/<id>.json. Match and timeline bodies are kept pre-encoded.
+    """
+
+    def __init__(self):
+        self.accounts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.summoners: Dict[str, Dict[str, Any]] = {}
+        self.league: Dict[str, List[Dict[str, Any]]] = {}
+        self.mastery: Dict[str, List[Dict[str, Any]]] = {}
+        self.match_ids: Dict[str, List[str]] = {}
+        self.matches: Dict[str, bytes] = {}
+        self.timelines: Dict[str, bytes] = {}
+
+    def add_account(self, account: Dict[str, Any]) -> None:
+        self.accounts[(account["gameName"].lower(), account["tagLine"].lower())] = account
+
+    def riot_ids(self) -> List[Tuple[str, str]]:
+        return [(a["gameName"], a["tagLine"]) for a in self.accounts.values()]
+
+    @classmethod
+    def load(cls, directory: str) -> "RiotFixtures":
+        fixtures = cls()
+
+        def read(name: str, default: Any) -> Any:
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                return default
+            with open(path) as f:
+                return json.load(f)
+
+        for account in read("accounts.json", []):
+            fixtures.add_account(account)
+        fixtures.summoners = {s["puuid"]: s for s in read("summoners.json", [])}
+        fixtures.league = read("league.json", {})
+        fixtures.mastery = read("mastery.json", {})
+        fixtures.match_ids = read("match_ids.json", {})
+        for kind, target in (("matches", fixtures.matches), ("timelines", fixtures.timelines)):
+            folder = os.path.join(directory, kind)
+            if os.path.isdir(folder):
+                for name in os.listdir(folder):
+                    if name.endswith(".json"):
+                        with open(os.path.join(folder, name), "rb") as f:
+                            target[name[:-5]] = f.read()
+        return fixtures
+
+    def save(self, directory: str) -> None:
+        for kind, source in (("matches", self.matches), ("timelines", self.timelines)):
+            os.makedirs(os.path.join(directory, kind), exist_ok=True)
+            for match_id, body in source.items():
+                with open(os.path.join(directory, kind, f"{match_id}.json"), "wb") as f:
+                    f.write(body)
+        for name, data in (
+            ("accounts.json", list(self.accounts.values())),
+            ("summoners.json", list(self.summoners.values())),
+            ("league.json", self.league),
+            ("mastery.json", self.mastery),
+            ("match_ids.json", self.match_ids),
+        ):
+            with open(os.path.join(directory, name), "w") as f:
+                json.dump(data, f)
+
+    @classmethod
+    def synthetic(cls, players: int = 20, matches_per_player: int = 20, seed: int = 0) -> "RiotFixtures":
+        """
+        Deterministic fake players whose matches overlap (ten players share each lobby), so
+        benchmarks exercise the match cache and request coalescing like real traffic does.
+        """
+        rng = random.Random(seed)
+        fixtures = cls()
+        champions = list(CHAMPION_ID_MAP.items())
+        tiers = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND"]
+        puuids = [f"bench-puuid-{i}" for i in range(players)]
+        for i, puuid in enumerate(puuids):
+            fixtures.add_account({"puuid": puuid, "gameName": f"Bench{i}", "tagLine": "BENCH"})
+            fixtures.summoners[puuid] = {"id": f"bench-summoner-{i}", "accountId": f"bench-account-{i}", "puuid": puuid, "summonerLevel": rng.randint(30, 500)}
+            fixtures.league[f"bench-summoner-{i}"] = [{
+                "queueType": "RANKED_SOLO_5x5", "tier": rng.choice(tiers), "rank": rng.choice(["I", "II", "III", "IV"]),
+                "leaguePoints": rng.randint(0, 99), "wins": rng.randint(10, 200), "losses": rng.randint(10, 200),
+            }]
+            fixtures.mastery[puuid] = [
+                {"championId": cid, "championLevel": rng.randint(1, 7), "championPoints": rng.randint(1000, 300000)}
+                for cid, _ in rng.sample(champions, 5)
+            ]
+            fixtures.match_ids[puuid] = []
+
+        lobbies = max(players * matches_per_player // 10, 1)
+        for m in range(lobbies):
+            match_id = f"BENCH_{m}"
+            # Least-played players first, so everyone ends up with ~matches_per_player games
+            lobby = sorted(puuids, key=lambda p: (len(fixtures.match_ids[p]), rng.random()))[:10]
+            while len(lobby) < 10:
+                lobby.append(f"filler-{m}-{len(lobby)}")
+            fixtures.matches[match_id] = json.dumps(cls._synthetic_match(match_id, lobby, champions, rng)).encode("utf-8")
+            fixtures.timelines[match_id] = json.dumps(cls._synthetic_timeline(match_id, rng)).encode("utf-8")
+            for puuid in lobby:
+                if puuid in fixtures.match_ids:
+                    fixtures.match_ids[puuid].insert(0, match_id)
+        return fixtures
+
+    @staticmethod
+    def _synthetic_match(match_id: str, lobby: List[str], champions: List[Tuple[int, str]], rng: random.Random) -> Dict[str, Any]:
+        positions = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+        duration = rng.randint(1300, 2300)
+        blue_wins = rng.random() < 0.5
+        participants = []
+        for slot, puuid in enumerate(lobby):
+            champion_id, champion = champions[rng.randrange(len(champions))]
+            participants.append({
+                "puuid": puuid, "participantId": slot + 1, "teamId": 100 if slot < 5 else 200,
+                "teamPosition": positions[slot % 5], "championId": champion_id, "championName": champion,
+                "kills": rng.randint(0, 15), "deaths": rng.randint(0, 12), "assists": rng.randint(0, 20),
+                "totalMinionsKilled": rng.randint(20, 300), "neutralMinionsKilled": rng.randint(0, 40),
+                "totalDamageDealtToChampions": rng.randint(4000, 45000), "goldEarned": rng.randint(6000, 18000),
+                "win": (slot < 5) == blue_wins,
+                **{f"item{i}": rng.choice([0, 1001, 3006, 3031, 3089, 3157, 6672]) for i in range(7)},
+            })
+        return {"metadata": {"matchId": match_id, "participants": lobby}, "info": {"gameDuration": duration, "queueId": 420, "participants": participants}}
+
+    @staticmethod
+    def _synthetic_timeline(match_id: str, rng: random.Random) -> Dict[str, Any]:
+        frames = []
+        for minute in range(30):
+            frames.append({
+                "timestamp": minute * FRAME_INTERVAL_MS,
+                "participantFrames": {
+                    str(p): {
+                        "participantId": p, "totalGold": 500 + minute * rng.randint(250, 450), "currentGold": rng.randint(0, 1500),
+                        "minionsKilled": minute * rng.randint(4, 9), "jungleMinionsKilled": minute * rng.randint(0, 5),
+                        "xp": minute * rng.randint(300, 500), "level": min(18, 1 + minute // 2),
+                        "position": {"x": rng.randint(0, 15000), "y": rng.randint(0, 15000)},
+                    } for p in range(1, 11)
+                },
+                "events": [
+                    {"type": "ITEM_PURCHASED", "timestamp": minute * FRAME_INTERVAL_MS - rng.randint(1, 59999), "participantId": rng.randint(1, 10), "itemId": rng.choice([1055, 1056, 2003, 3340, 1001])}
+                    for _ in range(rng.randint(0, 6))
+                ] if minute else [],
+            })
+        return {"metadata": {"matchId": match_id}, "info": {"frameInterval": FRAME_INTERVAL_MS, "frames": frames}}
+
+class FakeRiotConfig:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        app_limits: str = "20:1,100:120",
+        method_limits: str = "2000:10",
+        enforce_limits: bool = False,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.app_limits = app_limits
+        self.method_limits = method_limits
+        self.enforce_limits = enforce_limits
+        self.rng = random.Random(seed)
+
+def create_app(fixtures: RiotFixtures, config: Optional[FakeRiotConfig] = None) -> FastAPI:
+    config = config or FakeRiotConfig()
+    app = FastAPI(title="Fake Riot API")
+    # Live counters per (host) and (host, method), reported back in the rate-limit headers
+    app_buckets: Dict[str, RateBucket] = {}
+    method_buckets: Dict[Tuple[str, str], RateBucket] = {}
+    app.state.requests = Counter()
+    app.state.throttled = Counter()
+
+    def _limit_headers(host: str, method: str) -> Tuple[Dict[str, str], Optional[str]]:
+        """Records the request and returns (headers, exceeded scope or None)."""
+        now = time.monotonic()
+        app_bucket = app_buckets.setdefault(host, RateBucket(parse_rate_limits(config.app_limits)))
+        method_bucket = method_buckets.setdefault((host, method), RateBucket(parse_rate_limits(config.method_limits)))
+        exceeded = None
+        if app_bucket.wait_time(now) > 0:
+            exceeded = "application"
+        elif method_bucket.wait_time(now) > 0:
+            exceeded = "method"
+        for bucket in (app_bucket, method_bucket):
+            for window in bucket.windows:
+                window.record(now)
+
+        def counts(bucket: RateBucket) -> str:
+            return ",".join(f"{w.stats(now)['used']}:{w.window}" for w in bucket.windows)
+
+        headers = {
+            "X-App-Rate-Limit": config.app_limits,
+            "X-App-Rate-Limit-Count": counts(app_bucket),
+            "X-Method-Rate-Limit": config.method_limits,
+            "X-Method-Rate-Limit-Count": counts(method_bucket),
+        }
+        return headers, exceeded
+
+    async def reply(host: str, method: str, body: Optional[bytes]) -> Response:
+        app.state.requests[method] += 1
+        delay = config.latency_ms + config.rng.uniform(0, config.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        headers, exceeded = _limit_headers(host, method)
+        throttle = exceeded if config.enforce_limits else None
+        if not throttle and config.error_rate and config.rng.random() < config.error_rate:
+            throttle = config.rng.choice(["application", "method", "service"])
+        if throttle:
+            app.state.throttled[method] += 1
+            headers["Retry-After"] = str(config.retry_after)
+            headers["X-Rate-Limit-Type"] = throttle
+            return Response(status_code=429, headers=headers, content=b'{"status":{"message":"Rate limit exceeded","status_code":429}}', media_type="application/json")
+        if body is None:
+            return Response(status_code=404, headers=headers, content=b'{"status":{"message":"Data not found","status_code":404}}', media_type="application/json")
+        return Response(status_code=200, headers=headers, content=body, media_type="application/json")
+
+    def encode(data: Any) -> Optional[bytes]:
+        return None if data is None else json.dumps(data).encode("utf-8")
+
+    @app.get("/{host}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}")
+    async def account(host: str, game_name: str, tag_line: str):
+        data = fixtures.accounts.get((game_name.lower(), tag_line.lower()))
+        return await reply(host, "account-v1.by-riot-id", encode(data))
+
+    @app.get("/{host}/lol/summoner/v4/summoners/by-puuid/{puuid}")
+    async def summoner(host: str, puuid: str):
+        return await reply(host, "summoner-v4.by-puuid", encode(fixtures.summoners.get(puuid)))
+
+    @app.get("/{host}/lol/league/v4/entries/by-summoner/{summoner_id}")
+    async def league(host: str, summoner_id: str):
+        return await reply(host, "league-v4.entries-by-summoner", encode(fixtures.league.get(summoner_id, [])))
+
+    @app.get("/{host}/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top")
+    async def mastery(host: str, puuid: str):
+        return await reply(host, "champion-mastery-v4.top-by-puuid", encode(fixtures.mastery.get(puuid, [])))
+
+    @app.get("/{host}/lol/match/v5/matches/by-puuid/{puuid}/ids")
+    async def match_ids(host: str, puuid: str, start: int = 0, count: int = 20):
+        ids = fixtures.match_ids.get(puuid)
+        return await reply(host, "match-v5.ids-by-puuid", encode(None if ids is None else ids[start:start + count]))
+
+    @app.get("/{host}/lol/match/v5/matches/{match_id}")
+    async def match(host: str, match_id: str):
+        return await reply(host, "match-v5.match", fixtures.matches.get(match_id))
+
+    @app.get("/{host}/lol/match/v5/matches/{match_id}/timeline")
+    async def timeline(host: str, match_id: str):
+        return await reply(host, "match-v5.timeline", fixtures.timelines.get(match_id))
+
+    @app.get("/_stats")
+    async def stats():
+        return {"requests": dict(app.state.requests), "throttled": dict(app.state.throttled)}
+
+    return app
+
+async def record(riot_id: str, region: str, matches: int, out: str) -> None:
+    """Captures one player's real payloads (account, summoner, league, mastery, matches, timelines) as fixtures."""
+    from app.services.riot_client import RiotClient
+    from app.utils.constants import get_platform_from_region
+
+    game_name, tag_line = riot_id.split("#", 1)
+    client = RiotClient()
+    fixtures = RiotFixtures.load(out) if os.path.isdir(out) else RiotFixtures()
+    platform = get_platform_from_region(region)
+    try:
+        account = await client._request(client._url("americas", f"/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"), "account-v1.by-riot-id")
+        if not account:
+            raise SystemExit(f"Account {riot_id} not found")
+        fixtures.add_account(account)
+        puuid = account["puuid"]
+        summoner = await client._request(client._url(region, f"/lol/summoner/v4/summoners/by-puuid/{puuid}"), "summoner-v4.by-puuid")
+        fixtures.summoners[puuid] = summoner
+        if summoner.get("id"):
+            fixtures.league[summoner["id"]] = await client._request(client._url(region, f"/lol/league/v4/entries/by-summoner/{summoner['id']}"), "league-v4.entries-by-summoner") or []
+        fixtures.mastery[puuid] = await client._request(client._url(region, f"/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top"), "champion-mastery-v4.top-by-puuid") or []
+        ids = await client._request(client._url(platform, f"/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={matches}"), "match-v5.ids-by-puuid") or []
+        fixtures.match_ids[puuid] = ids
+        for match_id in ids:
+            for target, suffix, method in ((fixtures.matches, "", "match-v5.match"), (fixtures.timelines, "/timeline", "match-v5.timeline")):
+                data = await client._request(client._url(platform, f"/lol/match/v5/matches/{match_id}{suffix}"), method)
+                if data:
+                    target[match_id] = json.dumps(data).encode("utf-8")
+    finally:
+        await client.close()
+    fixtures.save(out)
+    print(f"Recorded {riot_id}: {len(ids)} matches -> {out}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Riot API for load testing.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve")
+    serve.add_argument("--fixtures", help="Directory of recorded fixtures (default: synthetic players)")
+    serve.add_argument("--players", type=int, default=50)
+    serve.add_argument("--matches-per-player", type=int, default=20)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8100)
+    serve.add_argument("--latency-ms", type=float, default=40.0)
+    serve.add_argument("--jitter-ms", type=float, default=20.0)
+    serve.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 429")
+    serve.add_argument("--retry-after", type=int, default=1)
+    serve.add_argument("--app-limits", default="20:1,100:120")
+    serve.add_argument("--method-limits", default="2000:10")
+    serve.add_argument("--enforce-limits", action="store_true")
+
+    rec = commands.add_parser("record")
+    rec.add_argument("riot_id", help="GameName#TAG")
+    rec.add_argument("--region", default="na1")
+    rec.add_argument("--matches", type=int, default=20)
+    rec.add_argument("--out", required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        asyncio.run(record(args.riot_id, args.region, args.matches, args.out))
+        return
+
+    import uvicorn
+    fixtures = RiotFixtures.load(args.fixtures) if args.fixtures else RiotFixtures.synthetic(args.players, args.matches_per_player)
+    config = FakeRiotConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        app_limits=args.app_limits,
+        method_limits=args.method_limits,
+        enforce_limits=args.enforce_limits
+    )
+    print(f"Serving {len(fixtures.accounts)} players / {len(fixtures.matches)} matches; RIOT_API_BASE_URL=http://{args.host}:{args.port}/{{host}}")
+    uvicorn.run(create_app(fixtures, config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
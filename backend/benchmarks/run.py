@@ -0,0 +1,249 @@
+"""
+End-to-end load benchmark for /api/analyze, /api/insights and /api/chat.
+
+    python -m benchmarks.run [--concurrency 8] [--sessions 40] [--chats 2] [--match-count 5]
+                             [--riot-latency-ms 40] [--rating-latency-ms 1500] [--agent-latency-ms 2500]
+                             [--riot-url http://127.0.0.1:8100/{host} --fixtures DIR] [--out report.json]
+
+The app runs in-process. Riot is the fake server from benchmarks.fake_riot (in-process unless
+--riot-url points at a running one) and Bedrock is a stub that sleeps for the configured latency,
+so the numbers cover our own code paths plus realistic waits. Each virtual user analyzes a player
+(wait=False), polls /api/insights until the session completes, then sends --chats messages.
+
+The JSON report has per-endpoint latency percentiles, per-stage percentiles (riot_fetch,
+match_processing, rating, agent; see app.utils.timing) and throughput. The app logs to stdout,
+so use --out for a clean report file.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+import httpx
+
+os.environ.setdefault("RIOT_API_KEY", "benchmark")
+os.environ.setdefault("MATCH_STORE_PATH", ":memory:")
+os.environ.setdefault("LLM_CACHE_PATH", ":memory:")
+
+from app import main as app_main
+from app.models import PlayerSnapshot
+from app.services.analyzer import AnalyzerService
+from app.services.chat_memory import ConversationMemory
+from app.services.job_queue import StageLimits
+from app.services.match_store import MatchStore
+from app.services.pipeline import AnalysisPipeline
+from app.services.rate_limiter import RateLimiter
+from app.services.riot_client import RiotClient
+from app.utils.timing import stage_timings, summarize
+from benchmarks.fake_riot import RiotFixtures, FakeRiotConfig, create_app
+
+FAKE_RIOT_URL = "http://fake-riot/{host}"
+# Riot limits are not what this measures; the in-process fake advertises a production-sized budget
+BENCH_APP_LIMITS = "100000:1"
+
+class StubBedrock:
+    """Stands in for BedrockClient: fixed answers after a sleep of latency +/- jitter."""
+
+    def __init__(self, rating_latency_ms: float = 1500.0, agent_latency_ms: float = 2500.0, jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.rating_latency = rating_latency_ms / 1000
+        self.agent_latency = agent_latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rng = random.Random(seed)
+        self.memory = ConversationMemory()
+
+    async def _wait(self, seconds: float):
+        await asyncio.sleep(max(seconds + self.rng.uniform(-self.jitter, self.jitter), 0))
+
+    async def agenerate_rating(self, snapshot: PlayerSnapshot) -> Dict[str, Any]:
+        await self._wait(self.rating_latency)
+        return {"rating": 62, "percentile": 55.0, "summary": "Solid laning, vision falls off mid game."}
+
+    async def agenerate_summary(self, snapshot: PlayerSnapshot, rating: Dict[str, Any]) -> Optional[str]:
+        await self._wait(self.rating_latency)
+        return "Solid laning, vision falls off mid game."
+
+    async def ainvoke_agent(self, message: str, snapshot: PlayerSnapshot, chat_history: List[Dict] = [], chat_summary: str = "") -> str:
+        await self._wait(self.agent_latency)
+        return "Buy a control ward every back and track the enemy jungler before pushing."
+
+    async def close(self):
+        pass
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+@asynccontextmanager
+async def patched_app(riot: RiotClient, bedrock: StubBedrock, match_store: MatchStore):
+    """Points app.main's services at the stubs for the duration of a run, then restores them."""
+    names = ("riot_client", "bedrock_client", "analyzer", "pipeline", "match_store")
+    saved = {name: getattr(app_main, name) for name in names}
+    analyzer = AnalyzerService(riot, match_store=match_store)
+    app_main.riot_client = riot
+    app_main.bedrock_client = bedrock
+    app_main.analyzer = analyzer
+    app_main.pipeline = AnalysisPipeline(analyzer, bedrock, StageLimits(), percentiles=saved["pipeline"].percentiles)
+    app_main.match_store = match_store
+    await app_main.job_queue.start()
+    try:
+        yield
+    finally:
+        await app_main.job_queue.stop()
+        for name, value in saved.items():
+            setattr(app_main, name, value)
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, players: List, queue: asyncio.Queue, args) -> None:
+    while True:
+        try:
+            index = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        game_name, tag_line = players[index % len(players)]
+        start = time.perf_counter()
+        response = await recorder.call(client, "analyze", "POST", "/api/analyze", json={
+            "gameName": game_name, "tagLine": tag_line, "region": "na1", "match_count": args.match_count
+        })
+        if response is None or response.status_code != 200:
+            continue
+        session_id = response.json()["session_id"]
+
+        status = "pending"
+        while status in ("pending", "running"):
+            await asyncio.sleep(args.poll_ms / 1000)
+            response = await recorder.call(client, "insights", "GET", f"/api/insights/{session_id}")
+            if response is None or response.status_code != 200:
+                status = "failed"
+                break
+            status = response.json()["status"]
+        if status != "completed":
+            recorder.errors["analysis"] += 1
+            continue
+        recorder.latencies["analysis_e2e"].append(time.perf_counter() - start)
+
+        for turn in range(args.chats):
+            await recorder.call(client, "chat", "POST", "/api/chat", json={
+                "session_id": session_id, "message": f"What should I focus on next game? ({turn + 1})"
+            })
+
+async def run(args) -> Dict[str, Any]:
+    fake_app = None
+    riot = RiotClient(rate_limiter=RateLimiter(app_limits=BENCH_APP_LIMITS), base_url=args.riot_url or FAKE_RIOT_URL)
+    if args.riot_url:
+        # An external fake serves its own fixtures; the benchmark still needs their Riot IDs
+        if not args.fixtures:
+            raise SystemExit("--riot-url needs --fixtures with the served players")
+        stats_url = args.riot_url.split("{host}")[0] + "_stats"
+        players = RiotFixtures.load(args.fixtures).riot_ids()
+    else:
+        fixtures = RiotFixtures.load(args.fixtures) if args.fixtures else RiotFixtures.synthetic(args.players, args.matches_per_player, seed=args.seed)
+        players = fixtures.riot_ids()
+        fake_app = create_app(fixtures, FakeRiotConfig(
+            latency_ms=args.riot_latency_ms,
+            jitter_ms=args.riot_jitter_ms,
+            error_rate=args.riot_error_rate,
+            retry_after=0,
+            app_limits=BENCH_APP_LIMITS,
+            seed=args.seed
+        ))
+        riot.client = httpx.AsyncClient(headers=riot.headers, transport=httpx.ASGITransport(app=fake_app))
+
+    bedrock = StubBedrock(args.rating_latency_ms, args.agent_latency_ms, args.llm_jitter_ms, seed=args.seed)
+    match_store = MatchStore(path=":memory:")
+    recorder = Recorder()
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.sessions):
+        queue.put_nowait(i)
+
+    stage_timings.reset()
+    async with patched_app(riot, bedrock, match_store):
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(virtual_user(client, recorder, players, queue, args) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+    if fake_app is not None:
+        riot_stats = {"requests": dict(fake_app.state.requests), "throttled": dict(fake_app.state.throttled)}
+    else:
+        async with httpx.AsyncClient() as http:
+            riot_stats = (await http.get(stats_url)).json()
+    await riot.close()
+    match_store.close()
+
+    completed = len(recorder.latencies["analysis_e2e"])
+    requests = sum(len(v) for v in recorder.latencies.values()) - completed
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "sessions": args.sessions,
+            "chats_per_session": args.chats,
+            "match_count": args.match_count,
+            "riot": args.riot_url or "in-process",
+            "riot_latency_ms": args.riot_latency_ms,
+            "rating_latency_ms": args.rating_latency_ms,
+            "agent_latency_ms": args.agent_latency_ms,
+        },
+        "duration_s": round(elapsed, 3),
+        "throughput": {
+            "analyses_per_s": round(completed / elapsed, 3) if elapsed else 0.0,
+            "requests_per_s": round(requests / elapsed, 3) if elapsed else 0.0,
+        },
+        "endpoints": {name: summarize(values) for name, values in recorder.latencies.items()},
+        "errors": dict(recorder.errors),
+        "stages": stage_timings.summary(),
+        "riot": riot_stats,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load benchmark against stubbed Riot and Bedrock.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Virtual users")
+    parser.add_argument("--sessions", type=int, default=40, help="Analyses in total")
+    parser.add_argument("--chats", type=int, default=2, help="Chat messages per completed analysis")
+    parser.add_argument("--match-count", type=int, default=5)
+    parser.add_argument("--poll-ms", type=float, default=100.0)
+    parser.add_argument("--players", type=int, default=50, help="Synthetic players (ignored with --fixtures)")
+    parser.add_argument("--matches-per-player", type=int, default=20)
+    parser.add_argument("--fixtures", help="Recorded fixtures directory (see benchmarks.fake_riot record)")
+    parser.add_argument("--riot-url", help="Use a running fake Riot server instead of the in-process one")
+    parser.add_argument("--riot-latency-ms", type=float, default=40.0)
+    parser.add_argument("--riot-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--riot-error-rate", type=float, default=0.0)
+    parser.add_argument("--rating-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--agent-latency-ms", type=float, default=2500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cold-start benchmark: how long a fresh process takes to import the app, run its startup and build
+the Bedrock clients on first use.
+
+    python -m benchmarks.startup [--runs 5] [--out report.json]
+
+Each run is a new interpreter, so nothing is cached in sys.modules. Phases per run:
+  import         `import app.main` (module-level services are constructed here)
+  startup        the FastAPI lifespan up to the point it serves requests
+  first_use      BedrockClient.warm_up(): credentials, boto3 client and the LangChain agent,
+                 i.e. the cost the first chat pays when BEDROCK_WARM_UP=0
+AWS settings are inherited; with BEDROCK_ROLE_ARN set, first_use includes the STS call.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Any, Dict, List
+from app.utils.timing import summarize
+
+CHILD = """
+import json, time, asyncio
+start = time.perf_counter()
+import app.main as app_main
+imported = time.perf_counter()
+
+async def startup():
+    async with app_main.lifespan(app_main.app):
+        ready = time.perf_counter()
+        app_main.bedrock_client.warm_up()
+        return ready, time.perf_counter()
+
+ready, built = asyncio.run(startup())
+print(json.dumps({"import": imported - start, "startup": ready - imported, "first_use": built - ready}))
+"""
+
+def run_once() -> Dict[str, float]:
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.setdefault("RIOT_API_KEY", "benchmark")
+    env["MATCH_STORE_PATH"] = ":memory:"
+    env["LLM_CACHE_PATH"] = ":memory:"
+    env["BEDROCK_WARM_UP"] = "0"
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=backend, env=env, capture_output=True, text=True, check=True)
+    # The app prints debug lines; the timings are the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the backend.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    runs: List[Dict[str, float]] = [run_once() for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "phases": {phase: summarize([r[phase] for r in runs]) for phase in ("import", "startup", "first_use")},
+        "ready": summarize([r["import"] + r["startup"] for r in runs]),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return report
+
+if __name__ == "__main__":
+    main()
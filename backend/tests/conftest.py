@@ -0,0 +1,64 @@
+import sys
+import os
+from typing import Iterable, List, Optional
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+# Set before any test imports app.main, whose module-level services open these stores
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+os.environ["MATCH_STORE_PATH"] = ":memory:"
+os.environ["LLM_CACHE_PATH"] = ":memory:"
+
+from app.models import PlayerSnapshot, ExperienceLevel, MatchParticipantStats
+
+# Shared builders; test modules import them with `from conftest import ...`
+
+PUUIDS = [f"p{i}" for i in range(10)]
+
+def make_match(match_id: str, puuids: Optional[List[str]] = None, duration: int = 1800) -> dict:
+    """Match-V5 detail: slot i gets i kills and Champion '{match_id}-Champ{i}'; blue side (slots 0-4) wins."""
+    participants = [{
+        "puuid": puuid,
+        "participantId": slot + 1,
+        "teamId": 100 if slot < 5 else 200,
+        "championName": f"{match_id}-Champ{slot}",
+        "kills": slot,
+        "deaths": 2,
+        "assists": 3,
+        "totalMinionsKilled": 150,
+        "neutralMinionsKilled": 10,
+        "totalDamageDealtToChampions": 1000 * (slot + 1),
+        "goldEarned": 9000,
+        "win": slot < 5,
+        **{f"item{i}": 3000 + i for i in range(7)},
+    } for slot, puuid in enumerate(puuids or PUUIDS)]
+    return {"metadata": {"matchId": match_id}, "info": {"gameDuration": duration, "participants": participants}}
+
+def make_match_stats(**overrides) -> MatchParticipantStats:
+    fields = dict(
+        championName="Ahri",
+        kills=5,
+        deaths=2,
+        assists=10,
+        totalMinionsKilled=150,
+        totalDamageDealtToChampions=20000,
+        goldEarned=12000,
+        win=True,
+        items=[1, 2, 3, 4, 5, 6, 0]
+    )
+    fields.update(overrides)
+    return MatchParticipantStats(**fields)
+
+def make_snapshot(matches: Iterable[MatchParticipantStats] = (), **overrides) -> PlayerSnapshot:
+    fields = dict(
+        gameName="TestPlayer",
+        tagLine="NA1",
+        region="na1",
+        summonerLevel=100,
+        recent_matches=list(matches),
+        top_mastery=[],
+        experience_level=ExperienceLevel.CASUAL
+    )
+    fields.update(overrides)
+    return PlayerSnapshot(**fields)
@@ -51,7 +51,7 @@ def run_workflow():
         
         # 1. Analyze Player
         print("\n[Step 1] Analyzing Player (Triggers DeepSeek Rating + Claude Tip)...")
-        analyze_payload = {"gameName": "TestPlayer", "tagLine": "NA1", "region": "na1"}
+        analyze_payload = {"gameName": "TestPlayer", "tagLine": "NA1", "region": "na1", "wait": True}
         resp = client.post("/api/analyze", json=analyze_payload)
         
         if resp.status_code != 200:
@@ -0,0 +1,148 @@
+import sys
+import os
+import asyncio
+from typing import List
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import AccountV1Response, SummonerV4Response
+from app.services.analyzer import AnalyzerService
+from conftest import make_match
+
+class FakeRiot:
+    """Stands in for RiotClient and records every call."""
+
+    def __init__(self, match_ids: List[str]):
+        self.all_match_ids = match_ids
+        self.calls: List[tuple] = []
+
+    async def get_account(self, game_name, tag_line):
+        self.calls.append(("account", game_name))
+        return AccountV1Response(puuid="p1", gameName=game_name, tagLine=tag_line)
+
+    async def get_summoner(self, region, puuid):
+        self.calls.append(("summoner", puuid))
+        return SummonerV4Response(puuid=puuid, summonerLevel=120)
+
+    async def get_match_ids(self, region, puuid, count=15):
+        self.calls.append(("match_ids", count))
+        return self.all_match_ids[:count]
+
+    async def get_top_mastery(self, region, puuid):
+        return []
+
+    async def get_match_detail(self, region, match_id):
+        self.calls.append(("detail", match_id))
+        return make_match(match_id)
+
+    async def get_timeline_summary(self, region, match_id):
+        self.calls.append(("timeline", match_id))
+        return None
+
+def test_build_snapshot_honours_match_count():
+    riot = FakeRiot([f"NA1_{i}" for i in range(20)])
+    snapshot = asyncio.run(AnalyzerService(riot).build_snapshot("Test", "NA1", "na1", match_count=12))
+
+    assert ("match_ids", 12) in riot.calls
+    assert len(snapshot.recent_matches) == 12
+    assert snapshot.match_ids == [f"NA1_{i}" for i in range(12)]
+    assert snapshot.pending_match_ids == []
+
+def test_progressive_snapshot_is_enriched_in_batches():
+    riot = FakeRiot([f"NA1_{i}" for i in range(9)])
+    analyzer = AnalyzerService(riot)
+
+    async def run():
+        snapshot = await analyzer.build_snapshot("Test", "NA1", "na1", match_count=9, initial_matches=3)
+        first = snapshot
+        steps = [s async for s in analyzer.enrich_snapshot(snapshot, batch_size=4)]
+        return first, steps
+
+    first, steps = asyncio.run(run())
+    assert len(first.recent_matches) == 3
+    assert len(first.pending_match_ids) == 6
+    assert [len(s.recent_matches) for s in steps] == [7, 9]
+    final = steps[-1]
+    assert final.match_ids == [f"NA1_{i}" for i in range(9)]
+    assert final.recent_matches[8].championName == "NA1_8-Champ1"
+
+def test_repeat_analysis_only_fetches_match_ids():
+    riot = FakeRiot([f"NA1_{i}" for i in range(10)])
+    analyzer = AnalyzerService(riot)
+    first = asyncio.run(analyzer.build_snapshot("Test", "NA1", "na1", match_count=5))
+
+    riot.calls.clear()
+    second = asyncio.run(analyzer.build_snapshot("Test", "NA1", "na1", match_count=5))
+
+    assert [c[0] for c in riot.calls] == ["account", "summoner", "match_ids"]
+    assert second.recent_matches == first.recent_matches
+
+def test_new_matches_are_folded_into_cached_snapshot():
+    riot = FakeRiot([f"NA1_{i}" for i in range(10, 15)])
+    analyzer = AnalyzerService(riot)
+    asyncio.run(analyzer.build_snapshot("Test", "NA1", "na1", match_count=5))
+
+    # Two new games were played since
+    riot.all_match_ids = ["NA1_16", "NA1_15"] + riot.all_match_ids
+    riot.calls.clear()
+    snapshot = asyncio.run(analyzer.build_snapshot("Test", "NA1", "na1", match_count=5))
+
+    fetched = [c[1] for c in riot.calls if c[0] == "detail"]
+    assert fetched == ["NA1_16", "NA1_15"]
+    assert snapshot.match_ids == ["NA1_16", "NA1_15", "NA1_10", "NA1_11", "NA1_12"]
+    assert snapshot.recent_matches[0].championName == "NA1_16-Champ1"
+
+def test_empty_match_ids_do_not_empty_a_cached_snapshot():
+    riot = FakeRiot([f"NA1_{i}" for i in range(5)])
+    analyzer = AnalyzerService(riot)
+    first = asyncio.run(analyzer.build_snapshot("Test", "NA1", "na1", match_count=5))
+
+    # Riot answers the ID lookup with a 404 / empty list
+    riot.all_match_ids = []
+    riot.calls.clear()
+    snapshot = asyncio.run(analyzer.build_snapshot("Test", "NA1", "na1", match_count=5))
+    lobby = asyncio.run(analyzer.build_snapshots([("Test", "NA1")], "na1", match_count=5))
+
+    assert snapshot.match_ids == first.match_ids
+    assert snapshot.recent_matches == first.recent_matches
+    assert lobby[0].match_ids == first.match_ids
+    assert not [c for c in riot.calls if c[0] == "detail"]
+
+class LobbyRiot(FakeRiot):
+    """Players p0..p9 share every match; each sees only its own recent window of it."""
+
+    def __init__(self, windows: dict):
+        super().__init__([])
+        self.windows = windows
+
+    async def get_account(self, game_name, tag_line):
+        self.calls.append(("account", game_name))
+        if game_name not in self.windows:
+            return None
+        return AccountV1Response(puuid=game_name, gameName=game_name, tagLine=tag_line)
+
+    async def get_match_ids(self, region, puuid, count=15):
+        self.calls.append(("match_ids", puuid))
+        return self.windows[puuid][:count]
+
+def test_lobby_snapshots_share_match_fetches():
+    riot = LobbyRiot({
+        "p1": ["NA1_3", "NA1_2", "NA1_1"],
+        "p2": ["NA1_4", "NA1_3", "NA1_2"],
+        "p7": ["NA1_3", "NA1_1", "NA1_0"],
+    })
+    results = asyncio.run(AnalyzerService(riot).build_snapshots(
+        [("p1", "NA1"), ("p2", "NA1"), ("ghost", "NA1"), ("p7", "NA1")], "na1", match_count=3
+    ))
+
+    fetched = [c[1] for c in riot.calls if c[0] == "detail"]
+    assert sorted(fetched) == ["NA1_0", "NA1_1", "NA1_2", "NA1_3", "NA1_4"]
+    p1, p2, ghost, p7 = results
+    assert isinstance(ghost, ValueError)
+    # Each player keeps exactly their own window, in their order, with their own stats
+    assert p1.match_ids == ["NA1_3", "NA1_2", "NA1_1"]
+    assert p2.match_ids == ["NA1_4", "NA1_3", "NA1_2"]
+    assert [m.kills for m in p7.recent_matches] == [7, 7, 7]
+    assert p7.recent_matches[2].championName == "NA1_0-Champ7"
+    assert p2.recent_matches[0].win is True and p7.recent_matches[0].win is False
@@ -0,0 +1,230 @@
+import sys
+import os
+import json
+import asyncio
+import subprocess
+from datetime import datetime, timedelta, timezone
+import httpx
+from botocore.credentials import Credentials
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.services.bedrock_client import BedrockClient, bedrock_invoke_seconds, bedrock_tokens_total
+from app.services.job_queue import QueueFullError
+from app.services.llm_cache import LLMResponseCache
+from conftest import make_snapshot
+
+SNAPSHOT = make_snapshot()
+
+def make_client(handler, max_concurrency: int = 2, max_queue: int = 10) -> BedrockClient:
+    """BedrockClient without boto3/LangChain setup, talking to an httpx MockTransport."""
+    client = object.__new__(BedrockClient)
+    client.region = "us-east-1"
+    client.DEEPSEEK_R1 = "us.deepseek.r1-v1:0"
+    client.endpoint = "https://bedrock-runtime.us-east-1.amazonaws.com"
+    client.credentials = Credentials("AKIDEXAMPLE", "secret", "token")
+    client.rating_cache = LLMResponseCache(path=":memory:")
+    client.max_concurrency = max_concurrency
+    client.max_queue = max_queue
+    client._slots = asyncio.Semaphore(max_concurrency)
+    client._waiting = 0
+    client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+def test_async_rating_is_signed_and_cached(monkeypatch):
+    monkeypatch.delenv("AWS_BEARER_TOKEN_BEDROCK", raising=False)
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        content = '<think>ok</think>{"rating": 72, "percentile": 61.0, "summary": "Solid."}'
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    client = make_client(handler)
+
+    async def run():
+        first = await client.agenerate_rating(SNAPSHOT)
+        second = await client.agenerate_rating(SNAPSHOT)
+        await client.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == {"rating": 72, "percentile": 61.0, "summary": "Solid."}
+    assert len(requests) == 1
+    assert requests[0].url.raw_path == b"/model/us.deepseek.r1-v1%3A0/invoke"
+    assert requests[0].headers["authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/")
+    assert requests[0].headers["x-amz-security-token"] == "token"
+    assert json.loads(requests[0].content)["messages"][0]["content"].startswith("Analyze these stats")
+
+def test_concurrency_is_bounded_and_queue_overflow_rejected():
+    active, peak = 0, 0
+
+    async def slow_call(client):
+        nonlocal active, peak
+        async with client._slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            # Nested calls from the same task (agent -> analyst tool) reuse the slot
+            async with client._slot():
+                pass
+            active -= 1
+
+    client = make_client(lambda request: httpx.Response(200), max_concurrency=2, max_queue=3)
+
+    async def run():
+        results = await asyncio.gather(*(slow_call(client) for _ in range(6)), return_exceptions=True)
+        await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert peak == 2
+    assert sum(isinstance(r, QueueFullError) for r in results) == 1
+
+def test_async_deepseek_errors_are_reported_as_text(monkeypatch):
+    monkeypatch.delenv("AWS_BEARER_TOKEN_BEDROCK", raising=False)
+    client = make_client(lambda request: httpx.Response(503, text="throttled"))
+
+    async def run():
+        text = await client._invoke_deepseek_async("hi")
+        await client.close()
+        return text
+
+    assert asyncio.run(run()).startswith("Analyst unavailable:")
+
+def test_construction_is_lazy():
+    # A fresh interpreter: importing and constructing the client loads neither boto3 nor LangChain
+    code = (
+        "import sys; from app.services.bedrock_client import BedrockClient; c = BedrockClient(); "
+        "print(sorted(m for m in ('boto3', 'langchain', 'langchain_aws', 'langchain_core') if m in sys.modules))"
+    )
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, LLM_CACHE_PATH=":memory:")
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+def test_first_build_from_async_code_runs_off_the_loop(monkeypatch):
+    import threading
+    from app.utils.lazy import lazy_property
+
+    builds = []
+
+    def agent_executor(self):
+        builds.append(threading.get_ident())
+        return "agent"
+
+    monkeypatch.setattr(BedrockClient, "agent_executor", lazy_property(agent_executor))
+    client = object.__new__(BedrockClient)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        built = [await client._built("agent_executor"), await client._built("agent_executor")]
+        return loop_thread, built
+
+    loop_thread, built = asyncio.run(run())
+    assert built == ["agent", "agent"]
+    assert len(builds) == 1 and builds[0] != loop_thread
+
+def test_assumed_role_credentials_refresh_before_expiry(monkeypatch):
+    monkeypatch.setenv("BEDROCK_ROLE_ARN", "arn:aws:iam::123456789012:role/coach")
+    monkeypatch.setenv("LLM_CACHE_PATH", ":memory:")
+    client = BedrockClient()
+    calls = []
+
+    def fake_assume_role():
+        calls.append(1)
+        # The first session is already inside botocore's refresh window; the second lasts an hour
+        lifetime = timedelta(minutes=5) if len(calls) == 1 else timedelta(hours=1)
+        return {
+            "access_key": f"AKID{len(calls)}",
+            "secret_key": "secret",
+            "token": "token",
+            "expiry_time": (datetime.now(timezone.utc) + lifetime).isoformat(),
+        }
+
+    client._assume_role = fake_assume_role
+    assert len(calls) == 0
+    assert client.credentials.get_frozen_credentials().access_key == "AKID2"
+    assert client.credentials.get_frozen_credentials().access_key == "AKID2"
+    assert len(calls) == 2
+
+def test_invocation_latency_and_tokens_are_recorded(monkeypatch):
+    monkeypatch.setenv("AWS_BEARER_TOKEN_BEDROCK", "bearer")
+
+    def handler(request: httpx.Request):
+        headers = {"X-Amzn-Bedrock-Input-Token-Count": "120", "X-Amzn-Bedrock-Output-Token-Count": "30"}
+        return httpx.Response(200, headers=headers, json={"choices": [{"message": {"content": "Ward more."}}]})
+
+    client = make_client(handler)
+    model = client.DEEPSEEK_R1
+    calls = bedrock_invoke_seconds.count(model=model)
+    tokens_in = bedrock_tokens_total.value(model=model, direction="input")
+
+    async def run():
+        text = await client._invoke_deepseek_async("hi")
+        await client.close()
+        return text
+
+    assert asyncio.run(run()) == "Ward more."
+    assert bedrock_invoke_seconds.count(model=model) == calls + 1
+    assert bedrock_tokens_total.value(model=model, direction="input") == tokens_in + 120
+
+def test_batched_rating_is_one_call_and_reuses_cache(monkeypatch):
+    monkeypatch.setenv("AWS_BEARER_TOKEN_BEDROCK", "bearer")
+    prompts = []
+
+    def handler(request: httpx.Request):
+        prompt = json.loads(request.content)["messages"][0]["content"]
+        prompts.append(prompt)
+        players = prompt.count("Player ")
+        content = "<think>[scratch]</think>" + json.dumps([{"rating": 60 + i, "percentile": 50.0, "summary": "ok"} for i in range(players - 1)])
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    client = make_client(handler)
+    snapshots = [SNAPSHOT.model_copy(update={"gameName": f"P{i}"}) for i in range(3)]
+
+    async def run():
+        first = await client.agenerate_ratings(snapshots)
+        second = await client.agenerate_ratings(snapshots[:2])
+        await client.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(prompts) == 1
+    assert [r["rating"] for r in first[:2]] == [60, 61]
+    assert "error" in first[2]
+    assert second == first[:2]
+
+def test_async_coach_calls_run_on_the_bedrock_executor():
+    import io
+    import threading
+    from app.services.bedrock_client import _holding_slot
+
+    calls = []
+
+    class FakeRuntime:
+        def invoke_model_with_response_stream(self, **kwargs):
+            # Context (profile, slot) follows the call into the executor thread
+            calls.append((threading.current_thread().name, _holding_slot.get()))
+            events = [
+                {"type": "message_start", "message": {"id": "m", "type": "message", "role": "assistant", "content": [], "usage": {"input_tokens": 3, "output_tokens": 0}}},
+                {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Ward more."}},
+                {"type": "content_block_stop", "index": 0},
+                {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": 2}},
+                {"type": "message_stop"},
+            ]
+            return {"body": [{"chunk": {"bytes": json.dumps(e).encode()}} for e in events]}
+
+    client = BedrockClient()
+    client.rating_cache = LLMResponseCache(path=":memory:")
+    client.boto3_client = FakeRuntime()
+
+    async def run():
+        reply = await client.ainvoke_agent("hi", SNAPSHOT)
+        await client.close()
+        return reply
+
+    assert asyncio.run(run()) == "Ward more."
+    assert calls and all(name.startswith("bedrock") and holding for name, holding in calls)
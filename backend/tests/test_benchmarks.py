@@ -0,0 +1,51 @@
+import sys
+import os
+import json
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app import main as app_main
+from app.utils.timing import StageTimings, percentile, summarize
+from benchmarks.run import main as run_benchmark
+
+def test_percentile_and_summary():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    summary = summarize(values)
+    assert summary["count"] == 100
+    assert summary["p95_ms"] == 95.0
+    assert summarize([]) == {"count": 0}
+
+def test_stage_clock_records_one_sample_per_unit():
+    timings = StageTimings()
+    clock = timings.clock()
+    for _ in range(3):
+        with clock.measure("riot_fetch"):
+            pass
+    clock.flush()
+    assert len(timings.samples("riot_fetch")) == 1
+
+def test_benchmark_report(tmp_path):
+    pipeline = app_main.pipeline
+    out = tmp_path / "report.json"
+    report = run_benchmark([
+        "--concurrency", "3", "--sessions", "4", "--chats", "1", "--players", "6", "--matches-per-player", "5",
+        "--match-count", "3", "--poll-ms", "5", "--riot-latency-ms", "1", "--riot-jitter-ms", "0",
+        "--rating-latency-ms", "1", "--agent-latency-ms", "1", "--llm-jitter-ms", "0", "--out", str(out)
+    ])
+
+    assert json.loads(out.read_text()) == report
+    assert report["errors"] == {}
+    assert report["endpoints"]["analyze"]["count"] == 4
+    assert report["endpoints"]["chat"]["count"] == 4
+    assert report["endpoints"]["analysis_e2e"]["count"] == 4
+    assert {"riot_fetch", "match_processing", "rating", "agent"} <= set(report["stages"])
+    assert report["stages"]["agent"]["count"] == 8  # opening tip + one chat per session
+    assert report["throughput"]["analyses_per_s"] > 0
+    assert report["riot"]["requests"]
+    # The app's real services are put back afterwards
+    assert app_main.pipeline is pipeline
@@ -0,0 +1,171 @@
+import sys
+import os
+import json
+import asyncio
+from fastapi.testclient import TestClient
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.main import app, session_store
+from app.models import SessionData, AnalysisResult
+from app.services.chat_memory import ConversationMemory
+from conftest import make_snapshot
+
+MOCK_SNAPSHOT = make_snapshot()
+
+def make_session(session_id: str) -> SessionData:
+    session = SessionData(
+        session_id=session_id,
+        snapshot=MOCK_SNAPSHOT,
+        analysis=AnalysisResult(rating=60, percentile=50.0, summary="ok", coaching_tip="tip")
+    )
+    asyncio.run(session_store.save(session))
+    return session
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_chat_stream_forwards_tokens_and_tool_progress(monkeypatch):
+    make_session("stream-session")
+
+    async def fake_stream(message, snapshot, chat_history=[], chat_summary=""):
+        yield {"type": "tool_start", "tool": "ask_analyst", "query": "cs"}
+        yield {"type": "tool_end", "tool": "ask_analyst"}
+        yield {"type": "token", "text": "Farm "}
+        yield {"type": "token", "text": "better."}
+        yield {"type": "done", "response": "Farm better."}
+
+    monkeypatch.setattr("app.main.bedrock_client.stream_agent", fake_stream)
+    client = TestClient(app)
+    resp = client.post("/api/chat/stream", json={"session_id": "stream-session", "message": "How is my cs?"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(resp.text)
+    assert [e for e, _ in events] == ["tool_start", "tool_end", "token", "token", "done"]
+    stored = asyncio.run(session_store.get("stream-session"))
+    assert stored.chat_history == [{"user": "How is my cs?", "coach": "Farm better."}]
+
+def test_chat_stream_reports_errors_as_events(monkeypatch):
+    make_session("broken-session")
+
+    async def broken_stream(message, snapshot, chat_history=[], chat_summary=""):
+        yield {"type": "token", "text": "Hmm"}
+        raise RuntimeError("bedrock down")
+
+    monkeypatch.setattr("app.main.bedrock_client.stream_agent", broken_stream)
+    client = TestClient(app)
+    resp = client.post("/api/chat/stream", json={"session_id": "broken-session", "message": "?"})
+    assert [e for e, _ in parse_sse(resp.text)] == ["token", "error"]
+
+
+def test_memory_keeps_window_and_summarises_older_turns():
+    memory = ConversationMemory(window=2, token_cap=1000, summary_token_cap=1000)
+    session = SessionData(session_id="memory")
+    for i in range(5):
+        memory.append(session, f"Question {i}? More detail.", f"Answer {i}. Longer explanation follows.")
+
+    assert [t["user"] for t in session.chat_history] == ["Question 3? More detail.", "Question 4? More detail."]
+    assert session.chat_summary.splitlines() == [
+        f"- User asked: Question {i}? Coach: Answer {i}." for i in range(3)
+    ]
+
+    inputs = memory.to_inputs(session.chat_history, session.chat_summary)
+    assert [m.type for m in inputs["chat_history"]] == ["human", "ai", "human", "ai"]
+    assert "Question 0?" in inputs["conversation_summary"]
+
+def test_summary_reaches_bedrock_as_the_only_system_message():
+    from langchain_aws.chat_models.bedrock import _format_anthropic_messages
+    from app.services.bedrock_client import BedrockClient
+
+    memory = ConversationMemory(window=1, token_cap=1000, summary_token_cap=1000)
+    session = SessionData(session_id="summarised")
+    for i in range(3):
+        memory.append(session, f"Question {i}?", f"Answer {i}.")
+
+    messages = BedrockClient._coach_prompt().format_messages(
+        input="Next question", agent_scratchpad=[], **memory.to_inputs(session.chat_history, session.chat_summary)
+    )
+    system, formatted = _format_anthropic_messages(messages)
+    assert system.startswith("You are an elite League of Legends coach.")
+    assert "Summary of earlier conversation:\n- User asked: Question 0?" in system
+    assert [m["role"] for m in formatted] == ["user", "assistant", "user"]
+
+    # Without a summary the system prompt is unchanged
+    system, _ = _format_anthropic_messages(BedrockClient._coach_prompt().format_messages(
+        input="hi", agent_scratchpad=[], **memory.to_inputs([], "")
+    ))
+    assert system.endswith("Always be constructive, specific, and helpful.")
+
+def test_memory_respects_token_caps():
+    memory = ConversationMemory(window=10, token_cap=80, summary_token_cap=20)
+    session = SessionData(session_id="capped")
+    for i in range(14):
+        memory.append(session, f"Q{i} " + "x" * 60, f"A{i} " + "y" * 60)
+
+    # Summary keeps only its newest line; the newest turns take the cap before the summary does
+    assert session.chat_summary.splitlines() == [f"- User asked: Q3 {'x' * 60} Coach: A3 {'y' * 60}"]
+    inputs = memory.to_inputs(session.chat_history, session.chat_summary)
+    assert [m.content[:3] for m in inputs["chat_history"]] == ["Q12", "A12", "Q13", "A13"]
+    assert inputs["conversation_summary"] == ""
+
+def test_chat_passes_history_and_summary_to_agent(monkeypatch):
+    make_session("history-session")
+    seen = []
+
+    async def fake_invoke(message, snapshot, chat_history=[], chat_summary=""):
+        seen.append((list(chat_history), chat_summary))
+        return f"reply to {message}"
+
+    monkeypatch.setattr("app.main.bedrock_client.ainvoke_agent", fake_invoke)
+    monkeypatch.setattr("app.main.bedrock_client.memory", ConversationMemory(window=1))
+    client = TestClient(app)
+    for message in ["first", "second"]:
+        assert client.post("/api/chat", json={"session_id": "history-session", "message": message}).status_code == 200
+
+    assert seen[1] == ([{"user": "first", "coach": "reply to first"}], "")
+    stored = asyncio.run(session_store.get("history-session"))
+    assert stored.chat_history == [{"user": "second", "coach": "reply to second"}]
+    assert stored.chat_summary == "- User asked: first Coach: reply to first"
+
+def test_chat_does_not_revert_enrichment_saved_meanwhile(monkeypatch):
+    from app.services.session_store import InMemorySessionStore, serialize_session, deserialize_session
+
+    class CopyingStore(InMemorySessionStore):
+        """Hands out copies like RedisSessionStore, so the chat's session object goes stale."""
+        async def get(self, session_id):
+            blob = self.cache.get(session_id)
+            return deserialize_session(blob) if blob else None
+
+        async def save(self, session):
+            self.cache.set(session.session_id, serialize_session(session))
+
+    store = CopyingStore()
+    monkeypatch.setattr("app.main.session_store", store)
+    asyncio.run(store.save(SessionData(
+        session_id="enriching-session", snapshot=MOCK_SNAPSHOT,
+        analysis=AnalysisResult(rating=60, percentile=50.0, summary="ok", coaching_tip="tip")
+    )))
+    enriched = MOCK_SNAPSHOT.model_copy(update={"summonerLevel": 101})
+
+    async def fake_invoke(message, snapshot, chat_history=[], chat_summary=""):
+        # Progressive enrichment lands while the coach is answering
+        latest = await store.get("enriching-session")
+        latest.snapshot = enriched
+        await store.save(latest)
+        return "Ward more."
+
+    monkeypatch.setattr("app.main.bedrock_client.ainvoke_agent", fake_invoke)
+    client = TestClient(app)
+    assert client.post("/api/chat", json={"session_id": "enriching-session", "message": "hi"}).status_code == 200
+
+    stored = asyncio.run(store.get("enriching-session"))
+    assert stored.snapshot.summonerLevel == 101
+    assert stored.chat_history == [{"user": "hi", "coach": "Ward more."}]
@@ -0,0 +1,41 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import PlayerSnapshot, ExperienceLevel
+from app.services.context_encoder import encode_snapshot, estimate_tokens
+from conftest import make_match_stats, make_snapshot as make_base_snapshot
+
+def make_snapshot(num_matches: int = 20) -> PlayerSnapshot:
+    matches = [
+        make_match_stats(
+            win=i % 2 == 0, items=[3089, 3020, 0, 0, 0, 0, 3340], gold_at_10=3500, cs_at_10=80, xp_at_10=4000,
+            early_items=[1056, 2003, 2003]
+        )
+        for i in range(num_matches)
+    ]
+    return make_base_snapshot(
+        matches, tier="GOLD", rank="IV", experience_level=ExperienceLevel.INTERMEDIATE,
+        top_mastery=[{"championId": 157, "championLevel": 7, "championPoints": 250000, "lastPlayTime": 1700000000000}]
+    )
+
+def test_encoding_is_much_smaller_than_json():
+    snapshot = make_snapshot()
+    compact = encode_snapshot(snapshot, token_budget=10000)
+    assert estimate_tokens(compact) * 2 < estimate_tokens(snapshot.model_dump_json())
+    assert "Player: TestPlayer#NA1 | na1 | Lv100 | GOLD IV | Intermediate" in compact
+    assert "Mastery: Yasuo M7 250.0kpts" in compact
+    assert "Avg over 20 games: 10W-10L" in compact
+    assert "items:3089,3020,3340" in compact
+    assert ",0" not in compact
+
+def test_budget_drops_oldest_rows_but_keeps_averages():
+    compact = encode_snapshot(make_snapshot(), token_budget=250)
+    assert estimate_tokens(compact) <= 250
+    assert "Avg over 20 games" in compact
+    assert "older matches omitted" in compact
+
+def test_empty_history():
+    assert "No recent matches." in encode_snapshot(make_snapshot(num_matches=0))
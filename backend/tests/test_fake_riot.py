@@ -0,0 +1,65 @@
+import sys
+import os
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.services.analyzer import AnalyzerService
+from app.services.riot_client import RiotClient
+from benchmarks.fake_riot import RiotFixtures, FakeRiotConfig, create_app
+
+def make_client(fixtures: RiotFixtures, config: FakeRiotConfig) -> RiotClient:
+    """RiotClient pointed at the fake server through its base-URL setting (in-process transport)."""
+    client = RiotClient(base_url="http://fake-riot/{host}")
+    client.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(fixtures, config)))
+    return client
+
+def test_routing_host_round_trips_through_base_url():
+    default = RiotClient()
+    assert default._url("na1", "/lol/x") == "https://na1.api.riotgames.com/lol/x"
+    assert default._routing_host("https://americas.api.riotgames.com/riot/account") == "americas"
+    fake = RiotClient(base_url="http://127.0.0.1:8100/{host}")
+    assert fake._routing_host(fake._url("europe", "/lol/match/v5/matches/EUW1_1")) == "europe"
+
+def test_snapshot_built_against_fake_riot():
+    fixtures = RiotFixtures.synthetic(players=12, matches_per_player=6)
+    game_name, tag_line = fixtures.riot_ids()[3]
+
+    async def run():
+        client = make_client(fixtures, FakeRiotConfig(latency_ms=5, jitter_ms=5, seed=1))
+        snapshot = await AnalyzerService(client).build_snapshot(game_name, tag_line, "na1", match_count=5)
+        raw = await client.client.get(client._url("na1", f"/lol/summoner/v4/summoners/by-puuid/{snapshot.puuid}"))
+        limits = client.rate_limiter.stats()
+        await client.close()
+        return snapshot, raw, limits
+
+    snapshot, raw, limits = asyncio.run(run())
+    assert snapshot.gameName == game_name
+    assert len(snapshot.recent_matches) == 5
+    assert all(m.gold_at_10 for m in snapshot.recent_matches)
+    assert snapshot.tier in ("IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND")
+    assert raw.headers["X-App-Rate-Limit"] == "20:1,100:120"
+    assert raw.headers["X-Method-Rate-Limit-Count"].startswith("2:")
+    assert {"americas", "na1"} <= set(limits)
+
+def test_injected_429s_are_retried_then_surface_as_timeout():
+    fixtures = RiotFixtures.synthetic(players=2, matches_per_player=1)
+    game_name, tag_line = fixtures.riot_ids()[0]
+    config = FakeRiotConfig(error_rate=1.0, retry_after=0, seed=2)
+
+    async def run():
+        client = make_client(fixtures, config)
+        try:
+            with pytest.raises(HTTPException) as exc:
+                await client.get_account(game_name, tag_line)
+            return exc.value.status_code
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) == 504
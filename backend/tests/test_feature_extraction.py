@@ -0,0 +1,48 @@
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.services.feature_extraction import MatchFeatureBatch
+from conftest import PUUIDS, make_match
+
+def make_summary() -> dict:
+    return {"participants": {
+        str(pid): {"gold_at_10": 3000 + pid, "cs_at_10": 70, "xp_at_10": 4000, "early_items": [1055], "gold": [500, 800], "cs": [0, 5], "xp": [0, 300]}
+        for pid in range(1, 11)
+    }}
+
+def test_participant_stats_match_per_match_fields():
+    batch = MatchFeatureBatch(["NA1_1", "NA1_2"], [make_match("NA1_1", PUUIDS), make_match("NA1_2", PUUIDS[::-1])], [make_summary(), None])
+    stats = batch.participant_stats("p3")
+
+    assert batch.player_match_ids("p3") == ["NA1_1", "NA1_2"]
+    assert [s.championName for s in stats] == ["NA1_1-Champ3", "NA1_2-Champ6"]
+    first, second = stats
+    assert first.kills == 3 and first.totalMinionsKilled == 160 and first.win
+    assert first.items == [3000 + i for i in range(7)]
+    assert first.gold_at_10 == 3004 and first.early_items == [1055]
+    # No timeline for the second match
+    assert second.gold_at_10 == 0 and second.early_items == []
+
+def test_damage_share_and_aggregates():
+    batch = MatchFeatureBatch(["NA1_1"], [make_match("NA1_1", PUUIDS, duration=1200)], [make_summary()])
+
+    team_share = batch.damage_share[0, :5].sum(), batch.damage_share[0, 5:].sum()
+    assert np.allclose(team_share, (1.0, 1.0))
+
+    agg = batch.player_aggregates("p0")
+    assert agg["games"] == 1
+    assert agg["kda"] == 1.5
+    assert agg["cs_per_min"] == 8.0
+    assert agg["damage_share"] == 1000 / 15000
+    assert agg["gold_at_10"] == 3001
+    assert batch.player_aggregates("nobody") == {"games": 0}
+
+def test_curves_are_padded_with_nan():
+    batch = MatchFeatureBatch(["NA1_1"], [make_match("NA1_1", PUUIDS)], [make_summary()])
+    curve = batch.gold_curve[0, 0]
+    assert curve[:2].tolist() == [500, 800]
+    assert np.isnan(curve[2:]).all()
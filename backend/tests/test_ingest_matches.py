@@ -0,0 +1,66 @@
+import sys
+import os
+import json
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.cli.ingest_matches import main as ingest_cli
+from app.services.match_store import MatchStore
+from app.services.riot_client import RiotClient
+from app.services.timeline_parser import summarize_timeline
+from conftest import make_match
+
+def make_timeline(match_id: str) -> dict:
+    frames = [{
+        "timestamp": minute * 60000,
+        "participantFrames": {str(p): {"totalGold": 300 * minute + p, "minionsKilled": 8 * minute, "jungleMinionsKilled": 0, "xp": 400 * minute} for p in range(1, 11)},
+        "events": [],
+    } for minute in range(16)]
+    return {"metadata": {"matchId": match_id}, "info": {"frames": frames}}
+
+def test_ingests_directory_and_jsonl_into_store(tmp_path):
+    dump = tmp_path / "dump"
+    dump.mkdir()
+    for i in range(5):
+        (dump / f"NA1_{i}.json").write_text(json.dumps(make_match(f"NA1_{i}")))
+        (dump / f"NA1_{i}_timeline.json").write_text(json.dumps(make_timeline(f"NA1_{i}")))
+    (dump / "broken.json").write_text("{not json")
+
+    jsonl = tmp_path / "more.jsonl"
+    with open(jsonl, "w") as f:
+        for i in range(5, 9):
+            f.write(json.dumps({"match": make_match(f"NA1_{i}"), "timeline": make_timeline(f"NA1_{i}")}) + "\n")
+        f.write(json.dumps({"metadata": {"matchId": "NA1_99"}, "info": {"participants": []}}) + "\n")
+
+    store_path = str(tmp_path / "store.sqlite3")
+    first = ingest_cli([str(dump), "--store", store_path, "--workers", "2", "--chunk-size", "3"])
+    second = ingest_cli([str(jsonl), "--store", store_path, "--workers", "2", "--chunk-size", "2"])
+
+    assert first == {"matches": 5, "timelines": 5, "participants": 50, "errors": 1}
+    assert second == {"matches": 4, "timelines": 4, "participants": 40, "errors": 1}
+
+    store = MatchStore(path=store_path)
+    assert store.count("detail") == 9
+    assert store.count("timeline_summary") == 9
+    assert store.get("timeline_summary", "NA1_6") == summarize_timeline(make_timeline("NA1_6"))
+
+    # A warmed node answers from the store without touching Riot
+    async def run():
+        client = RiotClient(match_store=store)
+
+        async def no_network(*args, **kwargs):
+            raise AssertionError("unexpected Riot request")
+
+        client._request = no_network
+        detail = await client.get_match_detail("na1", "NA1_2")
+        summary = await client.get_timeline_summary("na1", "NA1_2")
+        await client.close()
+        return detail, summary
+
+    detail, summary = asyncio.run(run())
+    assert detail == make_match("NA1_2")
+    assert summary["participants"]["1"]["gold_at_10"] == 3001
@@ -0,0 +1,109 @@
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.main import app
+from app.services.job_queue import JobQueue, QueueFullError
+from conftest import make_snapshot
+
+MOCK_SNAPSHOT = make_snapshot()
+MOCK_RATING = {"rating": 72, "percentile": 65.0, "summary": "Solid laning."}
+
+def test_queue_bounds_pending_jobs_and_limits_workers():
+    async def run():
+        queue = JobQueue(workers=2, max_pending=3)
+        await queue.start()
+        running = []
+        peak = []
+
+        async def job():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.pop()
+
+        for _ in range(3):
+            queue.submit(job)
+        try:
+            queue.submit(job)
+            queue.submit(job)
+            overflow = False
+        except QueueFullError:
+            overflow = True
+        await queue.join()
+        await queue.stop()
+        return overflow, max(peak)
+
+    overflow, peak = asyncio.run(run())
+    assert overflow
+    assert peak <= 2
+
+def test_analyze_returns_pending_session_and_completes_in_background():
+    with patch("app.main.analyzer.build_snapshot", new_callable=AsyncMock) as mock_build, \
+         patch("app.main.bedrock_client.agenerate_rating", return_value=MOCK_RATING), \
+         patch("app.main.bedrock_client.ainvoke_agent", return_value="Ward more."):
+        mock_build.return_value = MOCK_SNAPSHOT
+
+        with TestClient(app) as client:
+            resp = client.post("/api/analyze", json={"gameName": "TestPlayer", "tagLine": "NA1"})
+            assert resp.status_code == 200
+            assert resp.json()["status"] == "pending"
+            session_id = resp.json()["session_id"]
+
+            insights = None
+            for _ in range(100):
+                insights = client.get(f"/api/insights/{session_id}").json()
+                if insights["status"] in ("completed", "failed"):
+                    break
+                time.sleep(0.02)
+
+    assert insights["status"] == "completed"
+    assert insights["complete"]
+    assert insights["analysis"]["rating"] == 72
+    assert insights["analysis"]["coaching_tip"] == "Ward more."
+
+def test_failed_job_is_reported_on_insights():
+    with patch("app.main.analyzer.build_snapshot", new_callable=AsyncMock) as mock_build:
+        mock_build.side_effect = ValueError("Account not found")
+
+        with TestClient(app) as client:
+            session_id = client.post("/api/analyze", json={"gameName": "Nobody", "tagLine": "NA1"}).json()["session_id"]
+            for _ in range(100):
+                insights = client.get(f"/api/insights/{session_id}").json()
+                if insights["status"] == "failed":
+                    break
+                time.sleep(0.02)
+
+            assert insights["error"] == "Account not found"
+            chat = client.post("/api/chat", json={"session_id": session_id, "message": "hi"})
+            assert chat.status_code == 409
+
+def test_batch_analyze_creates_a_session_per_player():
+    with patch("app.main.analyzer.build_snapshots", new_callable=AsyncMock) as mock_build, \
+         patch("app.main.bedrock_client.agenerate_ratings", return_value=[MOCK_RATING]) as mock_ratings, \
+         patch("app.main.bedrock_client.ainvoke_agent", return_value="Ward more."):
+        mock_build.return_value = [MOCK_SNAPSHOT, ValueError("Account not found: Nobody#NA1")]
+
+        with TestClient(app) as client:
+            resp = client.post("/api/analyze/batch", json={
+                "players": [{"gameName": "TestPlayer", "tagLine": "NA1"}, {"gameName": "Nobody", "tagLine": "NA1"}],
+                "wait": True
+            })
+            too_many = client.post("/api/analyze/batch", json={"players": [{"gameName": f"P{i}", "tagLine": "NA1"} for i in range(11)]})
+            players = resp.json()["players"]
+            found, missing = (client.get(f"/api/insights/{p['session_id']}").json() for p in players)
+
+    assert too_many.status_code == 422
+    assert [p["player"] for p in players] == ["TestPlayer#NA1", "Nobody#NA1"]
+    assert [p["status"] for p in players] == ["completed", "failed"]
+    assert mock_ratings.call_count == 1
+    assert found["analysis"]["rating"] == 72
+    assert missing["error"] == "Account not found: Nobody#NA1"
@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.services.llm_cache import LLMResponseCache, canonical_digest
+from app.services.bedrock_client import BedrockClient
+from conftest import make_snapshot
+
+def test_digest_is_canonical():
+    a = make_snapshot(top_mastery=[{"championId": 103, "championPoints": 1000, "championLevel": 7}])
+    b = make_snapshot(top_mastery=[{"championLevel": 7, "championPoints": 1000, "championId": 103}], pending_match_ids=["NA1_9"])
+    assert canonical_digest("m", "1", a) == canonical_digest("m", "1", b)
+    assert canonical_digest("m", "1", a) != canonical_digest("m", "2", a)
+    assert canonical_digest("m", "1", a) != canonical_digest("m", "1", make_snapshot(summonerLevel=101))
+
+def test_cache_persists_expires_and_evicts(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    cache = LLMResponseCache(path=path, ttl=60, max_entries=2)
+    for i in range(3):
+        cache.set(f"k{i}", {"rating": i})
+        time.sleep(0.01)
+    assert len(cache) == 2
+    assert cache.get("k0") is None
+    cache.close()
+
+    reopened = LLMResponseCache(path=path, ttl=60, max_entries=2)
+    assert reopened.get("k2") == {"rating": 2}
+    assert reopened.stats()["hits"] == 1
+
+    expired = LLMResponseCache(path=path, ttl=0, max_entries=2)
+    assert expired.get("k2") is None
+
+def test_generate_rating_reuses_cached_response():
+    client = object.__new__(BedrockClient)
+    client.DEEPSEEK_R1 = "us.deepseek.r1-v1:0"
+    client.rating_cache = LLMResponseCache(path=":memory:")
+    calls = []
+
+    def fake_deepseek(prompt):
+        calls.append(prompt)
+        return '<think>hmm</think>{"rating": 81, "percentile": 90.0, "summary": "Great."}'
+
+    client._invoke_deepseek_raw = fake_deepseek
+    first = client.generate_rating(make_snapshot())
+    second = client.generate_rating(make_snapshot())
+
+    assert first == second == {"rating": 81, "percentile": 90.0, "summary": "Great."}
+    assert len(calls) == 1
+    assert client.rating_cache.stats()["hit_ratio"] == 0.5
+
+def test_failed_ratings_are_not_cached():
+    client = object.__new__(BedrockClient)
+    client.DEEPSEEK_R1 = "us.deepseek.r1-v1:0"
+    client.rating_cache = LLMResponseCache(path=":memory:")
+    client._invoke_deepseek_raw = lambda prompt: "Analyst unavailable: timeout"
+
+    assert "error" in client.generate_rating(make_snapshot())
+    assert len(client.rating_cache) == 0
+
+def test_reads_defer_access_times_until_the_next_write(tmp_path):
+    import asyncio
+
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), ttl=60, max_entries=2)
+    cache.set("old", {"rating": 1})
+    time.sleep(0.01)
+    cache.set("new", {"rating": 2})
+    changes = cache._conn.total_changes
+
+    # A hit is a read only; its access time is written with the next set
+    assert asyncio.run(cache.aget_many(["old", "missing"])) == [{"rating": 1}, None]
+    assert cache._conn.total_changes == changes
+
+    # ...which makes "new" the least recently used entry to evict
+    asyncio.run(cache.aset("newest", {"rating": 3}))
+    assert cache.get("new") is None and cache.get("old") == {"rating": 1}
+    assert asyncio.run(cache.astats())["entries"] == 2
@@ -0,0 +1,51 @@
+import sys
+import os
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.services.match_store import MatchStore
+from app.services.riot_client import RiotClient
+
+MOCK_MATCH = {"metadata": {"matchId": "NA1_1"}, "info": {"participants": [{"puuid": "p1", "kills": 3}]}}
+
+def test_store_persists_across_instances(tmp_path):
+    path = str(tmp_path / "matches.sqlite3")
+    store = MatchStore(path=path, memory_size=4)
+    store.put("detail", "NA1_1", MOCK_MATCH)
+    store.close()
+
+    reopened = MatchStore(path=path, memory_size=4)
+    assert reopened.get("detail", "NA1_1") == MOCK_MATCH
+    assert reopened.get("timeline", "NA1_1") is None
+    assert reopened.count("detail") == 1
+
+def test_memory_tier_is_bounded():
+    store = MatchStore(path=":memory:", memory_size=2)
+    for i in range(3):
+        store.put("detail", f"NA1_{i}", {"i": i})
+    assert len(store.memory) == 2
+    # Evicted from memory but still served from disk
+    assert store.get("detail", "NA1_0") == {"i": 0}
+
+def test_riot_client_serves_known_matches_without_network():
+    async def run():
+        client = RiotClient(match_store=MatchStore(path=":memory:"))
+        calls = []
+
+        async def fake_request(url, method=None):
+            calls.append(url)
+            return MOCK_MATCH
+
+        client._request = fake_request
+        first = await client.get_match_detail("na1", "NA1_1")
+        second = await client.get_match_detail("na1", "NA1_1")
+        await client.close()
+        return first, second, calls
+
+    first, second, calls = asyncio.run(run())
+    assert first == second == MOCK_MATCH
+    assert len(calls) == 1
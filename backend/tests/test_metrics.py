@@ -0,0 +1,72 @@
+import sys
+import os
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.main import app, riot_client
+from app.services.riot_client import RiotClient, riot_request_seconds, riot_responses_total, riot_retries_total
+from app.utils.metrics import Counter, Gauge, Histogram, Registry
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = Counter("demo_requests_total", "Requests", ("path",), registry=registry)
+    latency = Histogram("demo_seconds", "Latency", ("path",), buckets=(0.1, 1.0), registry=registry)
+    Gauge("demo_sessions", "Sessions", registry=registry).set(3)
+
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, path="/a")
+
+    text = registry.render()
+    assert '# TYPE demo_requests_total counter' in text
+    assert 'demo_requests_total{path="/a\\"b"} 3' in text
+    assert 'demo_seconds_bucket{path="/a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{path="/a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{path="/a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{path="/a"} 3' in text
+    assert 'demo_seconds_sum{path="/a"} 5.55' in text
+    assert 'demo_sessions 3' in text
+
+def test_riot_requests_record_latency_and_retries():
+    attempts = []
+
+    def handler(request: httpx.Request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"puuid": "p1", "gameName": "Test", "tagLine": "NA1"})
+
+    async def run():
+        client = RiotClient(base_url="http://riot.test/{host}")
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        account = await client.get_account("Test", "NA1")
+        await client.close()
+        return account
+
+    labels = {"host": "americas", "endpoint": "account-v1.by-riot-id"}
+    before = riot_request_seconds.count(**labels)
+    retries = riot_retries_total.value(reason="429", **labels)
+    assert asyncio.run(run()).puuid == "p1"
+    assert riot_request_seconds.count(**labels) == before + 2
+    assert riot_retries_total.value(reason="429", **labels) == retries + 1
+    assert riot_responses_total.value(status="200", **labels) >= 1
+
+def test_metrics_endpoint():
+    asyncio.run(riot_client.rate_limiter.acquire("kr", "summoner-v4.by-puuid"))
+    client = TestClient(app)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for family in ("lol_riot_request_seconds", "lol_stage_seconds", "lol_bedrock_tokens_total", "lol_active_sessions"):
+        assert f"# TYPE {family} " in body
+    assert 'lol_cache_hit_ratio{cache="snapshots"}' in body
+    assert 'lol_riot_rate_limit_fill{host="kr",scope="app",window="1"} 0.05' in body
+    assert "lol_bedrock_queue_waiting 0" in body
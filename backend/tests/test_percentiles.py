@@ -0,0 +1,78 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import PlayerSnapshot, ExperienceLevel
+from app.services.match_store import MatchStore
+from app.services.percentiles import PercentileTables, build_from_store
+from app.cli.build_percentiles import main as build_cli
+from conftest import make_match_stats, make_snapshot
+
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+def fill_store(store: MatchStore, matches: int = 60):
+    """Synthetic corpus: slot i always plays champion Champ{i} in POSITIONS[i % 5], better slots farm more."""
+    for m in range(matches):
+        match_id = f"NA1_{m}"
+        participants, timeline = [], {}
+        for slot in range(10):
+            puuid = f"p{m % 7}-{slot}"
+            participants.append({
+                "puuid": puuid,
+                "participantId": slot + 1,
+                "teamId": 100 if slot < 5 else 200,
+                "teamPosition": POSITIONS[slot % 5],
+                "championName": f"Champ{slot}",
+                "kills": (m + slot) % 10,
+                "deaths": 1 + (m * slot) % 6,
+                "assists": m % 8,
+                "totalMinionsKilled": 100 + 10 * slot + m % 30,
+                "totalDamageDealtToChampions": 10000 + 500 * slot + 100 * (m % 20),
+                "goldEarned": 9000,
+                "win": slot < 5,
+            })
+            timeline[str(slot + 1)] = {"gold_at_10": 3000 + 20 * slot + 10 * (m % 25), "cs_at_10": 60 + slot + m % 20, "xp_at_10": 4000, "early_items": []}
+        store.put("detail", match_id, {"metadata": {"matchId": match_id}, "info": {"gameDuration": 1800, "participants": participants}})
+        store.put("timeline_summary", match_id, {"frames_parsed": 11, "participants": timeline})
+    for i in range(7):
+        store.put_tier(f"p{i}-0", "GOLD")
+
+def test_tables_rank_values_and_fall_back_to_broader_groups():
+    store = MatchStore(path=":memory:", memory_size=0)
+    fill_store(store)
+    tables = build_from_store(store, min_samples=20)
+
+    low = tables.lookup("cs_at_10", 55, champion="Champ0", role="TOP")
+    mid = tables.lookup("cs_at_10", 70, champion="Champ0", role="TOP")
+    high = tables.lookup("cs_at_10", 95, champion="Champ0", role="TOP")
+    assert low == 0.0 and high == 100.0 and 0 < mid < 100
+
+    # Champ0/TOP as GOLD has its own sketch (every p*-0 is GOLD); an unknown champion falls back to role, then to everyone
+    assert tables.sketch("kda", "GOLD", "TOP", "Champ0") is tables.sketches["GOLD|TOP|Champ0|kda"]
+    assert tables.sketch("kda", "GOLD", "MIDDLE", "Champ2") is tables.sketches["ALL|MIDDLE|Champ2|kda"]
+    assert tables.sketch("kda", None, "TOP", "Nobody") is tables.sketches["ALL|TOP|ALL|kda"]
+    assert tables.sketch("kda") is tables.sketches["ALL|ALL|ALL|kda"]
+    assert tables.sketch("damage_per_min", "GOLD", "TOP", "Champ0") is not None
+
+def test_player_percentile_and_disk_round_trip(tmp_path):
+    store_path = str(tmp_path / "matches.sqlite3")
+    out_path = str(tmp_path / "percentiles.npz")
+    store = MatchStore(path=store_path)
+    fill_store(store)
+    store.close()
+
+    build_cli(["--store", store_path, "--out", out_path, "--min-samples", "20"])
+    tables = PercentileTables.load(out_path)
+    assert len(tables) > 0
+
+    def snapshot(cs_at_10: int) -> PlayerSnapshot:
+        match = make_match_stats(
+            championName="Champ2", assists=4, totalDamageDealtToChampions=12000, goldEarned=9000, items=[],
+            gold_at_10=3200, cs_at_10=cs_at_10, game_minutes=30.0, teamPosition="MIDDLE"
+        )
+        return make_snapshot([match] * 3, tier="GOLD", experience_level=ExperienceLevel.INTERMEDIATE)
+
+    assert tables.player_percentile(snapshot(90)) > tables.player_percentile(snapshot(60))
+    assert PercentileTables({}).player_percentile(snapshot(60)) is None
@@ -0,0 +1,85 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import ExperienceLevel
+from app.services.analyzer import AnalyzerService
+from app.services.job_queue import StageLimits
+from app.services.pipeline import AnalysisPipeline
+from conftest import make_match_stats, make_snapshot
+
+MOCK_SNAPSHOT = make_snapshot(
+    [
+        make_match_stats(
+            championName=champ, kills=6, deaths=3, assists=9, totalMinionsKilled=180,
+            totalDamageDealtToChampions=21000, goldEarned=11000, win=win, items=[0] * 7,
+            gold_at_10=3400, cs_at_10=72
+        )
+        for champ, win in [("Ahri", True), ("Ahri", False), ("Zed", True)]
+    ],
+    tier="GOLD", rank="II", experience_level=ExperienceLevel.INTERMEDIATE
+)
+
+class SlowBedrock:
+    """Stand-in for BedrockClient; each call takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.prompts = []
+
+    async def agenerate_rating(self, snapshot):
+        await asyncio.sleep(self.delay)
+        return {"rating": 66, "percentile": 58.0, "summary": "Good trading, weak vision."}
+
+    async def ainvoke_agent(self, message, snapshot, chat_history=[], chat_summary=""):
+        self.prompts.append(message)
+        await asyncio.sleep(self.delay)
+        return "Buy control wards."
+
+def run_pipeline(mode: str):
+    bedrock = SlowBedrock()
+    pipeline = AnalysisPipeline(AnalyzerService(riot_client=None), bedrock, StageLimits(riot=1, llm=4))
+    start = time.monotonic()
+    analysis = asyncio.run(pipeline.analyze(MOCK_SNAPSHOT, mode=mode))
+    return analysis, time.monotonic() - start, bedrock.prompts
+
+def test_sequential_mode_feeds_rating_summary_into_tip():
+    analysis, elapsed, prompts = run_pipeline("sequential")
+    assert elapsed >= 0.4
+    assert "Good trading, weak vision." in prompts[0]
+    assert analysis.rating == 66 and analysis.coaching_tip == "Buy control wards."
+
+def test_concurrent_mode_overlaps_rating_and_tip():
+    analysis, elapsed, prompts = run_pipeline("concurrent")
+    assert elapsed < 0.35
+    assert "2W-1L over 3 games" in prompts[0]
+    assert "Ahri, Zed" in prompts[0]
+    assert analysis.summary == "Good trading, weak vision."
+
+class BatchBedrock(SlowBedrock):
+    def __init__(self):
+        super().__init__(delay=0.0)
+        self.batches = []
+
+    async def agenerate_ratings(self, snapshots):
+        self.batches.append(len(snapshots))
+        # The model skipped the last player
+        return [{"rating": 70 + i, "percentile": 60.0, "summary": f"Player {i}."} for i in range(len(snapshots) - 1)] + [
+            {"rating": 50, "percentile": 50.0, "summary": "Analysis unavailable.", "error": "missing from batched rating"}
+        ]
+
+def test_batch_analysis_rates_everyone_in_one_call():
+    bedrock = BatchBedrock()
+    pipeline = AnalysisPipeline(AnalyzerService(riot_client=None), bedrock, StageLimits(riot=1, llm=4))
+    snapshots = [MOCK_SNAPSHOT.model_copy(update={"gameName": f"P{i}"}) for i in range(3)]
+    results = asyncio.run(pipeline.analyze_batch(snapshots, mode="sequential"))
+
+    assert bedrock.batches == [3]
+    assert [r.rating for r in results[:2]] == [70, 71]
+    assert results[2].rating_source == "local"
+    assert "Player 1." in bedrock.prompts[1]
+    assert all(r.coaching_tip == "Buy control wards." for r in results)
@@ -0,0 +1,97 @@
+import sys
+import os
+import time
+import asyncio
+from fastapi.testclient import TestClient
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.main import app, session_store
+from app.models import SessionData, AnalysisResult
+from app.utils.profiling import SamplingProfiler
+from conftest import make_snapshot
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_sections_are_sampled_and_awaits_timed():
+    profiler = SamplingProfiler(interval_ms=1, admin_token="secret")
+
+    async def fetch():
+        with profiler.awaiting("riot_await", "match-v5.match"):
+            await asyncio.sleep(0.03)
+
+    async def run():
+        profile = profiler.start("analyze")
+        with profiler.activate(profile):
+            await asyncio.gather(fetch(), fetch())
+            with profiler.thread_section("match_processing_cpu"):
+                busy(0.05)
+            # Threads only count while inside a section entered under the profile
+            await asyncio.to_thread(busy, 0.02)
+        busy(0.01)
+        return profile
+
+    profile = asyncio.run(run())
+    stacks = profile.collapsed().splitlines()
+    awaited = [line for line in stacks if line.startswith("riot_await;")]
+    assert awaited and awaited[0].rsplit(" ", 1)[0].endswith("test_profiling.py:test_sections_are_sampled_and_awaits_timed.<locals>.fetch;[match-v5.match]")
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in awaited) >= 60000
+    assert any(line.startswith("match_processing_cpu;") and "test_profiling.py:busy" in line for line in stacks)
+    assert all(line.split(";")[0] in ("riot_await", "match_processing_cpu") for line in stacks)
+
+    totals = profile.summary()["totals"]
+    assert totals["riot_await"]["count"] == 2
+    assert totals["match_processing_cpu"]["cpu_s"] >= 0.03
+    assert profile.finished and profiler.get(profile.id) is profile
+
+def test_requests_are_selected_by_admin_only():
+    profiler = SamplingProfiler(admin_token="secret")
+    assert not SamplingProfiler(admin_token="").enabled
+    assert not profiler.authorized("wrong") and profiler.authorized("secret")
+    assert profiler.select("chat") is None
+    profiler.arm("chat", 1)
+    assert profiler.select("analyze") is None
+    assert profiler.select("chat") is not None
+    assert profiler.select("chat") is None
+    assert profiler.select("chat", requested=True) is not None
+
+def test_admin_profile_endpoints(monkeypatch):
+    monkeypatch.setattr("app.main.profiler.admin_token", "secret")
+    snapshot = make_snapshot()
+    asyncio.run(session_store.save(SessionData(
+        session_id="profiled-chat", snapshot=snapshot,
+        analysis=AnalysisResult(rating=60, percentile=50.0, summary="ok", coaching_tip="tip")
+    )))
+
+    async def fake_invoke(message, snapshot, chat_history=[], chat_summary=""):
+        from app.utils.profiling import profiler
+        with profiler.awaiting("bedrock_await", "coach"):
+            await asyncio.sleep(0.01)
+        return "Ward more."
+
+    monkeypatch.setattr("app.main.bedrock_client.ainvoke_agent", fake_invoke)
+    client = TestClient(app)
+    admin = {"X-Admin-Token": "secret"}
+
+    assert client.post("/api/admin/profiles", json={"endpoint": "chat"}).status_code == 403
+    assert client.post("/api/admin/profiles", json={"endpoint": "chat", "count": 1}, headers=admin).json() == {"armed": {"chat": 1}}
+
+    profiled = client.post("/api/chat", json={"session_id": "profiled-chat", "message": "hi"})
+    unprofiled = client.post("/api/chat", json={"session_id": "profiled-chat", "message": "again"})
+    assert profiled.json() == {"response": "Ward more."}
+    assert "X-Profile-Id" not in unprofiled.headers
+    profile_id = profiled.headers["X-Profile-Id"]
+
+    assert client.get(f"/api/admin/profiles/{profile_id}").status_code == 403
+    folded = client.get(f"/api/admin/profiles/{profile_id}", headers=admin)
+    assert folded.status_code == 200
+    assert folded.text.startswith("bedrock_await;") and folded.text.rstrip().endswith(tuple("0123456789"))
+    summary = client.get(f"/api/admin/profiles/{profile_id}?format=json", headers=admin).json()
+    assert summary["label"] == "chat" and summary["finished"]
+    assert profile_id in [p["id"] for p in client.get("/api/admin/profiles", headers=admin).json()["profiles"]]
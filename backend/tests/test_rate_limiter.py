@@ -0,0 +1,53 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.services.rate_limiter import RateLimiter, parse_rate_limits
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("20:1,100:120") == [(20, 1), (100, 120)]
+    assert parse_rate_limits("") == []
+    assert parse_rate_limits("bogus,5:10") == [(5, 10)]
+
+def test_acquire_waits_when_window_is_full():
+    async def run():
+        limiter = RateLimiter(app_limits="3:1")
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire("na1", "summoner-v4.by-puuid")
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert elapsed >= 0.9
+
+def test_hosts_have_independent_buckets():
+    async def run():
+        limiter = RateLimiter(app_limits="2:60")
+        for host in ("americas", "na1", "euw1"):
+            await limiter.acquire(host, "m")
+            await limiter.acquire(host, "m")
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    for host in ("americas", "na1", "euw1"):
+        assert stats[host]["app"][0]["used"] == 2
+        assert stats[host]["app"][0]["remaining"] == 0
+
+def test_headers_update_limits_and_counts():
+    limiter = RateLimiter(app_limits="20:1")
+    limiter.update("americas", "match-v5.match", {
+        "X-App-Rate-Limit": "20:1,100:120",
+        "X-App-Rate-Limit-Count": "1:1,40:120",
+        "X-Method-Rate-Limit": "2000:10",
+        "X-Method-Rate-Limit-Count": "5:10",
+    })
+    stats = limiter.stats()["americas"]
+    assert [w["window"] for w in stats["app"]] == [1, 120]
+    assert stats["app"][1]["used"] == 40
+    assert stats["methods"]["match-v5.match"][0] == {
+        "limit": 2000, "window": 10, "used": 5, "remaining": 1995, "fill": 0.003
+    }
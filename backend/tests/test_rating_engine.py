@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import ExperienceLevel
+from app.services.analyzer import AnalyzerService
+from app.services.job_queue import StageLimits
+from app.services.pipeline import AnalysisPipeline
+from app.services.rating_engine import RatingEngine
+from conftest import make_match_stats, make_snapshot as make_base_snapshot
+
+def make_snapshot(level=ExperienceLevel.INTERMEDIATE, tier="GOLD", kills=5, deaths=4, cs=180, gold_at_10=3300, damage_share=0.2):
+    match = make_match_stats(
+        kills=kills, deaths=deaths, assists=6, totalMinionsKilled=cs, goldEarned=11000, items=[1, 2, 3, 0, 0, 0, 0],
+        gold_at_10=gold_at_10, cs_at_10=70, xp_at_10=4500, game_minutes=30.0, damage_share=damage_share
+    )
+    return make_base_snapshot([match] * 5, tier=tier, rank="II", experience_level=level)
+
+def test_rating_tracks_stats_and_is_relative_to_level():
+    engine = RatingEngine()
+    average = engine.rate(make_snapshot())
+    strong = engine.rate(make_snapshot(kills=10, deaths=2, cs=240, gold_at_10=3900, damage_share=0.3))
+    weak = engine.rate(make_snapshot(kills=1, deaths=8, cs=120, gold_at_10=2700, damage_share=0.12))
+
+    assert weak["rating"] < average["rating"] < strong["rating"]
+    assert 40 <= average["rating"] <= 60
+    assert strong["percentile"] > 90 and weak["percentile"] < 10
+    assert set(strong["components"]) == {"kda", "cs_per_min", "gold_at_10", "damage_share"}
+
+    # The same games are a better showing for a beginner than for a diamond player
+    beginner = engine.rate(make_snapshot(level=ExperienceLevel.BEGINNER, tier="BRONZE"))
+    pro = engine.rate(make_snapshot(level=ExperienceLevel.PRO, tier="DIAMOND"))
+    assert beginner["rating"] > average["rating"] > pro["rating"]
+    assert "Biggest gap" in pro["summary"]
+
+def test_rating_is_fast_and_deterministic():
+    engine = RatingEngine()
+    snapshot = make_snapshot()
+    start = time.perf_counter()
+    results = [engine.rate(snapshot) for _ in range(1000)]
+    assert (time.perf_counter() - start) / 1000 < 0.001
+    assert all(r == results[0] for r in results)
+
+class FlakyBedrock:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.summary_calls = 0
+
+    async def agenerate_rating(self, snapshot):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            return {"rating": 50, "percentile": 50.0, "summary": "Analysis unavailable.", "error": "throttled"}
+        return {"rating": 88, "percentile": 95.0, "summary": "From DeepSeek."}
+
+    async def agenerate_summary(self, snapshot, rating):
+        self.summary_calls += 1
+        return "Written by DeepSeek."
+
+def rate(bedrock, mode: str, timeout: float = 1.0):
+    pipeline = AnalysisPipeline(AnalyzerService(riot_client=None), bedrock, StageLimits(riot=1, llm=2), rating_mode=mode)
+    pipeline.rating_timeout = timeout
+    return asyncio.run(pipeline._rate(make_snapshot()))
+
+def test_pipeline_falls_back_to_local_rating_when_bedrock_fails_or_stalls():
+    assert rate(FlakyBedrock(), "llm")["summary"] == "From DeepSeek."
+    assert rate(FlakyBedrock(fail=True), "llm")["source"] == "local"
+    start = time.monotonic()
+    slow = rate(FlakyBedrock(delay=5), "llm", timeout=0.05)
+    assert slow["source"] == "local"
+    assert time.monotonic() - start < 1
+
+def test_local_mode_only_asks_bedrock_for_the_summary():
+    bedrock = FlakyBedrock()
+    result = rate(bedrock, "local")
+    assert result["source"] == "local"
+    assert result["rating"] == RatingEngine().rate(make_snapshot())["rating"]
+    assert result["summary"] == "Written by DeepSeek."
+    assert bedrock.summary_calls == 1
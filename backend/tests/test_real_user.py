@@ -32,12 +32,13 @@ def run_real_workflow():
     analyze_payload = {
         "gameName": game_name, 
         "tagLine": tag_line, 
-        "region": "na1" # Defaulting to NA1 based on "americas" hint, usually safe for testing.
+        "region": "na1", # Defaulting to NA1 based on "americas" hint, usually safe for testing.
+        "wait": True # Block until the analysis job finishes so insights are ready
     }
     
     # Mock BedrockClient to avoid Auth errors
-    with patch("app.services.bedrock_client.BedrockClient.generate_rating") as mock_rating, \
-         patch("app.services.bedrock_client.BedrockClient.invoke_agent") as mock_agent:
+    with patch("app.services.bedrock_client.BedrockClient.agenerate_rating") as mock_rating, \
+         patch("app.services.bedrock_client.BedrockClient.ainvoke_agent") as mock_agent:
         
         # Mock DeepSeek Rating
         mock_rating.return_value = {
@@ -0,0 +1,82 @@
+import sys
+import os
+import asyncio
+import httpx
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.services.riot_client import RiotClient
+
+def make_client(handler) -> RiotClient:
+    client = RiotClient()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+def test_concurrent_identical_requests_are_coalesced():
+    calls = []
+
+    async def handler(request: httpx.Request):
+        calls.append(str(request.url))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=[{"championId": 1, "championLevel": 7, "championPoints": 100}])
+
+    async def run():
+        client = make_client(handler)
+        results = await asyncio.gather(*[client.get_top_mastery("na1", "p1") for _ in range(5)])
+        # A later call after completion goes back to the network
+        await client.get_top_mastery("na1", "p1")
+        await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(r[0].championId == 1 for r in results)
+    assert len(calls) == 2
+
+def test_coalesced_callers_share_not_found():
+    async def handler(request: httpx.Request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(404)
+
+    async def run():
+        client = make_client(handler)
+        results = await asyncio.gather(*[client.get_account("Nobody", "NA1") for _ in range(3)])
+        await client.close()
+        return results
+
+    assert asyncio.run(run()) == [None, None, None]
+
+def test_identity_lookups_are_cached_including_not_found():
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request.url.path)
+        if "Nobody" in request.url.path:
+            return httpx.Response(404)
+        if "by-riot-id" in request.url.path:
+            return httpx.Response(200, json={"puuid": "p1", "gameName": "Test", "tagLine": "NA1"})
+        return httpx.Response(200, json={"id": "s1", "puuid": "p1", "profileIconId": 1, "revisionDate": 0, "summonerLevel": 30})
+
+    async def run():
+        client = make_client(handler)
+        for name in ("Test", "test", "TEST"):
+            account = await client.get_account(name, "na1")
+            summoner = await client.get_summoner("na1", account.puuid)
+        assert summoner.summonerLevel == 30
+        assert await client.get_account("Nobody", "NA1") is None
+        assert await client.get_account("nobody", "NA1") is None
+        assert len(calls) == 3
+
+        # Not-found entries expire on their own, shorter TTL
+        client.not_found_ttl = 0
+        client.account_cache.clear()
+        assert await client.get_account("Nobody", "NA1") is None
+        assert await client.get_account("Nobody", "NA1") is None
+        await client.close()
+        return client
+
+    client = asyncio.run(run())
+    assert len(calls) == 5
+    assert client.account_cache.hits >= 3 and client.summoner_cache.hits == 2
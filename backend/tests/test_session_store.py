@@ -0,0 +1,121 @@
+import sys
+import os
+import time
+import asyncio
+import fnmatch
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import ExperienceLevel, SessionData, AnalysisResult
+from app.services.session_store import (
+    InMemorySessionStore,
+    RedisSessionStore,
+    serialize_session,
+    deserialize_session,
+)
+from conftest import make_match_stats, make_snapshot
+
+def make_session(session_id: str = "s1") -> SessionData:
+    snapshot = make_snapshot([make_match_stats()] * 20, experience_level=ExperienceLevel.INTERMEDIATE)
+    return SessionData(
+        session_id=session_id,
+        snapshot=snapshot,
+        analysis=AnalysisResult(rating=70, percentile=60.0, summary="ok", coaching_tip="tip"),
+        chat_history=[{"user": "hi", "coach": "hello"}]
+    )
+
+class FakeRedis:
+    """Just enough of a RESP server for GET/SET EX/DEL/SCAN."""
+
+    def __init__(self):
+        self.data = {}
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _execute(self, args) -> bytes:
+        command = args[0].upper()
+        if command == b"SET":
+            expires = time.monotonic() + int(args[4]) if len(args) > 4 else None
+            self.data[args[1]] = (args[2], expires)
+            return b"+OK\r\n"
+        if command == b"GET":
+            value, expires = self.data.get(args[1], (None, None))
+            if value is None or (expires and expires < time.monotonic()):
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"DEL":
+            return b":%d\r\n" % (1 if self.data.pop(args[1], None) else 0)
+        if command == b"SCAN":
+            pattern = args[3].decode()
+            keys = [k for k in self.data if fnmatch.fnmatch(k.decode(), pattern)]
+            body = b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n%s" % (len(keys), body)
+        return b"-ERR unknown command\r\n"
+
+def test_serialization_round_trip_is_compact():
+    session = make_session()
+    blob = serialize_session(session)
+    assert deserialize_session(blob) == session
+    assert len(blob) < len(session.model_dump_json()) / 4
+
+def test_in_memory_store_evicts_by_size_and_ttl():
+    async def run():
+        store = InMemorySessionStore(max_sessions=2, ttl=0.05)
+        for i in range(3):
+            await store.save(make_session(f"s{i}"))
+        evicted = await store.get("s0")
+        kept = await store.get("s2")
+        await asyncio.sleep(0.06)
+        return evicted, kept, await store.get("s2"), await store.count()
+
+    evicted, kept, expired, count = asyncio.run(run())
+    assert evicted is None
+    assert kept.session_id == "s2"
+    assert expired is None
+    assert count == 0
+
+def test_redis_store_against_fake_server():
+    async def run():
+        fake = FakeRedis()
+        port = await fake.start()
+        store = RedisSessionStore(f"redis://127.0.0.1:{port}/0", ttl=60)
+
+        session = make_session("abc")
+        await store.save(session)
+        await store.save(make_session("def"))
+        loaded = await store.get("abc")
+        count = await store.count()
+        await store.delete("abc")
+        missing = await store.get("abc")
+
+        await store.close()
+        await fake.stop()
+        return session, loaded, count, missing
+
+    session, loaded, count, missing = asyncio.run(run())
+    assert loaded == session
+    assert count == 2
+    assert missing is None
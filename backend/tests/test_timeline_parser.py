@@ -0,0 +1,76 @@
+import sys
+import os
+import json
+import asyncio
+import httpx
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+os.environ.setdefault("RIOT_API_KEY", "test-key")
+
+from app.services.timeline_parser import TimelineStreamParser, summarize_timeline
+from app.services.riot_client import RiotClient
+
+def make_timeline(num_frames: int = 30) -> dict:
+    frames = []
+    for minute in range(num_frames):
+        frames.append({
+            "events": [
+                {"type": "ITEM_PURCHASED", "participantId": 1, "itemId": 1000 + minute, "timestamp": minute * 60000 - 500},
+                {"type": "CHAMPION_KILL", "killerId": 2, "timestamp": minute * 60000 - 100, "name": "Kaï'Sa"},
+            ],
+            "participantFrames": {
+                str(pid): {"totalGold": 500 + minute * 300 + pid, "minionsKilled": minute * 7, "jungleMinionsKilled": pid % 2, "xp": minute * 400}
+                for pid in range(1, 11)
+            },
+            "timestamp": minute * 60000 + 25,
+        })
+    return {
+        "metadata": {"matchId": "NA1_1", "participants": ["p%d" % i for i in range(10)]},
+        "info": {"endOfGameResult": "GameComplete", "frameInterval": 60000, "frames": frames, "gameId": 1},
+    }
+
+def test_stream_matches_materialized_extraction_and_stops_early():
+    timeline = make_timeline()
+    body = json.dumps(timeline, ensure_ascii=False).encode("utf-8")
+
+    parser = TimelineStreamParser()
+    consumed = 0
+    for i in range(0, len(body), 7):
+        consumed = i + 7
+        if parser.feed(body[i:i + 7]):
+            break
+
+    result = parser.result()
+    assert result == summarize_timeline(timeline)
+    assert result["frames_parsed"] == 16
+    assert consumed < len(body)
+
+    p1 = result["participants"]["1"]
+    assert p1["gold_at_10"] == 500 + 10 * 300 + 1
+    assert p1["cs_at_10"] == 71
+    assert p1["xp_at_10"] == 4000
+    # Purchases before 15:00 only
+    assert p1["early_items"] == [1000 + m for m in range(16)]
+
+def test_short_game_has_no_ten_minute_stats():
+    result = summarize_timeline(make_timeline(num_frames=8))
+    assert result["participants"]["3"]["gold_at_10"] == 0
+    assert len(result["participants"]["3"]["gold"]) == 8
+
+def test_riot_client_streams_timeline_summary():
+    body = json.dumps(make_timeline()).encode("utf-8")
+
+    async def handler(request: httpx.Request):
+        return httpx.Response(200, content=body)
+
+    async def run():
+        client = RiotClient()
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        summary = await client.get_timeline_summary("na1", "NA1_1")
+        await client.close()
+        return summary
+
+    summary = asyncio.run(run())
+    assert summary["participants"]["2"]["cs_at_10"] == 70
@@ -26,6 +26,10 @@ type SessionData = {
   analysis: AnalysisResult;
 };
 
+// Insights polling: once a second, giving up after three minutes
+const POLL_INTERVAL_MS = 1000;
+const MAX_POLL_ATTEMPTS = 180;
+
 type Message = {
   role: "user" | "coach";
   content: string;
@@ -42,6 +46,7 @@ export default function Home() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [inputMessage, setInputMessage] = useState("");
   const [isChatLoading, setIsChatLoading] = useState(false);
+  const [chatStatus, setChatStatus] = useState("");
   const [error, setError] = useState("");
 
   const handleAnalyze = async (e: React.FormEvent) => {
@@ -64,11 +69,27 @@ export default function Home() {
       const data = await res.json();
       const sessionId = data.session_id;
 
-      // Fetch full insights
-      const insightsRes = await fetch(
-        `http://localhost:8000/api/insights/${sessionId}`
-      );
-      const insights = await insightsRes.json();
+      // Analysis runs as a background job; poll insights until it is ready
+      let insights = null;
+      for (let attempt = 0; ; attempt++) {
+        const insightsRes = await fetch(
+          `http://localhost:8000/api/insights/${sessionId}`
+        );
+        if (!insightsRes.ok) {
+          // e.g. 404 once the session has expired or been evicted
+          const err = await insightsRes.json().catch(() => ({}));
+          throw new Error(err.detail || "Analysis failed");
+        }
+        insights = await insightsRes.json();
+        if (insights.status === "failed") {
+          throw new Error(insights.error || "Analysis failed");
+        }
+        if (insights.analysis) break;
+        if (attempt + 1 >= MAX_POLL_ATTEMPTS) {
+          throw new Error("Analysis is taking too long, please try again");
+        }
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+      }
 
       setSession(insights);
       setMessages([
@@ -91,7 +112,7 @@ export default function Home() {
     setIsChatLoading(true);
 
     try {
-      const res = await fetch("http://localhost:8000/api/chat", {
+      const res = await fetch("http://localhost:8000/api/chat/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
@@ -100,15 +121,60 @@ export default function Home() {
         }),
       });
 
-      const data = await res.json();
-      setMessages((prev) => [
-        ...prev,
-        { role: "coach", content: data.response },
-      ]);
+      if (!res.ok || !res.body) {
+        throw new Error("Chat failed");
+      }
+
+      // Append an empty coach message and grow it as tokens arrive
+      setMessages((prev) => [...prev, { role: "coach", content: "" }]);
+      const updateCoachMessage = (update: (content: string) => string) =>
+        setMessages((prev) => {
+          const next = [...prev];
+          const last = next[next.length - 1];
+          next[next.length - 1] = { ...last, content: update(last.content) };
+          return next;
+        });
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Server-sent events are separated by a blank line
+        const blocks = buffer.split("\n\n");
+        buffer = blocks.pop() || "";
+        for (const block of blocks) {
+          const dataLine = block
+            .split("\n")
+            .find((line) => line.startsWith("data: "));
+          if (!dataLine) continue;
+          const event = JSON.parse(dataLine.slice(6));
+
+          if (event.type === "token") {
+            setIsChatLoading(false);
+            setChatStatus("");
+            updateCoachMessage((content) => content + event.text);
+          } else if (event.type === "tool_start") {
+            // Text before a tool call was the coach thinking aloud; the answer follows the tool
+            setChatStatus("Consulting the analyst...");
+            updateCoachMessage(() => "");
+          } else if (event.type === "tool_end") {
+            setChatStatus("");
+          } else if (event.type === "done") {
+            updateCoachMessage(() => event.response);
+          } else if (event.type === "error") {
+            updateCoachMessage(() => event.detail);
+          }
+        }
+      }
     } catch (err) {
       console.error(err);
     } finally {
       setIsChatLoading(false);
+      setChatStatus("");
     }
   };
 
@@ -270,6 +336,11 @@ export default function Home() {
                     </div>
                   </div>
                 ))}
+                {chatStatus && (
+                  <div className="text-xs text-neutral-500 italic">
+                    {chatStatus}
+                  </div>
+                )}
                 {isChatLoading && (
                   <div className="flex justify-start">
                     <div className="bg-neutral-800 rounded-2xl px-5 py-3">